@@ -0,0 +1 @@
+# Benchmark inti kalkulator: python -m benchmarks.inti
@@ -0,0 +1,220 @@
+"""Benchmark inti kalkulator (tanpa Streamlit) pada data bawaan dan data sintetis.
+
+Contoh:
+
+    python -m benchmarks.inti                          # semua skala, bandingkan dengan baseline
+    python -m benchmarks.inti --skala bawaan,1k        # sebagian skala saja
+    python -m benchmarks.inti --simpan-baseline        # perbarui benchmarks/baseline.json
+
+Setiap kasus dijalankan ``--ulang`` kali (median waktu dilaporkan, waktu
+minimum dibandingkan dengan baseline) lalu sekali lagi di bawah tracemalloc
+untuk puncak memori. Exit code 1 bila ada
+kasus yang lebih lambat dari baseline melebihi ``--ambang`` (default 30%).
+Baseline bergantung pada mesin: simpan ulang di mesin referensi sebelum
+dipakai sebagai gerbang CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.sintetis import buat_data_sintetis
+from kalkulator.ambang import kehilangan_minimum_kursi
+from kalkulator.data import baca_workbook
+from kalkulator.kriteria import kriteria_semua_partai
+from kalkulator.laporan import export_to_html
+from kalkulator.metode_alokasi import METODE_ALOKASI, kursi_metode
+from kalkulator.rab import hitung_sp_rab, matriks_proporsi
+from kalkulator.sainte_lague import alokasi_batch, kursi_batch
+from kalkulator.seleksi import seleksi_dapil
+from kalkulator.transfer_suara import evaluasi_transfer
+
+FOLDER = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(FOLDER, "baseline.json")
+WORKBOOK = os.path.join(os.path.dirname(FOLDER), "data_calculated.xlsx")
+
+# skala → argumen buat_data_sintetis (None = workbook bawaan)
+SKALA = {
+    "bawaan": None,
+    "1k": dict(jumlah_dapil=1_000, jumlah_partai=20),
+    "10k": dict(jumlah_dapil=10_000, jumlah_partai=24),
+    "kursi_besar": dict(jumlah_dapil=1_000, jumlah_partai=20, kursi_min=20, kursi_maks=50),
+    # Skala DPRD kabupaten/kota: ±2.500 dapil, tanpa ambang parlemen
+    "dprd2": dict(jumlah_dapil=2_500, jumlah_partai=18, kursi_min=3, kursi_maks=12, tingkat="DPRD II"),
+}
+PARTAI_UJI = "PSI"
+PROPORSI = {f"proporsi_{j}_{i}": 100 for j in range(1, 5) for i in range(1, j + 1)}
+PARAMETER_RAB = dict(kehilangan_2024=5.0, kehilangan_sp=10.0, angka_psikologis=20_000,
+                     biaya_manajemen=100_000, biaya_pendampingan=50_000)
+
+
+def muat_skala(nama):
+    if SKALA[nama] is None:
+        return baca_workbook(WORKBOOK, versi=("benchmark", nama))
+    return buat_data_sintetis(**SKALA[nama])
+
+
+def kasus_untuk(data):
+    """Daftar ``(nama, fungsi)`` untuk satu dataset; fungsi tanpa argumen."""
+    partai_list = data.partai
+    lolos = data.partai_lolos
+    suara = data.df_suara[lolos].fillna(0).to_numpy().astype(np.int64)
+    proporsi = matriks_proporsi(PROPORSI)
+
+    def kriteria(metode):
+        def jalan():
+            data.cache_turunan.kosongkan()
+            return kriteria_semua_partai(data, partai_list, lolos, metode)
+        return jalan
+
+    tabel, rentang = kriteria_semua_partai(data, partai_list, lolos, "heuristik")
+    awal, akhir = rentang[PARTAI_UJI]
+    df_all_kriteria = tabel.iloc[awal:akhir]
+    target = max(int(df_all_kriteria["TARGET_TAMBAHAN_KURSI"].sum()) // 10, 1)
+    parameter_biaya = dict(
+        kehilangan_2024=PARAMETER_RAB["kehilangan_2024"], kehilangan_sp=PARAMETER_RAB["kehilangan_sp"],
+        proporsi=proporsi, angka_psikologis=PARAMETER_RAB["angka_psikologis"],
+        biaya_manajemen=PARAMETER_RAB["biaya_manajemen"], biaya_pendampingan=PARAMETER_RAB["biaya_pendampingan"],
+    )
+    df_terpilih = seleksi_dapil(df_all_kriteria, target)
+
+    # Skenario transfer: 25% suara antar setiap pasangan 8 partai lolos pertama, nasional
+    skenario_transfer = [[{"dari": a, "ke": b, "persen": 25.0}] for a in lolos[:8] for b in lolos[:8] if a != b]
+
+    def sp_rab():
+        return hitung_sp_rab(df_all_kriteria, **parameter_biaya)
+
+    def ekspor():
+        df = df_terpilih.join(hitung_sp_rab(df_terpilih, **parameter_biaya))
+        return export_to_html(df, data.df_dapil, PARTAI_UJI, 0, 0)
+
+    return [
+        ("alokasi_batch", lambda: alokasi_batch(suara, data.alokasi)),
+        ("kursi_batch", lambda: kursi_batch(suara, data.alokasi)),
+        ("metode_alokasi", lambda: [kursi_metode(suara, data.alokasi, metode) for metode in METODE_ALOKASI]),
+        ("transfer_suara", lambda: evaluasi_transfer(data, skenario_transfer, lolos)),
+        ("kerentanan_kursi", lambda: kehilangan_minimum_kursi(suara, data.alokasi)),
+        ("kriteria_heuristik", kriteria("heuristik")),
+        ("kriteria_eksak", kriteria("eksak")),
+        ("seleksi_urutan", lambda: seleksi_dapil(df_all_kriteria, target)),
+        ("seleksi_rab", lambda: seleksi_dapil(df_all_kriteria, target, "rab", **parameter_biaya)),
+        ("sp_rab", sp_rab),
+        ("ekspor_html", ekspor),
+    ]
+
+
+def ukur(fungsi, ulang, durasi_sampel=0.02):
+    """Median & minimum waktu per panggilan, serta puncak memori satu panggilan.
+
+    Seperti timeit, satu sampel mengulang fungsi sampai minimal
+    ``durasi_sampel`` detik agar kasus sub-milidetik tidak didominasi noise.
+    """
+    mulai = time.perf_counter()
+    fungsi()  # pemanasan (import, cache NumPy) sekaligus kalibrasi
+    sekali = time.perf_counter() - mulai
+    putaran = max(1, int(durasi_sampel / sekali) if sekali > 0 else 1)
+    waktu = []
+    for _ in range(ulang):
+        mulai = time.perf_counter()
+        for _ in range(putaran):
+            fungsi()
+        waktu.append((time.perf_counter() - mulai) / putaran)
+    tracemalloc.start()
+    fungsi()
+    puncak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(waktu), min(waktu), puncak
+
+
+def jalankan(daftar_skala, ulang, filter_kasus=None, cetak=print):
+    hasil = {}
+    for skala in daftar_skala:
+        data = muat_skala(skala)
+        jumlah_dapil = len(data.nama_dapil)
+        for nama, fungsi in kasus_untuk(data):
+            if filter_kasus and not any(f in nama for f in filter_kasus):
+                continue
+            median, minimum, puncak = ukur(fungsi, ulang)
+            kunci = f"{skala}/{nama}"
+            hasil[kunci] = {
+                "median_detik": median,
+                "min_detik": minimum,
+                "dapil_per_detik": jumlah_dapil / median if median else None,
+                "puncak_mb": puncak / 2**20,
+            }
+            cetak(f"{kunci:32s} {median * 1e3:10.2f} ms {hasil[kunci]['dapil_per_detik']:14,.0f} dapil/s "
+                  f"{hasil[kunci]['puncak_mb']:9.1f} MB")
+    return hasil
+
+
+def bandingkan(hasil, baseline, ambang):
+    """Daftar ``(kunci, rasio)`` kasus yang melambat lebih dari ``ambang``.
+
+    Yang dibandingkan adalah waktu minimum (paling stabil terhadap gangguan
+    proses lain), bukan median.
+    """
+    regresi = []
+    for kunci, nilai in hasil.items():
+        acuan = baseline.get(kunci)
+        if not acuan:
+            continue
+        rasio = nilai["min_detik"] / acuan["min_detik"]
+        if rasio > 1 + ambang:
+            regresi.append((kunci, rasio))
+    return regresi
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--skala", default=",".join(SKALA), help=f"Daftar skala dipisah koma ({', '.join(SKALA)})")
+    parser.add_argument("--kasus", default="", help="Hanya kasus yang namanya memuat teks ini (dipisah koma)")
+    parser.add_argument("--ulang", type=int, default=5, help="Jumlah pengulangan per kasus")
+    parser.add_argument("--baseline", default=BASELINE, help="File baseline JSON")
+    parser.add_argument("--ambang", type=float, default=0.30, help="Batas perlambatan relatif sebelum gagal")
+    parser.add_argument("--simpan-baseline", action="store_true", help="Tulis hasil sebagai baseline baru")
+    parser.add_argument("--output", help="Simpan hasil lengkap ke file JSON")
+    args = parser.parse_args(argv)
+
+    daftar_skala = [s.strip() for s in args.skala.split(",") if s.strip()]
+    tidak_dikenal = [s for s in daftar_skala if s not in SKALA]
+    if tidak_dikenal:
+        parser.error(f"Skala tidak dikenal: {', '.join(tidak_dikenal)}")
+    filter_kasus = [k.strip() for k in args.kasus.split(",") if k.strip()]
+
+    hasil = jalankan(daftar_skala, args.ulang, filter_kasus)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(hasil, f, indent=2)
+
+    if args.simpan_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(hasil)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline disimpan: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("Baseline belum ada; jalankan dengan --simpan-baseline.")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regresi = bandingkan(hasil, baseline, args.ambang)
+    for kunci, rasio in regresi:
+        print(f"REGRESI {kunci}: {rasio:.2f}× baseline")
+    if regresi:
+        return 1
+    print(f"Tidak ada regresi di atas {args.ambang:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Dataset sintetis berskala besar dengan struktur yang sama dengan data_calculated.xlsx."""
+import numpy as np
+import pandas as pd
+
+from kalkulator.data import TINGKAT_BAWAAN, TINGKAT_BERAMBANG, DataPemilu
+from kalkulator.sainte_lague import alokasi_batch
+
+# Urutan kolom partai sheet perolehan_suara; partai tambahan diberi nama PARTAI_19, ...
+PARTAI_2024 = [
+    "PKB", "GERINDRA", "PDIP", "GOLKAR", "NASDEM", "BURUH", "GELORA", "PKS", "PKN",
+    "HANURA", "GARUDA", "PAN", "PBB", "DEMOKRAT", "PSI", "PERINDO", "PPP", "UMMAT",
+]
+# Partai yang lolos ambang pada data sintetis (meniru Pemilu 2024)
+PARTAI_LOLOS = ["PKB", "GERINDRA", "PDIP", "GOLKAR", "NASDEM", "PKS", "PAN", "DEMOKRAT"]
+
+
+def daftar_partai(jumlah_partai):
+    tambahan = [f"PARTAI_{i}" for i in range(len(PARTAI_2024) + 1, jumlah_partai + 1)]
+    return (PARTAI_2024 + tambahan)[:jumlah_partai]
+
+
+def buat_data_sintetis(jumlah_dapil, jumlah_partai=20, kursi_min=3, kursi_maks=10,
+                       jumlah_propinsi=38, seed=0, tingkat=TINGKAT_BAWAAN):
+    """``DataPemilu`` acak: DPT, pangsa suara (Dirichlet), alokasi kursi, dan hasil SL.
+
+    Partai lolos (PARTAI_LOLOS) mendapat pangsa rata-rata lebih besar, dan
+    sheet hasil_sl dihitung dengan Sainte-Laguë atas partai lolos saja,
+    seperti data aslinya. Untuk tingkat DPRD (tanpa ambang parlemen) seluruh
+    partai ikut pembagian kursi.
+    """
+    rng = np.random.default_rng(seed)
+    partai = daftar_partai(jumlah_partai)
+    nama_dapil = [f"DAPIL {i:05d}" for i in range(1, jumlah_dapil + 1)]
+    propinsi = [f"PROPINSI {i % jumlah_propinsi + 1:02d}" for i in range(jumlah_dapil)]
+
+    dpt = rng.integers(200_000, 3_000_000, size=jumlah_dapil)
+    alokasi = rng.integers(kursi_min, kursi_maks + 1, size=jumlah_dapil)
+    alpha = np.array([8.0 if p in PARTAI_LOLOS else 1.0 for p in partai])
+    pangsa = rng.dirichlet(alpha, size=jumlah_dapil)
+    suara = np.rint(pangsa * (dpt * 0.8)[:, None]).astype(np.int64)
+
+    lolos = [p for p in partai if p in PARTAI_LOLOS or tingkat not in TINGKAT_BERAMBANG]
+    kolom_lolos = [partai.index(p) for p in lolos]
+    kursi, _ = alokasi_batch(suara[:, kolom_lolos], alokasi)
+
+    df_suara = pd.DataFrame(suara, columns=partai)
+    df_suara.insert(0, "DAPIL", nama_dapil)
+    df_kursi = pd.DataFrame(kursi, columns=lolos)
+    df_kursi.insert(0, "DAPIL", nama_dapil)
+    df_dapil = pd.DataFrame({
+        "DAPIL": nama_dapil,
+        "PROPINSI": propinsi,
+        "GUGUSAN": ["SINTETIS"] * jumlah_dapil,
+        "ALOKASI KURSI": alokasi,
+        "TOTAL DPT": dpt,
+    })
+    versi = ("sintetis", jumlah_dapil, jumlah_partai, kursi_min, kursi_maks, seed, tingkat)
+    return DataPemilu(df_suara, df_kursi, df_dapil, versi, tingkat=tingkat, partai_lolos=lolos)
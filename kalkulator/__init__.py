@@ -0,0 +1 @@
+# Inti perhitungan Kalkulator Kebutuhan Suara Pemilu 2029 (tanpa Streamlit)
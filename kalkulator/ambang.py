@@ -0,0 +1,252 @@
+"""Ambang suara eksak: tambahan suara minimum untuk meraih kursi tambahan.
+
+Untuk partai p dengan s kursi di dapil berkursi S, p meraih n = s + j kursi
+tepat ketika hasil bagi ke-n miliknya, (v + x) / (2n - 1), mengalahkan hasil
+bagi peringkat ke-(S - n + 1) di antara partai lain (suara partai lain tetap).
+Hasil bagi partai lain diurutkan eksak (``urutan_hasil_bagi``) dan ambang
+dihitung tertutup dengan perkalian silang bilangan bulat, tanpa simulasi
+berulang, untuk seluruh dapil × partai sekaligus. Hasil bagi yang tepat sama
+diputuskan ``pemecah_seri`` seperti ``alokasi_batch``.
+
+Sisi bertahan memakai ambang yang sama: kursi ke-k lepas begitu suara partai
+turun di bawah ambang meraih k kursi, dan perebutnya adalah pemilik hasil
+bagi pesaing tersebut.
+"""
+import numpy as np
+import pandas as pd
+
+from kalkulator.sainte_lague import BATAS_INT64, kursi_dari_urutan, peringkat_seri, urutan_hasil_bagi
+
+
+# Batas elemen tensor antara (dapil × partai × hasil bagi) per blok baris
+ELEMEN_BLOK = 1 << 22
+
+
+def _per_blok(fungsi, suara, alokasi, partai_aktif, pemecah_seri, seed, lebar):
+    """Jalankan ``fungsi(suara, alokasi, aktif, peringkat, pemecah_seri, lebar)`` per blok baris.
+
+    Baris diproses per blok agar memori antara tetap terbatas untuk ribuan
+    dapil; hasil tiap baris tidak bergantung pada baris lain. Peringkat seri
+    diundi sekali untuk seluruh matriks, sehingga ``undian`` sama dengan
+    ``alokasi_batch`` pada matriks yang sama.
+    """
+    suara = np.asarray(suara, dtype=np.int64)
+    alokasi = np.asarray(alokasi, dtype=np.int64)
+    n_dapil, n_partai = suara.shape
+    if partai_aktif is None:
+        aktif = np.ones((n_dapil, n_partai), dtype=bool)
+    else:
+        aktif = np.broadcast_to(np.asarray(partai_aktif, dtype=bool), (n_dapil, n_partai))
+    peringkat = np.asarray(peringkat_seri(suara, pemecah_seri, seed))
+
+    maks_kursi = int(alokasi.max()) if n_dapil else 0
+    ukuran = max(ELEMEN_BLOK // max(n_partai * n_partai * maks_kursi, 1), 1)
+    if n_dapil <= ukuran:
+        return fungsi(suara, alokasi, aktif, peringkat, pemecah_seri, lebar)
+    hasil = None
+    for awal in range(0, n_dapil, ukuran):
+        blok = slice(awal, awal + ukuran)
+        bagian = fungsi(suara[blok], alokasi[blok], aktif[blok], peringkat[blok], pemecah_seri, lebar)
+        if hasil is None:
+            hasil = tuple(np.empty((n_dapil,) + b.shape[1:], dtype=b.dtype) for b in bagian)
+        for h, b in zip(hasil, bagian):
+            h[blok] = b
+    return hasil
+
+
+def suara_minimum_kursi(suara, alokasi, partai_aktif=None, maks_tambahan=4, pemecah_seri="urutan", seed=0):
+    """Tambahan suara minimum per dapil × partai untuk +1 … +``maks_tambahan`` kursi.
+
+    Mengembalikan ``(kursi, tambahan)``: ``kursi`` adalah alokasi saat ini dan
+    ``tambahan[d, p, j - 1]`` adalah suara yang perlu ditambahkan partai p di
+    dapil d agar meraih j kursi lebih banyak (-1 bila mustahil, misalnya
+    melebihi alokasi dapil, atau partai tidak aktif, atau targetnya melampaui
+    jangkauan int64). Hasil bagi kembar diputuskan ``pemecah_seri``/``seed``
+    (lihat ``peringkat_seri``).
+    """
+    return _per_blok(_suara_minimum_blok, suara, alokasi, partai_aktif, pemecah_seri, seed, maks_tambahan)
+
+
+def kehilangan_minimum_kursi(suara, alokasi, partai_aktif=None, pemecah_seri="urutan", seed=0):
+    """Kehilangan suara minimum agar setiap kursi yang sudah dipegang lepas, beserta perebutnya.
+
+    Mengembalikan ``(kursi, kehilangan, perebut)`` berbentuk (dapil × partai ×
+    kursi maksimum): ``kehilangan[d, p, k - 1]`` adalah suara yang harus
+    hilang dari partai p (suara partai lain tetap) agar kursinya di dapil d
+    turun di bawah k, dan ``perebut`` indeks partai yang mengambil kursi
+    tersebut. Bernilai -1 untuk k di atas kursi partai atau kursi yang tidak
+    dapat lepas (mis. tidak ada hasil bagi partai lain yang tersisa).
+
+    Partai tetap memegang k kursi selama hasil bagi ke-k miliknya mengalahkan
+    hasil bagi peringkat ke-(S - k + 1) di antara partai lain, jadi angkanya
+    adalah selisih suara 2024 dengan ambang meraih k kursi, ditambah satu.
+    Hasil bagi kembar diputuskan ``pemecah_seri``/``seed``.
+    """
+    maks_kursi = int(np.max(alokasi, initial=0))
+    return _per_blok(_kehilangan_minimum_blok, suara, alokasi, partai_aktif, pemecah_seri, seed, maks_kursi)
+
+
+def _alokasi_blok(suara, alokasi, aktif, peringkat, pemecah_seri):
+    # Kursi saat ini dan seluruh hasil bagi terurut eksak (peringkat seri "urutan" = nomor urut)
+    n_dapil, n_partai = suara.shape
+    if not n_dapil or not n_partai or int(alokasi.max()) <= 0:
+        return np.zeros((n_dapil, n_partai), dtype=np.int64), None, None
+    partai_urut, pembagi_urut = urutan_hasil_bagi(
+        suara, alokasi, aktif, None if pemecah_seri == "urutan" else peringkat,
+    )
+    kursi, _ = kursi_dari_urutan(partai_urut, alokasi, n_partai)
+    return kursi, partai_urut, pembagi_urut
+
+
+def _target_kursi(suara, alokasi, aktif, peringkat, pemecah_seri, partai_urut, pembagi_urut, n):
+    """Suara minimum tiap dapil × partai untuk meraih ``n[d, p, j]`` kursi (suara partai lain tetap).
+
+    ``partai_urut``/``pembagi_urut`` adalah seluruh hasil bagi terurut eksak
+    dari ``urutan_hasil_bagi``. Mengembalikan ``(target, partai_lawan,
+    mungkin)``: ``partai_lawan`` pemilik hasil bagi pesaing penentu,
+    ``mungkin`` False bila n tidak dapat dicapai.
+    """
+    n_dapil, n_partai = suara.shape
+    sah_urut = partai_urut >= 0
+
+    # Untuk tiap partai p: susunan hasil bagi partai lain saja (milik p digeser ke belakang)
+    milik_p = partai_urut[:, None, :] == np.arange(n_partai)[None, :, None]
+    lain = np.argsort(milik_p | ~sah_urut[:, None, :], axis=2, kind="stable")
+    jumlah_lain = (~milik_p & sah_urut[:, None, :]).sum(axis=2)
+
+    peringkat_lawan = alokasi[:, None, None] - n  # indeks 0-based pesaing ke-(S - n + 1)
+    mungkin = (n >= 1) & (n <= alokasi[:, None, None]) & (peringkat_lawan < jumlah_lain[:, :, None]) & aktif[:, :, None]
+    peringkat_lawan = np.clip(peringkat_lawan, 0, partai_urut.shape[1] - 1)
+
+    idx = np.take_along_axis(lain, peringkat_lawan, axis=2)
+    baris = np.arange(n_dapil)[:, None, None]
+    partai_lawan = np.maximum(partai_urut[baris, idx], 0)
+    suara_lawan = suara[baris, partai_lawan]
+    pembagi_lawan = np.maximum(pembagi_urut[baris, idx], 1)
+    pembagi_p = np.maximum(2 * n - 1, 1)
+
+    # (v + x) / (2n - 1) > u / e; perkalian u·(2n - 1) yang bisa melimpah dihitung dengan int Python
+    melimpah = mungkin & (suara_lawan >= BATAS_INT64 // pembagi_p)
+    batas, sisa = np.divmod(np.where(melimpah, 0, suara_lawan) * pembagi_p, pembagi_lawan)
+    for i in zip(*np.nonzero(melimpah)):
+        b, r = divmod(int(suara_lawan[i]) * int(pembagi_p[i]), int(pembagi_lawan[i]))
+        if b >= np.iinfo(np.int64).max:
+            # Target di luar jangkauan int64: dianggap tidak dapat dicapai
+            mungkin[i] = False
+            continue
+        batas[i], sisa[i] = b, r
+
+    # Hasil bagi sama besar: p menang bila peringkat serinya (pada suara barunya) lebih awal
+    p = np.arange(n_partai)[None, :, None]
+    if pemecah_seri == "suara":
+        # Peringkat ikut suara: saat seri suara p = batas; suara sama diputuskan nomor urut
+        menang_seri = (batas > suara_lawan) | ((batas == suara_lawan) & (p < partai_lawan))
+    else:
+        menang_seri = peringkat[:, :, None] < peringkat[baris, partai_lawan]
+    target = np.where((sisa == 0) & menang_seri, batas, batas + 1)
+    return target, partai_lawan, mungkin
+
+
+def _suara_minimum_blok(suara, alokasi, aktif, peringkat, pemecah_seri, maks_tambahan):
+    n_dapil, n_partai = suara.shape
+    kursi, partai_urut, pembagi_urut = _alokasi_blok(suara, alokasi, aktif, peringkat, pemecah_seri)
+    tambahan = np.full((n_dapil, n_partai, maks_tambahan), -1, dtype=np.int64)
+    if partai_urut is None or maks_tambahan <= 0:
+        return kursi, tambahan
+
+    n = kursi[:, :, None] + np.arange(1, maks_tambahan + 1)[None, None, :]
+    target, _, mungkin = _target_kursi(suara, alokasi, aktif, peringkat, pemecah_seri, partai_urut, pembagi_urut, n)
+    hasil = np.maximum(target - suara[:, :, None], 0)
+    tambahan[mungkin] = hasil[mungkin]
+    return kursi, tambahan
+
+
+def _kehilangan_minimum_blok(suara, alokasi, aktif, peringkat, pemecah_seri, maks_kursi):
+    n_dapil, n_partai = suara.shape
+    kursi, partai_urut, pembagi_urut = _alokasi_blok(suara, alokasi, aktif, peringkat, pemecah_seri)
+    kehilangan = np.full((n_dapil, n_partai, maks_kursi), -1, dtype=np.int64)
+    perebut = np.full((n_dapil, n_partai, maks_kursi), -1, dtype=np.int64)
+    if partai_urut is None or maks_kursi <= 0:
+        return kursi, kehilangan, perebut
+
+    k = np.broadcast_to(np.arange(1, maks_kursi + 1)[None, None, :], (n_dapil, n_partai, maks_kursi))
+    target, partai_lawan, mungkin = _target_kursi(
+        suara, alokasi, aktif, peringkat, pemecah_seri, partai_urut, pembagi_urut, k,
+    )
+    # Kursi ke-k lepas begitu suara turun di bawah target; target 0 berarti tidak dapat lepas
+    mungkin &= (k <= kursi[:, :, None]) & (target > 0)
+    kehilangan[mungkin] = (suara[:, :, None] - target + 1)[mungkin]
+    perebut[mungkin] = partai_lawan[mungkin]
+    return kursi, kehilangan, perebut
+
+
+def tabel_ambang(data, partai_lolos, maks_tambahan=4, pemecah_seri="urutan", seed=0):
+    """Tabel panjang ambang suara eksak seluruh dapil × partai dalam ``partai_lolos``."""
+    partai_lolos = [p for p in partai_lolos if p in data.df_suara.columns]
+    suara = data.df_suara[partai_lolos].fillna(0).to_numpy().astype(np.int64)
+    baris = np.flatnonzero(data.dapil_lengkap)
+    kursi, tambahan = suara_minimum_kursi(
+        suara[baris], data.alokasi[baris], maks_tambahan=maks_tambahan, pemecah_seri=pemecah_seri, seed=seed,
+    )
+
+    n_dapil, n_partai = kursi.shape
+    j = np.arange(1, maks_tambahan + 1)
+    df = pd.DataFrame({
+        "DAPIL": np.repeat(np.asarray(data.nama_dapil, dtype=object)[baris], n_partai * maks_tambahan),
+        "PARTAI": np.tile(np.repeat(np.asarray(partai_lolos, dtype=object), maks_tambahan), n_dapil),
+        "KURSI": np.repeat(kursi.ravel(), maks_tambahan),
+        "TAMBAHAN_KURSI": np.tile(j, n_dapil * n_partai),
+        "SUARA_2024": np.repeat(suara[baris].ravel(), maks_tambahan),
+        "SUARA_TAMBAHAN_MINIMUM": tambahan.ravel(),
+    })
+    df = df[df["SUARA_TAMBAHAN_MINIMUM"] >= 0].reset_index(drop=True)
+    df["TARGET_SUARA"] = df["SUARA_2024"] + df["SUARA_TAMBAHAN_MINIMUM"]
+    return df
+
+
+def tabel_kerentanan(data, partai_lolos, partai=None, pemecah_seri="urutan", seed=0):
+    """Kerentanan setiap kursi yang dipegang: kehilangan suara minimum dan partai perebutnya.
+
+    Satu baris per kursi hasil Sainte-Laguë 2024 (``KURSI_KE`` = kursi ke-k
+    partai di dapil itu), diurutkan dari margin terkecil. ``PERINGKAT_NASIONAL``
+    dan ``PERINGKAT_PROPINSI`` dihitung atas baris yang dikembalikan (seluruh
+    partai, atau ``partai`` saja). Kursi yang tidak dapat lepas bernilai -1 dan
+    diletakkan paling akhir. Hasil bagi kembar diputuskan ``pemecah_seri``/``seed``.
+    """
+    partai_lolos = [p for p in partai_lolos if p in data.df_suara.columns]
+    kunci = ("kerentanan", tuple(partai_lolos), pemecah_seri, seed)
+    df = data.cache_turunan.ambil(kunci)
+    if df is None:
+        baris = np.flatnonzero(data.dapil_lengkap)
+        suara = data.df_suara[partai_lolos].fillna(0).to_numpy().astype(np.int64)[baris]
+        kursi, kehilangan, perebut = kehilangan_minimum_kursi(
+            suara, data.alokasi[baris], pemecah_seri=pemecah_seri, seed=seed,
+        )
+
+        # Satu baris per kursi yang dipegang (k <= kursi partai di dapil)
+        d, p, k = np.nonzero(np.arange(1, kehilangan.shape[2] + 1)[None, None, :] <= kursi[:, :, None])
+        nama_partai = np.asarray(partai_lolos, dtype=object)
+        hilang = kehilangan[d, p, k]
+        rebut = perebut[d, p, k]
+        df = pd.DataFrame({
+            "DAPIL": np.asarray(data.nama_dapil, dtype=object)[baris][d],
+            "PROPINSI": data.dapil_selaras["PROPINSI"].to_numpy()[baris][d],
+            "PARTAI": nama_partai[p],
+            "KURSI_KE": k + 1,
+            "KURSI": kursi[d, p],
+            "SUARA_2024": suara[d, p],
+            "SUARA_HILANG_MINIMUM": hilang,
+            "PERSEN_HILANG": np.where(hilang >= 0, 100 * hilang / np.maximum(suara[d, p], 1), np.nan).round(2),
+            "PARTAI_PEREBUT": np.where(rebut >= 0, nama_partai[np.maximum(rebut, 0)], ""),
+        })
+        urut = np.lexsort((df["KURSI_KE"].to_numpy(), np.where(hilang >= 0, hilang, np.iinfo(np.int64).max)))
+        df = df.iloc[urut].reset_index(drop=True)
+        data.cache_turunan.simpan(kunci, df)
+
+    if partai is not None:
+        df = df[df["PARTAI"] == partai].reset_index(drop=True)
+    else:
+        df = df.copy()
+    df.insert(0, "PERINGKAT_NASIONAL", np.arange(1, len(df) + 1))
+    df.insert(1, "PERINGKAT_PROPINSI", df.groupby("PROPINSI", dropna=False).cumcount().to_numpy() + 1)
+    return df
@@ -0,0 +1,307 @@
+"""Evaluasi skenario massal tanpa UI: partai × target kursi × parameter SP/RAB.
+
+Contoh:
+
+    python -m kalkulator.batch skenario.csv --output hasil/
+    python -m kalkulator.batch skenario.json --output hasil/ --proses 8 --format parquet
+
+File skenario berupa CSV (satu baris per skenario) atau JSON: daftar objek
+skenario, atau objek ``{"dasar": {...}, "grid": {"partai": [...], ...}}``
+yang dikembangkan menjadi hasil kali kartesius ``grid`` di atas ``dasar``.
+Nilai ``partai`` ``"*"`` berarti seluruh partai di data.
+
+Kolom skenario (semua kecuali ``partai`` opsional): ``id``, ``tingkat``
+(bawaan: tingkat pertama di workbook), ``partai``, ``ambang_parlemen``
+(persen suara nasional; kosong = partai peserta pembagian kursi di data),
+``target_kursi``, ``kehilangan_2024``, ``kehilangan_sp``, ``angka_psikologis``,
+``biaya_manajemen``, ``biaya_pendampingan``, ``metode_target``,
+``metode_seleksi``, dan proporsi ``proporsi_{target}_{kursi}`` (persen, sama
+dengan input Bagian 3; di JSON boleh juga ``"proporsi": [[...], ...]`` 4 × 4).
+
+Keluaran di folder ``--output``: ``ringkasan.{csv,parquet}`` (satu baris per
+skenario), ``detail.{csv,parquet}`` (skenario × dapil terpilih), dan
+``html/<id>.html`` per skenario (kecuali ``--tanpa-html``), serta
+``pdf/<id>.pdf`` dengan ``--pdf`` (perlu WeasyPrint).
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from kalkulator.data import muat_data, muat_semua_tingkat
+from kalkulator.kriteria import METODE_TARGET
+from kalkulator.laporan import backend_pdf, tulis_laporan, tulis_pdf
+from kalkulator.pipeline import buat_pipeline
+from kalkulator.rab import JUMLAH_KURSI_SP, matriks_proporsi
+from kalkulator.seleksi import METODE_SELEKSI
+
+NILAI_BAWAAN = {
+    "tingkat": None,
+    "ambang_parlemen": None,
+    "target_kursi": 0,
+    "kehilangan_2024": 0.0,
+    "kehilangan_sp": 0.0,
+    "angka_psikologis": 0,
+    "biaya_manajemen": 0,
+    "biaya_pendampingan": 0,
+    "metode_target": "heuristik",
+    "metode_seleksi": "urutan",
+}
+KOLOM_PROPORSI = [f"proporsi_{j}_{i}" for j in range(1, JUMLAH_KURSI_SP + 1) for i in range(1, JUMLAH_KURSI_SP + 1)]
+
+
+def _kembangkan_grid(isi):
+    dasar = isi.get("dasar", {})
+    grid = isi.get("grid", {})
+    kunci = list(grid)
+    for nilai in itertools.product(*(grid[k] if isinstance(grid[k], list) else [grid[k]] for k in kunci)):
+        yield dict(dasar, **dict(zip(kunci, nilai)))
+
+
+def baca_skenario(path):
+    """Daftar skenario (dict) dari file CSV atau JSON."""
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            isi = json.load(f)
+        return list(_kembangkan_grid(isi)) if isinstance(isi, dict) else list(isi)
+    df = pd.read_csv(path)
+    return [{k: v for k, v in baris.items() if not pd.isna(v)} for baris in df.to_dict("records")]
+
+
+def normalisasi_skenario(daftar, semua_tingkat):
+    """Lengkapi nilai bawaan, beri ``id``, kembangkan ``partai="*"``, dan validasi.
+
+    ``semua_tingkat`` adalah dict tingkat → ``DataPemilu`` (``muat_semua_tingkat``).
+    """
+    hasil = []
+    for skenario in daftar:
+        partai = skenario.get("partai")
+        if partai is None:
+            raise ValueError(f"Skenario tanpa kolom 'partai': {skenario}")
+        tingkat = skenario.get("tingkat") or next(iter(semua_tingkat))
+        if tingkat not in semua_tingkat:
+            raise ValueError(f"Tingkat '{tingkat}' tidak ada di data")
+        partai_data = semua_tingkat[tingkat].partai
+        for p in (partai_data if partai == "*" else [partai]):
+            s = {**NILAI_BAWAAN, **skenario, "tingkat": tingkat, "partai": p}
+            if partai == "*" and skenario.get("id"):
+                s["id"] = f"{skenario['id']}_{p}"
+            if p not in partai_data:
+                raise ValueError(f"Partai '{p}' tidak ada di data")
+            if s["metode_target"] not in METODE_TARGET:
+                raise ValueError(f"metode_target tidak dikenal: {s['metode_target']}")
+            if s["metode_seleksi"] not in METODE_SELEKSI:
+                raise ValueError(f"metode_seleksi tidak dikenal: {s['metode_seleksi']}")
+            if "proporsi" in s:
+                matriks = np.asarray(s.pop("proporsi"), dtype=float)
+                for j in range(JUMLAH_KURSI_SP):
+                    for i in range(JUMLAH_KURSI_SP):
+                        s.setdefault(f"proporsi_{j + 1}_{i + 1}", float(matriks[j, i]))
+            hasil.append(s)
+    for nomor, s in enumerate(hasil, start=1):
+        s["id"] = str(s.get("id") or f"S{nomor:05d}")
+    ids = [s["id"] for s in hasil]
+    if len(set(ids)) != len(ids):
+        raise ValueError("Kolom 'id' skenario harus unik")
+    return hasil
+
+
+def hitung_skenario(data, skenario, pipeline=None):
+    """Jalankan seluruh tahap kalkulator untuk satu skenario.
+
+    Mengembalikan ``(ringkasan, df_terpilih)``. Memakai ulang
+    ``pipeline`` (graf tahap) antar-skenario agar tahap yang masukannya sama,
+    mis. kriteria untuk partai yang sama, tidak dihitung ulang.
+    """
+    pipeline = pipeline or buat_pipeline()
+    if skenario.get("ambang_parlemen") is None:
+        partai_terpilih = list(data.partai_lolos)
+    else:
+        partai_terpilih = data.partai_lolos_ambang(float(skenario["ambang_parlemen"]))
+    proporsi = matriks_proporsi({k: float(skenario.get(k, 0)) for k in KOLOM_PROPORSI})
+    parameter_biaya = dict(
+        kehilangan_2024=float(skenario["kehilangan_2024"]), kehilangan_sp=float(skenario["kehilangan_sp"]),
+        proporsi=proporsi, angka_psikologis=float(skenario["angka_psikologis"]),
+        biaya_manajemen=float(skenario["biaya_manajemen"]), biaya_pendampingan=float(skenario["biaya_pendampingan"]),
+    )
+    pipeline.atur(
+        data=data,
+        partai_terpilih=partai_terpilih,
+        partai_list=data.partai,
+        selected_party=skenario["partai"],
+        metode_target=skenario["metode_target"],
+        target_kursi_2029=int(skenario["target_kursi"]),
+        metode_seleksi=skenario["metode_seleksi"],
+        parameter_seleksi={} if skenario["metode_seleksi"] == "urutan" else parameter_biaya,
+        **parameter_biaya,
+    )
+    df_terpilih = pipeline.hasil("rab")
+    ringkasan = {
+        "jumlah_dapil": len(df_terpilih),
+        "total_kursi": int(df_terpilih["TARGET_TAMBAHAN_KURSI"].sum()),
+        "total_target_suara": int(df_terpilih["TOTAL_TARGET_SUARA_2029"].sum()),
+        "total_sp": float(df_terpilih["SP"].sum()),
+        # Sama dengan Rangkuman di app: TOTAL_RAB tiap dapil dibulatkan ke bawah dulu
+        "total_rab": int(df_terpilih["TOTAL_RAB"].astype(np.int64).sum()),
+    }
+    return ringkasan, df_terpilih
+
+
+def nama_file_aman(teks):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(teks)) or "skenario"
+
+
+def jalankan_blok(path_data, daftar, folder_html=None, folder_pdf=None):
+    """Hitung sekumpulan skenario; laporan dialirkan langsung ke ``folder_html``/``folder_pdf``."""
+    pipeline = buat_pipeline()
+    ringkasan, detail = [], []
+    for skenario in daftar:
+        mulai = time.perf_counter()
+        data = muat_data(path_data, skenario["tingkat"])
+        hasil, df_terpilih = hitung_skenario(data, skenario, pipeline)
+        argumen_laporan = (df_terpilih, data.df_dapil, skenario["partai"], *data.total_partai(skenario["partai"]))
+        nama_file = nama_file_aman(skenario["id"])
+        if folder_html:
+            with open(os.path.join(folder_html, f"{nama_file}.html"), "wb") as f:
+                tulis_laporan(f, *argumen_laporan)
+        if folder_pdf:
+            tulis_pdf(os.path.join(folder_pdf, f"{nama_file}.pdf"), *argumen_laporan)
+        ringkasan.append(dict(skenario, **hasil, detik=time.perf_counter() - mulai))
+        if len(df_terpilih):
+            df = df_terpilih.copy()
+            df.insert(0, "id", skenario["id"])
+            detail.append(df)
+    return ringkasan, detail
+
+
+def _inisialisasi_worker(path_data):
+    # Data dimuat sekali per worker; jalankan_blok mengambilnya dari cache muat_data
+    muat_semua_tingkat(path_data)
+
+
+def jalankan_batch(path_data, daftar, folder_html=None, n_proses=1, ukuran_blok=50, progress=None,
+                   folder_pdf=None):
+    """Evaluasi seluruh skenario, paralel per blok bila ``n_proses`` > 1.
+
+    Skenario diurutkan per tingkat, partai & metode target sebelum dibagi ke
+    blok agar tiap worker bisa memakai ulang tabel kriteria. Mengembalikan
+    ``(df_ringkasan, df_detail)`` dengan urutan sesuai masukan.
+    """
+    urutan = sorted(
+        range(len(daftar)), key=lambda i: (daftar[i]["tingkat"], daftar[i]["partai"], daftar[i]["metode_target"])
+    )
+    blok = [[daftar[i] for i in urutan[a:a + ukuran_blok]] for a in range(0, len(urutan), ukuran_blok)]
+    ringkasan, detail = [], []
+    selesai = 0
+
+    def kumpulkan(hasil_blok):
+        nonlocal selesai
+        ringkasan.extend(hasil_blok[0])
+        detail.extend(hasil_blok[1])
+        selesai += len(hasil_blok[0])
+        if progress:
+            progress(selesai, len(daftar))
+
+    if n_proses <= 1 or len(blok) <= 1:
+        for b in blok:
+            kumpulkan(jalankan_blok(path_data, b, folder_html, folder_pdf))
+    else:
+        with ProcessPoolExecutor(max_workers=n_proses, initializer=_inisialisasi_worker, initargs=(path_data,)) as pool:
+            futures = [pool.submit(jalankan_blok, path_data, b, folder_html, folder_pdf) for b in blok]
+            for future in as_completed(futures):
+                kumpulkan(future.result())
+
+    posisi = {s["id"]: i for i, s in enumerate(daftar)}
+    df_ringkasan = pd.DataFrame(ringkasan)
+    if len(df_ringkasan):
+        df_ringkasan = df_ringkasan.sort_values("id", key=lambda k: k.map(posisi)).reset_index(drop=True)
+        kolom_depan = ["id", "tingkat", "partai", "target_kursi"]
+        df_ringkasan = df_ringkasan[kolom_depan + [k for k in df_ringkasan.columns if k not in kolom_depan]]
+    df_detail = pd.concat(detail, ignore_index=True) if detail else pd.DataFrame(columns=["id"])
+    if len(df_detail):
+        df_detail = df_detail.sort_values("id", key=lambda k: k.map(posisi), kind="stable").reset_index(drop=True)
+    return df_ringkasan, df_detail
+
+
+def parquet_tersedia():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        pass
+    try:
+        import fastparquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def tulis_tabel(df, path_tanpa_ekstensi, format_keluaran):
+    if format_keluaran == "parquet":
+        path = f"{path_tanpa_ekstensi}.parquet"
+        df.to_parquet(path, index=False)
+    else:
+        path = f"{path_tanpa_ekstensi}.csv"
+        df.to_csv(path, index=False)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluasi skenario kalkulator kebutuhan suara secara massal.")
+    parser.add_argument("skenario", help="File skenario (.csv atau .json)")
+    parser.add_argument("--data", default="data_calculated.xlsx", help="Workbook data (default: data_calculated.xlsx)")
+    parser.add_argument("--output", default="hasil_batch", help="Folder keluaran")
+    parser.add_argument("--proses", type=int, default=os.cpu_count() or 1, help="Jumlah proses worker")
+    parser.add_argument("--ukuran-blok", type=int, default=50, help="Skenario per tugas worker")
+    parser.add_argument("--format", choices=["auto", "csv", "parquet"], default="auto",
+                        help="Format tabel gabungan (auto: parquet bila pyarrow/fastparquet terpasang)")
+    parser.add_argument("--tanpa-html", action="store_true", help="Jangan tulis laporan HTML per skenario")
+    parser.add_argument("--pdf", action="store_true", help="Tulis juga laporan PDF per skenario (perlu weasyprint)")
+    args = parser.parse_args(argv)
+
+    format_keluaran = args.format
+    if format_keluaran == "auto":
+        format_keluaran = "parquet" if parquet_tersedia() else "csv"
+    elif format_keluaran == "parquet" and not parquet_tersedia():
+        parser.error("Format parquet memerlukan pyarrow atau fastparquet")
+
+    daftar = normalisasi_skenario(baca_skenario(args.skenario), muat_semua_tingkat(args.data))
+    os.makedirs(args.output, exist_ok=True)
+    if args.pdf and backend_pdf() is None:
+        parser.error("Laporan PDF memerlukan paket weasyprint")
+
+    folder_html = folder_pdf = None
+    if not args.tanpa_html:
+        folder_html = os.path.join(args.output, "html")
+        os.makedirs(folder_html, exist_ok=True)
+    if args.pdf:
+        folder_pdf = os.path.join(args.output, "pdf")
+        os.makedirs(folder_pdf, exist_ok=True)
+
+    mulai = time.perf_counter()
+
+    def progress(selesai, total):
+        print(f"\r{selesai}/{total} skenario ({time.perf_counter() - mulai:.1f} detik)", end="", file=sys.stderr)
+
+    df_ringkasan, df_detail = jalankan_batch(
+        args.data, daftar, folder_html, n_proses=args.proses, ukuran_blok=args.ukuran_blok, progress=progress,
+        folder_pdf=folder_pdf,
+    )
+    print(file=sys.stderr)
+    for nama, df in (("ringkasan", df_ringkasan), ("detail", df_detail)):
+        print(f"{nama}: {tulis_tabel(df, os.path.join(args.output, nama), format_keluaran)}")
+    for folder in (folder_html, folder_pdf):
+        if folder:
+            print(f"{os.path.basename(folder)}: {folder}/ ({len(df_ringkasan)} file)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
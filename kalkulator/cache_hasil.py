@@ -0,0 +1,220 @@
+"""Cache hasil tahap yang dipakai bersama oleh semua sesi dalam satu proses.
+
+Beberapa analis sering membuka kombinasi partai/target yang sama; tanpa
+cache ini setiap sesi Streamlit menghitung ulang semuanya sendiri. Kunci
+cache adalah isi seluruh masukan sebuah tahap (hash snapshot data, partai,
+target kursi, faktor kehilangan, grid proporsi, biaya; lihat
+``GrafTahap.kunci_isi``), jadi hasilnya sama untuk sesi mana pun.
+
+Tier memori berupa LRU dengan batas byte (``KALKULATOR_CACHE_MB``, default
+256). Hasil turunan per ``DataPemilu`` (``cache_turunan``) memakai kelas yang
+sama tanpa tier disk, dengan batas ``KALKULATOR_CACHE_TURUNAN_MB`` per data. Tier disk opsional berupa file SQLite (``KALKULATOR_CACHE_DISK``,
+kosong = nonaktif) agar hasil bertahan setelah restart; isinya di-pickle,
+jadi hanya untuk file cache milik app sendiri.
+"""
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+ENV_BATAS_MB = "KALKULATOR_CACHE_MB"
+ENV_DISK = "KALKULATOR_CACHE_DISK"
+ENV_BATAS_DISK_MB = "KALKULATOR_CACHE_DISK_MB"
+ENV_BATAS_TURUNAN_MB = "KALKULATOR_CACHE_TURUNAN_MB"
+BATAS_MB_BAWAAN = 256
+BATAS_DISK_MB_BAWAAN = 1024
+BATAS_TURUNAN_MB_BAWAAN = 128
+
+# Naikkan bila isi hasil tahap berubah untuk masukan yang sama, agar entri disk lama tidak terpakai
+VERSI_CACHE = 2
+
+
+def ukuran_byte(nilai):
+    """Perkiraan memori sebuah hasil tahap (DataFrame dihitung ``deep``)."""
+    if isinstance(nilai, pd.DataFrame):
+        return int(nilai.memory_usage(index=True, deep=True).sum())
+    if isinstance(nilai, pd.Series):
+        return int(nilai.memory_usage(index=True, deep=True))
+    if isinstance(nilai, np.ndarray):
+        return int(nilai.nbytes)
+    if isinstance(nilai, (bytes, str)):
+        return len(nilai)
+    if isinstance(nilai, dict):
+        return sum(ukuran_byte(v) for v in nilai.values()) + 64 * len(nilai)
+    if isinstance(nilai, (list, tuple)):
+        return sum(ukuran_byte(v) for v in nilai) + 8 * len(nilai)
+    if isinstance(nilai, CacheHasil):
+        # Isinya masih bisa bertambah setelah disimpan: hitung seluruh anggarannya
+        return nilai.batas_byte
+    if hasattr(nilai, "cache_turunan"):
+        # DataPemilu (mis. data skenario transfer): frame, array, dan cache turunannya
+        return ukuran_byte(vars(nilai))
+    return 32
+
+
+def hash_kunci(kunci):
+    """Nama kunci yang stabil antar-proses untuk tier disk."""
+    return hashlib.sha256(repr((VERSI_CACHE, kunci)).encode("utf-8")).hexdigest()
+
+
+class CacheHasil:
+    """LRU hasil tahap dengan batas byte, penghitung hit/miss, dan tier SQLite opsional.
+
+    Aman dipakai dari beberapa thread (satu sesi Streamlit = satu thread).
+    Nilai yang disimpan dibagi ke semua pemanggil, jadi perlakukan sebagai
+    read-only.
+    """
+
+    def __init__(self, batas_byte=BATAS_MB_BAWAAN << 20, path_disk=None, batas_disk_byte=BATAS_DISK_MB_BAWAAN << 20):
+        self.batas_byte = batas_byte
+        self.path_disk = path_disk
+        self.batas_disk_byte = batas_disk_byte
+        self._entri = OrderedDict()  # kunci -> (nilai, ukuran)
+        self._lock = threading.Lock()
+        self.byte = 0
+        self.hit = 0
+        self.hit_disk = 0
+        self.miss = 0
+        self.dibuang = 0
+        if path_disk:
+            folder = os.path.dirname(path_disk)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            with self._koneksi() as kon:
+                kon.execute(
+                    "CREATE TABLE IF NOT EXISTS hasil ("
+                    "kunci TEXT PRIMARY KEY, nilai BLOB NOT NULL, ukuran INTEGER NOT NULL, dipakai REAL NOT NULL)"
+                )
+
+    @contextmanager
+    def _koneksi(self):
+        # Satu koneksi per operasi: sqlite3 tidak boleh dibagi antar-thread secara bawaan
+        kon = sqlite3.connect(self.path_disk, timeout=30)
+        try:
+            with kon:
+                yield kon
+        finally:
+            kon.close()
+
+    def ambil(self, kunci):
+        """Nilai untuk ``kunci``, atau None (miss). Hit disk dipromosikan ke memori."""
+        with self._lock:
+            entri = self._entri.get(kunci)
+            if entri is not None:
+                self._entri.move_to_end(kunci)
+                self.hit += 1
+                return entri[0]
+
+        nilai = self._ambil_disk(kunci) if self.path_disk else None
+        with self._lock:
+            if nilai is None:
+                self.miss += 1
+                return None
+            self.hit_disk += 1
+            self._simpan_memori(kunci, nilai)
+            return nilai
+
+    def simpan(self, kunci, nilai):
+        """Simpan ``nilai`` di memori (dan di disk bila tier disk aktif)."""
+        with self._lock:
+            self._simpan_memori(kunci, nilai)
+        if self.path_disk:
+            self._simpan_disk(kunci, nilai)
+
+    def _simpan_memori(self, kunci, nilai):
+        ukuran = ukuran_byte(nilai)
+        lama = self._entri.pop(kunci, None)
+        if lama is not None:
+            self.byte -= lama[1]
+        if ukuran > self.batas_byte:
+            # Lebih besar dari seluruh anggaran: tidak disimpan di memori
+            return
+        self._entri[kunci] = (nilai, ukuran)
+        self.byte += ukuran
+        while self.byte > self.batas_byte:
+            _, (_, ukuran_lama) = self._entri.popitem(last=False)
+            self.byte -= ukuran_lama
+            self.dibuang += 1
+
+    def _ambil_disk(self, kunci):
+        nama = hash_kunci(kunci)
+        with self._koneksi() as kon:
+            baris = kon.execute("SELECT nilai FROM hasil WHERE kunci = ?", (nama,)).fetchone()
+            if baris is None:
+                return None
+            kon.execute("UPDATE hasil SET dipakai = ? WHERE kunci = ?", (time.time(), nama))
+        try:
+            return pickle.loads(baris[0])
+        except Exception:
+            # Entri rusak atau dari versi pandas lain: anggap miss
+            return None
+
+    def _simpan_disk(self, kunci, nilai):
+        blob = pickle.dumps(nilai, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._koneksi() as kon:
+            kon.execute(
+                "INSERT OR REPLACE INTO hasil (kunci, nilai, ukuran, dipakai) VALUES (?, ?, ?, ?)",
+                (hash_kunci(kunci), blob, len(blob), time.time()),
+            )
+            # Buang entri yang paling lama tidak dipakai sampai total di bawah anggaran disk
+            total = kon.execute("SELECT COALESCE(SUM(ukuran), 0) FROM hasil").fetchone()[0]
+            if total > self.batas_disk_byte:
+                for nama, ukuran in kon.execute("SELECT kunci, ukuran FROM hasil ORDER BY dipakai").fetchall():
+                    if total <= self.batas_disk_byte:
+                        break
+                    kon.execute("DELETE FROM hasil WHERE kunci = ?", (nama,))
+                    total -= ukuran
+
+    def kosongkan(self, disk=False):
+        """Hapus seluruh entri memori (dan disk bila ``disk``); penghitung ikut direset."""
+        with self._lock:
+            self._entri.clear()
+            self.byte = self.hit = self.hit_disk = self.miss = self.dibuang = 0
+        if disk and self.path_disk:
+            with self._koneksi() as kon:
+                kon.execute("DELETE FROM hasil")
+
+    def statistik(self):
+        """Ringkasan isi dan penghitung cache (untuk panel debug)."""
+        with self._lock:
+            permintaan = self.hit + self.hit_disk + self.miss
+            return {
+                "entri": len(self._entri),
+                "byte": self.byte,
+                "batas_byte": self.batas_byte,
+                "hit": self.hit,
+                "hit_disk": self.hit_disk,
+                "miss": self.miss,
+                "dibuang": self.dibuang,
+                "rasio_hit": (self.hit + self.hit_disk) / permintaan if permintaan else None,
+                "disk": self.path_disk,
+            }
+
+
+def batas_turunan_byte():
+    """Batas byte ``cache_turunan`` sebuah ``DataPemilu`` dari variabel lingkungan."""
+    return int(float(os.environ.get(ENV_BATAS_TURUNAN_MB, BATAS_TURUNAN_MB_BAWAAN)) * (1 << 20))
+
+
+_cache_bersama = None
+_lock_bersama = threading.Lock()
+
+
+def cache_bersama():
+    """``CacheHasil`` tunggal per proses, dikonfigurasi dari variabel lingkungan saat pertama dipakai."""
+    global _cache_bersama
+    with _lock_bersama:
+        if _cache_bersama is None:
+            _cache_bersama = CacheHasil(
+                batas_byte=int(float(os.environ.get(ENV_BATAS_MB, BATAS_MB_BAWAAN)) * (1 << 20)),
+                path_disk=os.environ.get(ENV_DISK) or None,
+                batas_disk_byte=int(float(os.environ.get(ENV_BATAS_DISK_MB, BATAS_DISK_MB_BAWAAN)) * (1 << 20)),
+            )
+        return _cache_bersama
@@ -0,0 +1,284 @@
+import hashlib
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from kalkulator import snapshot
+from kalkulator.cache_hasil import CacheHasil, batas_turunan_byte
+from kalkulator.instrumen import terukur
+
+# Nama sheet pada data_calculated.xlsx (jangan diubah)
+SHEET_SUARA = "perolehan_suara"
+SHEET_KURSI = "hasil_sl"
+SHEET_DAPIL = "dapil"
+# Sheet opsional: daftar partai peserta pembagian kursi per tingkat (kolom TINGKAT, PARTAI)
+SHEET_PARTAI_LOLOS = "partai_lolos"
+
+# Tingkat pemilihan. Workbook multi-tingkat memberi kolom TINGKAT di ketiga
+# sheet; workbook tanpa kolom itu dianggap satu tingkat (DPR RI).
+KOLOM_TINGKAT = "TINGKAT"
+TINGKAT = ["DPR RI", "DPRD I", "DPRD II"]
+TINGKAT_BAWAAN = "DPR RI"
+# Ambang batas parlemen hanya berlaku untuk DPR RI; di DPRD seluruh partai
+# peserta ikut pembagian kursi (UU 7/2017 Pasal 414)
+TINGKAT_BERAMBANG = {"DPR RI"}
+# Ambang batas parlemen bawaan (persen suara sah nasional)
+AMBANG_PARLEMEN_BAWAAN = 4.0
+# Batas atas input ambang di UI; di atas ini hampir pasti tidak ada partai yang lolos
+AMBANG_PARLEMEN_MAKS = 20.0
+
+
+class DataPemilu:
+    """Isi tiga sheet workbook beserta frame yang sudah diindeks per DAPIL.
+
+    Satu objek berisi satu tingkat pemilihan (``tingkat``). ``partai_lolos``
+    adalah partai yang ikut pembagian kursi di tingkat tersebut, berurutan
+    sesuai urutan pemecah seri Sainte-Laguë; bawaannya kolom sheet hasil_sl
+    untuk tingkat berambang (DPR RI) dan seluruh partai untuk DPRD. Skenario
+    ambang batas parlemen lain diturunkan dari ``total_suara_nasional``
+    (``partai_lolos_ambang``).
+
+    Frame di sini dibagi ke semua sesi, jadi perlakukan sebagai read-only
+    (gunakan ``.copy()`` sebelum mengubah isinya).
+    """
+
+    def __init__(self, df_suara, df_kursi, df_dapil, versi, matriks_suara=None, matriks_kursi=None,
+                 tingkat=TINGKAT_BAWAAN, partai_lolos=None, batas_cache_byte=None):
+        self.df_suara = df_suara
+        self.df_kursi = df_kursi
+        self.df_dapil = df_dapil
+        self.versi = versi
+        self.tingkat = tingkat
+
+        self.partai = df_suara.columns[1:].tolist()
+        if partai_lolos is None:
+            partai_lolos = df_kursi.columns[1:] if tingkat in TINGKAT_BERAMBANG else self.partai
+        self.partai_lolos = [p for p in partai_lolos if p in self.partai]
+
+        self.suara_per_dapil = df_suara.set_index("DAPIL")
+        self.kursi_per_dapil = df_kursi.set_index("DAPIL")
+        self.dapil_per_dapil = df_dapil.set_index("DAPIL")
+
+        # Matriks dapil × partai sesuai urutan baris/kolom sheet masing-masing
+        if matriks_suara is None:
+            matriks_suara = df_suara.iloc[:, 1:].fillna(0).to_numpy(dtype=np.int32)
+        if matriks_kursi is None:
+            matriks_kursi = df_kursi.iloc[:, 1:].fillna(0).to_numpy(dtype=np.int16)
+        self.matriks_suara = matriks_suara
+        self.matriks_kursi = matriks_kursi
+        # Total suara nasional per partai (urutan ``partai``), dasar ambang batas parlemen
+        self.total_suara_nasional = matriks_suara.sum(axis=0, dtype=np.int64)
+
+        # Kolom sheet dapil & hasil_sl yang diselaraskan dengan urutan baris perolehan_suara.
+        # Dapil yang tidak ada di salah satu sheet ditandai lewat dapil_lengkap.
+        self.nama_dapil = df_suara["DAPIL"].tolist()
+        dapil_unik = self.dapil_per_dapil[~self.dapil_per_dapil.index.duplicated()]
+        kursi_unik = self.kursi_per_dapil[~self.kursi_per_dapil.index.duplicated()]
+        self.kursi_selaras = kursi_unik.reindex(self.nama_dapil)
+        self.dapil_selaras = dapil_unik.reindex(self.nama_dapil)
+        indeks = pd.Index(self.nama_dapil)
+        self.dapil_lengkap = indeks.isin(dapil_unik.index) & indeks.isin(kursi_unik.index)
+        self.alokasi = self.dapil_selaras["ALOKASI KURSI"].fillna(0).to_numpy(dtype=np.int64)
+
+        # Kode integer dapil (urutan baris perolehan_suara; nama kembar berbagi kode)
+        # dan indeks hash nama → baris pertama, pengganti scan df[df["DAPIL"] == nama]
+        kode, kategori = pd.factorize(indeks)
+        self.kode_dapil = kode.astype(np.int32)
+        self.kategori_dapil = pd.Index(kategori)
+        self._baris_dapil = {}
+        for i, nama in enumerate(self.nama_dapil):
+            self._baris_dapil.setdefault(nama, i)
+        self._kode_partai = {p: j for j, p in enumerate(self.partai)}
+
+        # Hasil turunan (mis. tabel kriteria semua partai) yang ikut kedaluwarsa bersama data ini;
+        # LRU berbatas byte (dibagi semua sesi), jadi entri bisa dibuang kapan saja
+        self.cache_turunan = CacheHasil(batas_byte=batas_turunan_byte() if batas_cache_byte is None else batas_cache_byte)
+
+    def baris_dapil(self, nama):
+        """Posisi baris pertama dapil ``nama`` di perolehan_suara (-1 bila tidak ada)."""
+        return self._baris_dapil.get(nama, -1)
+
+    def kode_partai(self, partai):
+        """Posisi kolom partai di perolehan_suara (-1 bila tidak ada)."""
+        return self._kode_partai.get(partai, -1)
+
+    def total_partai(self, partai):
+        """``(total suara, total kursi)`` satu partai di seluruh dapil (0 bila kolom tidak ada)."""
+        suara = self.df_suara[partai].sum() if partai in self.df_suara.columns else 0
+        kursi = self.df_kursi[partai].sum() if partai in self.df_kursi.columns else 0
+        return suara, kursi
+
+    def mask_ambang(self, ambang_persen):
+        """Mask partai (urutan ``partai``) yang suara nasionalnya ≥ ``ambang_persen`` % total suara.
+
+        ``ambang_persen`` boleh berupa array; hasilnya berbentuk (ambang × partai).
+        Ambang 0 meloloskan seluruh partai.
+        """
+        ambang = np.asarray(ambang_persen, dtype=float)[..., None]
+        return self.total_suara_nasional * 100.0 >= ambang * self.total_suara_nasional.sum()
+
+    def partai_lolos_ambang(self, ambang_persen):
+        """Daftar partai yang lolos ambang batas parlemen ``ambang_persen`` (urutan ``partai``)."""
+        return [p for p, lolos in zip(self.partai, self.mask_ambang(ambang_persen)) if lolos]
+
+    def suara_partai(self, partai):
+        """Suara satu partai per dapil (int, 0 bila kolom tidak ada)."""
+        if partai not in self.df_suara.columns:
+            return np.zeros(len(self.nama_dapil), dtype=np.int64)
+        return self.df_suara[partai].fillna(0).to_numpy().astype(np.int64)
+
+    def kursi_partai(self, partai):
+        """Kursi 2024 satu partai per dapil, selaras dengan urutan ``nama_dapil``."""
+        if partai not in self.kursi_selaras.columns:
+            return np.zeros(len(self.nama_dapil), dtype=np.int64)
+        return self.kursi_selaras[partai].fillna(0).to_numpy().astype(np.int64)
+
+
+# Cache seluruh proses: path -> (kunci stat, sha256, dict tingkat -> DataPemilu)
+_cache = {}
+_lock = threading.Lock()
+
+
+def kunci_stat(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def hash_file(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _frame_tingkat(df, tingkat, buang_kosong):
+    # Baris satu tingkat tanpa kolom TINGKAT; kolom partai yang kosong seluruhnya
+    # (partai tidak ikut di tingkat ini) dibuang
+    df = df[df[KOLOM_TINGKAT] == tingkat].drop(columns=KOLOM_TINGKAT).reset_index(drop=True)
+    if buang_kosong:
+        kosong = [k for k in df.columns[1:] if df[k].isna().all()]
+        df = df.drop(columns=kosong)
+        # Kolom jadi float hanya karena sel kosong milik tingkat lain → kembalikan ke int
+        for k in df.columns[1:]:
+            seri = df[k]
+            if pd.api.types.is_float_dtype(seri) and seri.notna().all() and (seri % 1 == 0).all():
+                df[k] = seri.astype(np.int64)
+    return df
+
+
+def pisah_tingkat(df_suara, df_kursi, df_dapil, versi, df_partai_lolos=None):
+    """Pecah isi workbook menjadi dict tingkat → ``DataPemilu``.
+
+    Tanpa kolom TINGKAT di sheet dapil, seluruh isi adalah satu tingkat
+    (``TINGKAT_BAWAAN``). Urutan tingkat mengikuti kemunculan pertamanya di
+    sheet dapil. ``df_partai_lolos`` (sheet partai_lolos, opsional) mengganti
+    daftar partai peserta pembagian kursi bawaan per tingkat.
+    """
+    def _lolos(tingkat):
+        if df_partai_lolos is None:
+            return None
+        baris = df_partai_lolos[df_partai_lolos[KOLOM_TINGKAT] == tingkat]
+        return baris["PARTAI"].tolist() if len(baris) else None
+
+    if KOLOM_TINGKAT not in df_dapil.columns:
+        return {TINGKAT_BAWAAN: DataPemilu(df_suara, df_kursi, df_dapil, (versi, TINGKAT_BAWAAN),
+                                           tingkat=TINGKAT_BAWAAN, partai_lolos=_lolos(TINGKAT_BAWAAN))}
+    for nama, df in ((SHEET_SUARA, df_suara), (SHEET_KURSI, df_kursi)):
+        if KOLOM_TINGKAT not in df.columns:
+            raise ValueError(f"Sheet {nama} harus memiliki kolom {KOLOM_TINGKAT} seperti sheet {SHEET_DAPIL}")
+    # DAPIL tetap kolom pertama di perolehan_suara & hasil_sl (kolom berikutnya = partai)
+    df_suara = df_suara[["DAPIL"] + [k for k in df_suara.columns if k != "DAPIL"]]
+    df_kursi = df_kursi[["DAPIL"] + [k for k in df_kursi.columns if k != "DAPIL"]]
+
+    hasil = {}
+    for tingkat in pd.unique(df_dapil[KOLOM_TINGKAT].dropna()):
+        hasil[tingkat] = DataPemilu(
+            _frame_tingkat(df_suara, tingkat, True),
+            _frame_tingkat(df_kursi, tingkat, True),
+            _frame_tingkat(df_dapil, tingkat, False),
+            (versi, tingkat), tingkat=tingkat, partai_lolos=_lolos(tingkat),
+        )
+    return hasil
+
+
+@terukur("baca_workbook")
+def baca_semua_tingkat(path, versi=None):
+    """Baca workbook langsung dari Excel (lambat, lewat openpyxl): dict tingkat → ``DataPemilu``."""
+    sheets = pd.read_excel(path, sheet_name=None)
+    return pisah_tingkat(sheets[SHEET_SUARA], sheets[SHEET_KURSI], sheets[SHEET_DAPIL], versi,
+                         sheets.get(SHEET_PARTAI_LOLOS))
+
+
+def baca_workbook(path, versi=None, tingkat=None):
+    """Baca satu tingkat (bawaan: tingkat pertama) langsung dari Excel."""
+    return _pilih_tingkat(baca_semua_tingkat(path, versi), tingkat)
+
+
+def _pilih_tingkat(semua, tingkat):
+    if tingkat is None:
+        return next(iter(semua.values()))
+    if tingkat not in semua:
+        raise KeyError(f"Tingkat '{tingkat}' tidak ada di data (tersedia: {', '.join(semua)})")
+    return semua[tingkat]
+
+
+def muat_data(path, tingkat=None):
+    """``DataPemilu`` satu tingkat (bawaan: tingkat pertama di workbook); lihat ``muat_semua_tingkat``."""
+    return _pilih_tingkat(muat_semua_tingkat(path), tingkat)
+
+
+def daftar_tingkat(path):
+    """Nama tingkat yang tersedia di workbook, sesuai urutannya."""
+    return list(muat_semua_tingkat(path))
+
+
+@terukur("muat_data")
+def muat_semua_tingkat(path):
+    """Muat data pemilu (dict tingkat → ``DataPemilu``), sekali per versi file untuk seluruh proses.
+
+    Versi file ditentukan oleh mtime + ukuran; bila keduanya berubah, isi
+    file di-hash ulang dan data hanya dibaca ulang jika hash-nya berbeda.
+    Data diambil dari snapshot kolumnar (lihat ``kalkulator.snapshot``) bila
+    snapshot tersebut dibangun dari versi workbook yang sama, selain itu
+    workbook dibaca langsung.
+    """
+    path = os.path.abspath(path)
+    kunci = kunci_stat(path)
+
+    with _lock:
+        entri = _cache.get(path)
+        if entri is not None and entri[0] == kunci:
+            return entri[2]
+
+        meta = snapshot.baca_meta(path)
+        if meta is not None and (meta["sumber_mtime_ns"], meta["sumber_size"]) == kunci:
+            sha = meta["sumber_sha256"]
+        else:
+            sha = hash_file(path)
+
+        if entri is not None and entri[1] == sha:
+            # File hanya di-touch, isinya sama
+            _cache[path] = (kunci, sha, entri[2])
+            return entri[2]
+
+        if meta is not None and meta["sumber_sha256"] == sha:
+            semua = {
+                tingkat: DataPemilu(versi=(sha, tingkat), tingkat=tingkat, **bagian)
+                for tingkat, bagian in snapshot.muat_snapshot(path, meta).items()
+            }
+        else:
+            semua = baca_semua_tingkat(path, versi=sha)
+        _cache[path] = (kunci, sha, semua)
+        return semua
+
+
+def hapus_cache(path=None):
+    """Kosongkan cache (seluruhnya atau untuk satu file)."""
+    with _lock:
+        if path is None:
+            _cache.clear()
+        else:
+            _cache.pop(os.path.abspath(path), None)
@@ -0,0 +1,199 @@
+"""Instrumentasi jalur panas: waktu, jumlah baris, dan alokasi memori per tahap.
+
+Fungsi inti diberi dekorator ``terukur``. Selama tidak ada ``Perekam`` yang
+aktif (mis. dipanggil dari CLI atau benchmark), dekorator hanya menambah
+satu pembacaan ``ContextVar``. Di app, satu ``Perekam`` dibuat per rerun,
+lalu hasilnya ditampilkan di panel debug. Penulisan JSON lines ke file log
+hanya aktif bila ``KALKULATOR_LOG_INSTRUMEN`` berisi path file log.
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+ENV_LOG = "KALKULATOR_LOG_INSTRUMEN"
+
+_aktif = contextvars.ContextVar("perekam_instrumen", default=None)
+_kunci_log = threading.Lock()
+
+
+def ukuran_hasil(hasil):
+    """``(baris, byte)`` dari hasil sebuah tahap, bila bentuknya dikenali."""
+    if isinstance(hasil, tuple) and hasil:
+        hasil = hasil[0]
+    if isinstance(hasil, pd.DataFrame):
+        return len(hasil), int(hasil.memory_usage(index=True).sum())
+    if isinstance(hasil, np.ndarray):
+        return (hasil.shape[0] if hasil.ndim else 1), int(hasil.nbytes)
+    if isinstance(hasil, (bytes, str)):
+        return None, len(hasil)
+    if isinstance(hasil, dict):
+        # dict kolom → array (mis. hasil hitung_sp)
+        kolom = [v for v in hasil.values() if isinstance(v, np.ndarray)]
+        if kolom:
+            return len(kolom[0]), int(sum(v.nbytes for v in kolom))
+        return len(hasil), None
+    if isinstance(hasil, list):
+        return len(hasil), None
+    if hasattr(hasil, "matriks_suara"):
+        # DataPemilu
+        return len(hasil.nama_dapil), int(hasil.matriks_suara.nbytes + hasil.matriks_kursi.nbytes)
+    return None, None
+
+
+class Perekam:
+    """Kumpulan pengukuran untuk satu rerun (atau satu proses batch)."""
+
+    def __init__(self, sesi=None, rerun=None, lacak_alokasi=False):
+        self.sesi = sesi
+        self.rerun = rerun
+        self.lacak_alokasi = lacak_alokasi
+        self.kejadian = []
+        self.panggilan = {}
+        self._tumpukan = []
+        self._mulai = time.perf_counter()
+        self._mulai_tracemalloc = False
+        if lacak_alokasi and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._mulai_tracemalloc = True
+
+    @contextmanager
+    def ukur(self, nama, **info):
+        """Catat durasi blok ``with``; ``info`` ikut ditulis ke kejadian."""
+        kejadian = {"nama": nama, **info}
+        bingkai = {"awal": None, "puncak_anak": 0}
+        if self.lacak_alokasi and tracemalloc.is_tracing():
+            bingkai["awal"] = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._tumpukan.append(bingkai)
+        mulai = time.perf_counter()
+        try:
+            yield kejadian
+        finally:
+            kejadian["detik"] = time.perf_counter() - mulai
+            self._tumpukan.pop()
+            if bingkai["awal"] is not None:
+                # reset_peak() di tahap anak menghapus puncak tahap ini, jadi
+                # puncak anak dibawa naik secara manual
+                puncak = max(tracemalloc.get_traced_memory()[1], bingkai["puncak_anak"])
+                kejadian["alokasi_puncak"] = puncak - bingkai["awal"]
+                if self._tumpukan:
+                    induk = self._tumpukan[-1]
+                    induk["puncak_anak"] = max(induk["puncak_anak"], puncak)
+            self.kejadian.append(kejadian)
+
+    def hitung(self, nama, detik):
+        """Akumulasi panggilan berulang (jumlah & total waktu) tanpa satu kejadian per panggilan."""
+        jumlah, total = self.panggilan.get(nama, (0, 0.0))
+        self.panggilan[nama] = (jumlah + 1, total + detik)
+
+    def tabel_kejadian(self):
+        kolom = ["nama", "detik", "baris", "byte", "alokasi_puncak"]
+        df = pd.DataFrame(self.kejadian)
+        return df.reindex(columns=kolom + [k for k in df.columns if k not in kolom])
+
+    def tabel_panggilan(self):
+        return pd.DataFrame(
+            [{"nama": nama, "jumlah": jumlah, "total_detik": total} for nama, (jumlah, total) in self.panggilan.items()],
+            columns=["nama", "jumlah", "total_detik"],
+        )
+
+    def total_detik(self):
+        return time.perf_counter() - self._mulai
+
+    def baris_log(self):
+        """Kejadian, panggilan agregat, dan ringkasan rerun sebagai dict siap JSON."""
+        dasar = {"waktu": time.time(), "sesi": self.sesi, "rerun": self.rerun}
+        baris = [dict(dasar, jenis="tahap", **k) for k in self.kejadian]
+        for nama, (jumlah, total) in self.panggilan.items():
+            baris.append(dict(dasar, jenis="panggilan", nama=nama, jumlah=jumlah, detik=total))
+        baris.append(dict(dasar, jenis="rerun", detik=self.total_detik()))
+        return baris
+
+    def tulis_log(self, path=None):
+        path = os.environ.get(ENV_LOG, "") if path is None else path
+        if not path:
+            return
+        teks = "".join(json.dumps(b, default=str) + "\n" for b in self.baris_log())
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # Beberapa sesi Streamlit berjalan di thread berbeda dalam satu proses
+        with _kunci_log:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(teks)
+
+    def tutup(self, path=None):
+        """Tulis log sekali dan hentikan tracemalloc bila dimulai oleh perekam ini."""
+        if self._mulai_tracemalloc:
+            tracemalloc.stop()
+            self._mulai_tracemalloc = False
+        if path is not False:
+            self.tulis_log(path)
+
+
+def perekam_aktif():
+    return _aktif.get()
+
+
+@contextmanager
+def rekam(perekam):
+    """Jadikan ``perekam`` aktif untuk thread/konteks ini selama blok ``with``."""
+    token = _aktif.set(perekam)
+    try:
+        yield perekam
+    finally:
+        _aktif.reset(token)
+
+
+def aktifkan(perekam):
+    # Untuk script Streamlit yang tidak bisa membungkus seluruh isinya dalam with
+    _aktif.set(perekam)
+
+
+def ukur(nama, **info):
+    """Context manager ``Perekam.ukur`` pada perekam aktif (no-op bila tidak ada)."""
+    perekam = _aktif.get()
+    if perekam is None:
+        return _tanpa_perekam(info)
+    return perekam.ukur(nama, **info)
+
+
+@contextmanager
+def _tanpa_perekam(info):
+    yield dict(info)
+
+
+def terukur(nama=None, agregat=False):
+    """Dekorator pengukuran fungsi.
+
+    ``agregat=True`` untuk fungsi yang dipanggil berulang kali per rerun
+    (hanya jumlah panggilan & total waktu yang dicatat).
+    """
+    def dekorator(fungsi):
+        label = nama or fungsi.__name__
+
+        @functools.wraps(fungsi)
+        def pembungkus(*args, **kwargs):
+            perekam = _aktif.get()
+            if perekam is None:
+                return fungsi(*args, **kwargs)
+            if agregat:
+                mulai = time.perf_counter()
+                try:
+                    return fungsi(*args, **kwargs)
+                finally:
+                    perekam.hitung(label, time.perf_counter() - mulai)
+            with perekam.ukur(label) as kejadian:
+                hasil = fungsi(*args, **kwargs)
+                kejadian["baris"], kejadian["byte"] = ukuran_hasil(hasil)
+            return hasil
+        return pembungkus
+    return dekorator
@@ -0,0 +1,226 @@
+"""Klasifikasi dapil potensial ke dalam Kriteria 1–4 dalam satu lintasan."""
+import numpy as np
+import pandas as pd
+
+from kalkulator.ambang import suara_minimum_kursi
+from kalkulator.instrumen import terukur
+from kalkulator.sainte_lague import alokasi_batch
+
+KOLOM_KRITERIA = [
+    "DAPIL", "PARTAI", "ALOKASI_KURSI", "SUARA_2024", "KURSI_2024", "TARGET_TAMBAHAN_KURSI",
+    "PARTAI_K2_TERENDAH", "SUARA_K2", "TOTAL_TARGET_SUARA_2029", "KRITERIA",
+]
+
+# Kriteria 2: partai kursi ke-2 terbawah yang dianggap paling mudah disalip
+PARTAI_K2_LEMAH = ["PAN", "DEMOKRAT"]
+
+# Cara menghitung TOTAL_TARGET_SUARA_2029
+METODE_TARGET = {
+    "heuristik": "Heuristik (suara K2 × 1,1 / × 3,3)",
+    "eksak": "Ambang eksak Sainte-Laguë",
+}
+
+
+def _suara_sl(df_suara, partai_lolos):
+    # Matriks suara untuk simulasi: kolom tidak ada / NaN tidak ikut dibagi (sama seperti simulasi lama)
+    n = len(df_suara)
+    suara = np.zeros((n, len(partai_lolos)), dtype=np.int64)
+    aktif = np.zeros((n, len(partai_lolos)), dtype=bool)
+    for j, partai in enumerate(partai_lolos):
+        if partai not in df_suara.columns:
+            continue
+        kolom = pd.to_numeric(df_suara[partai], errors="coerce")
+        aktif[:, j] = kolom.notna().to_numpy()
+        suara[:, j] = kolom.fillna(0).to_numpy().astype(np.int64)
+    return suara, aktif
+
+
+def _partai_k2(suara, aktif, alokasi, baris):
+    """Indeks partai peraih kursi ke-2 terakhir untuk ``baris`` terpilih (-1 bila kursi < 2)."""
+    hasil = np.full(len(alokasi), -1, dtype=np.int64)
+    if not baris.any():
+        return hasil
+    _, urutan = alokasi_batch(suara[baris], alokasi[baris], aktif[baris])
+    jumlah = (urutan >= 0).sum(axis=1)
+    k2 = np.full(len(jumlah), -1, dtype=np.int64)
+    cukup = jumlah >= 2
+    k2[cukup] = urutan[np.flatnonzero(cukup), jumlah[cukup] - 2]
+    hasil[baris] = k2
+    return hasil
+
+
+def _target_eksak(minimum, suara, tambahan, cadangan):
+    """Target suara = suara 2024 + tambahan minimum untuk ``tambahan`` kursi lebih.
+
+    ``minimum`` adalah ambang (dapil × j) dari ``suara_minimum_kursi``. Dapil
+    yang ambangnya tidak terdefinisi (mis. target melebihi alokasi) memakai
+    nilai ``cadangan`` (heuristik).
+    """
+    maks = minimum.shape[1]
+    indeks = np.clip(tambahan - 1, 0, maks - 1)
+    x = minimum[np.arange(len(tambahan)), indeks]
+    return np.where((tambahan >= 1) & (tambahan <= maks) & (x >= 0), suara + x, cadangan)
+
+
+def _bingkai_kriteria(data, partai, kursi, suara, ada_k2, nama_k2, suara_k2, minimum, kategori_partai):
+    alokasi = data.alokasi
+
+    target_k1 = (suara_k2 * 1.1).astype(np.int64)
+    target_lain = (suara_k2 * 3 * 1.1).astype(np.int64)
+    tambahan_k23 = np.where(alokasi <= 4, 1, 1 + kursi)
+
+    if minimum is not None:
+        target_k1 = _target_eksak(minimum, suara, np.ones_like(kursi), target_k1)
+        target_k23 = _target_eksak(minimum, suara, tambahan_k23, target_lain)
+        target_k4 = _target_eksak(minimum, suara, kursi, target_lain)
+    else:
+        target_k23 = target_k4 = target_lain
+
+    kriteria = [
+        (1, ada_k2 & (kursi == 0), np.ones_like(kursi), target_k1),
+        (2, ada_k2 & (kursi == 1) & np.isin(nama_k2, PARTAI_K2_LEMAH), tambahan_k23, target_k23),
+        (3, ada_k2 & (kursi == 1), tambahan_k23, target_k23),
+        (4, ada_k2 & (kursi > 1), kursi, target_k4),
+    ]
+
+    baris = np.concatenate([np.flatnonzero(mask) for _, mask, _, _ in kriteria])
+    # Nama dapil & partai sebagai kategori berkode integer: tabel semua partai
+    # pada ribuan dapil tidak menyimpan jutaan string
+    df_all_kriteria = pd.DataFrame({
+        "DAPIL": pd.Categorical.from_codes(data.kode_dapil[baris], data.kategori_dapil),
+        "PARTAI": pd.Categorical.from_codes(
+            np.full(len(baris), kategori_partai.get_loc(partai), dtype=np.int16), kategori_partai
+        ),
+        "ALOKASI_KURSI": alokasi[baris],
+        "SUARA_2024": suara[baris],
+        "KURSI_2024": kursi[baris],
+        "TARGET_TAMBAHAN_KURSI": np.concatenate([tambah[mask] for _, mask, tambah, _ in kriteria]),
+        "PARTAI_K2_TERENDAH": pd.Categorical(nama_k2[baris], categories=kategori_partai),
+        "SUARA_K2": suara_k2[baris],
+        "TOTAL_TARGET_SUARA_2029": np.concatenate([target[mask] for _, mask, _, target in kriteria]),
+        "KRITERIA": np.concatenate([np.full(mask.sum(), k, dtype=np.int64) for k, mask, _, _ in kriteria]),
+    }, columns=KOLOM_KRITERIA)
+
+    df_all_kriteria = df_all_kriteria.sort_values(by="TOTAL_TARGET_SUARA_2029", ascending=True)
+    # Hapus duplikat berdasarkan DAPIL → prioritas kriteria terendah
+    return df_all_kriteria.drop_duplicates(subset=["DAPIL"], keep="first")
+
+
+@terukur()
+def klasifikasi_semua_partai(data, daftar_partai, partai_terpilih, metode_target="heuristik"):
+    """``df_all_kriteria`` untuk banyak partai sekaligus (dict partai → DataFrame).
+
+    Simulasi Sainte-Laguë dengan ``partai_terpilih`` tidak bergantung pada
+    partai yang dipilih, jadi dijalankan sekali untuk seluruh dapil. Partai di
+    luar ``partai_terpilih`` (yang ikut disimulasikan pada Kriteria 1)
+    ditumpuk menjadi satu batch tambahan: satu blok baris dapil per partai
+    dengan partai tersebut sebagai kolom terakhir.
+    """
+    df_suara = data.df_suara
+    alokasi = data.alokasi
+    lengkap = data.dapil_lengkap
+    n_dapil = len(alokasi)
+    terpilih = list(partai_terpilih)
+    lain = [p for p in dict.fromkeys(daftar_partai) if p not in terpilih]
+    kursi = {p: data.kursi_partai(p) for p in daftar_partai}
+    kategori_partai = pd.Index(terpilih + lain)
+
+    suara_t, aktif_t = _suara_sl(df_suara, terpilih)
+    k2_t = _partai_k2(suara_t, aktif_t, alokasi, lengkap)
+
+    if lain:
+        suara_l, aktif_l = _suara_sl(df_suara, lain)
+        suara_e = np.concatenate([np.tile(suara_t, (len(lain), 1)), suara_l.T.reshape(-1, 1)], axis=1)
+        aktif_e = np.concatenate([np.tile(aktif_t, (len(lain), 1)), aktif_l.T.reshape(-1, 1)], axis=1)
+        alokasi_e = np.tile(alokasi, len(lain))
+        kursi_nol = np.concatenate([kursi[p] == 0 for p in lain])
+        k2_e = _partai_k2(suara_e, aktif_e, alokasi_e, np.tile(lengkap, len(lain)) & kursi_nol)
+        k2_e = k2_e.reshape(len(lain), n_dapil)
+
+    minimum_t = minimum_e = None
+    if metode_target == "eksak":
+        maks = max([2] + [int(k[lengkap].max()) for k in kursi.values() if lengkap.any()])
+        _, minimum_t = suara_minimum_kursi(suara_t, alokasi, aktif_t, maks_tambahan=maks)
+        if lain:
+            _, minimum_e = suara_minimum_kursi(suara_e, alokasi_e, aktif_e, maks_tambahan=maks)
+            minimum_e = minimum_e[:, len(terpilih), :].reshape(len(lain), n_dapil, maks)
+
+    hasil = {}
+    baris = np.arange(n_dapil)
+    for partai in dict.fromkeys(daftar_partai):
+        if partai in terpilih:
+            j = terpilih.index(partai)
+            k2, suara_sl, nama_sl = k2_t, suara_t, terpilih
+            minimum = minimum_t[:, j, :] if minimum_t is not None else None
+        else:
+            e = lain.index(partai)
+            # Kriteria 1 ikut menyertakan partai yang dipilih dalam simulasi
+            k2 = np.where(lengkap & (kursi[partai] == 0), k2_e[e], k2_t)
+            suara_sl = np.concatenate([suara_t, suara_l[:, e:e + 1]], axis=1)
+            nama_sl = terpilih + [partai]
+            minimum = minimum_e[e] if minimum_e is not None else None
+
+        ada_k2 = k2 >= 0
+        nama_k2 = np.asarray(nama_sl, dtype=object)[np.where(ada_k2, k2, 0)]
+        suara_k2 = suara_sl[baris, np.where(ada_k2, k2, 0)]
+        hasil[partai] = _bingkai_kriteria(
+            data, partai, kursi[partai], data.suara_partai(partai), ada_k2, nama_k2, suara_k2, minimum,
+            kategori_partai,
+        )
+    return hasil
+
+
+def klasifikasi_kriteria(data, selected_party, partai_terpilih, metode_target="heuristik"):
+    """Bangun ``df_all_kriteria`` untuk satu partai.
+
+    Simulasi Sainte-Laguë dijalankan sekali untuk seluruh dapil (ditambah satu
+    batch untuk dapil Kriteria 1 bila partai belum termasuk ``partai_terpilih``),
+    lalu setiap dapil dimasukkan ke kriterianya:
+
+    1. Kursi 2024 = 0, target +1 kursi, target suara = suara K2 × 1,1
+    2. Kursi 2024 = 1 dan partai kursi ke-2 terbawah PAN/DEMOKRAT
+    3. Kursi 2024 = 1 (umum)
+    4. Kursi 2024 > 1, target tambahan = kursi 2024
+
+    Dengan ``metode_target="eksak"``, TOTAL_TARGET_SUARA_2029 diganti suara
+    2024 ditambah suara minimum untuk meraih TARGET_TAMBAHAN_KURSI (lihat
+    ``kalkulator.ambang``), bukan kelipatan suara partai K2.
+
+    Hasilnya diurutkan menurut TOTAL_TARGET_SUARA_2029 dan setiap dapil hanya
+    muncul sekali, sama seperti penggabungan empat tabel kriteria sebelumnya.
+    """
+    return klasifikasi_semua_partai(data, [selected_party], partai_terpilih, metode_target)[selected_party]
+
+
+@terukur()
+def kriteria_semua_partai(data, partai_list, partai_terpilih, metode_target="heuristik"):
+    """Tabel skenario panjang (satu blok baris per partai) untuk seluruh ``partai_list``.
+
+    Dihitung sekali per versi data dan disimpan di ``data.cache_turunan``,
+    sehingga berganti partai di UI cukup memotong tabel ini.
+    Mengembalikan ``(tabel, rentang)`` dengan ``rentang[partai] = (awal, akhir)``.
+    """
+    kunci = ("kriteria", tuple(partai_list), tuple(partai_terpilih), metode_target)
+    hasil = data.cache_turunan.ambil(kunci)
+    if hasil is None:
+        per_partai = klasifikasi_semua_partai(data, partai_list, partai_terpilih, metode_target)
+        rentang, awal = {}, 0
+        for partai, df in per_partai.items():
+            rentang[partai] = (awal, awal + len(df))
+            awal += len(df)
+        if per_partai:
+            tabel = pd.concat(per_partai.values(), ignore_index=True)
+        else:
+            tabel = pd.DataFrame(columns=KOLOM_KRITERIA)
+        hasil = (tabel, rentang)
+        data.cache_turunan.simpan(kunci, hasil)
+    return hasil
+
+
+def kriteria_partai(data, partai, partai_list, partai_terpilih, metode_target="heuristik"):
+    """``df_all_kriteria`` satu partai, diambil dari tabel skenario semua partai."""
+    tabel, rentang = kriteria_semua_partai(data, partai_list, partai_terpilih, metode_target)
+    if partai not in rentang:
+        return klasifikasi_kriteria(data, partai, partai_terpilih, metode_target)
+    awal, akhir = rentang[partai]
+    return tabel.iloc[awal:akhir]
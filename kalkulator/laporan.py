@@ -0,0 +1,232 @@
+"""Laporan rangkuman kalkulasi (HTML/PDF) dari dapil terpilih.
+
+Laporan dirender dari template Jinja2 di ``kalkulator/templates``:
+``rangkuman.html.j2`` untuk unduhan HTML dan ``rangkuman_cetak.html.j2``
+(tata letak cetak) untuk PDF lewat WeasyPrint bila terpasang.
+"""
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from jinja2 import Environment, FileSystemLoader
+
+from kalkulator.instrumen import terukur, ukur
+from kalkulator.sainte_lague import hasil_bagi_batch
+
+FOLDER_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+TEMPLATE_HTML = "rangkuman.html.j2"
+TEMPLATE_CETAK = "rangkuman_cetak.html.j2"
+
+
+def format_ribuan(x):
+    try:
+        return f"{int(x):,}".replace(",", ".")
+    except:
+        return x
+
+
+# Konversi angka romawi ke integer
+def roman_to_int(roman):
+    roman_dict = {
+        "I": 1, "II": 2, "III": 3, "IV": 4, "V": 5,
+        "VI": 6, "VII": 7, "VIII": 8, "IX": 9, "X": 10,
+        "XI": 11, "XII": 12, "XIII": 13, "XIV": 14, "XV": 15,
+        "XVI": 16, "XVII": 17, "XVIII": 18, "XIX": 19, "XX": 20
+    }
+    return roman_dict.get(roman.strip().upper(), 0)
+
+
+def extract_roman_order(dapil_name):
+    match = re.search(r"(I{1,3}|IV|V|VI{0,3}|IX|X|XI{0,3}|XIV|XV|XVI|XVII|XVIII|XIX|XX)$", dapil_name.strip(), re.IGNORECASE)
+    if match:
+        return roman_to_int(match.group())
+    return 0
+
+
+def format_ribuan_kolom(nilai):
+    """``format_ribuan`` untuk satu kolom sekaligus (NaN → 0)."""
+    angka = pd.Series(nilai).fillna(0).astype(np.int64).tolist()
+    return [f"{x:,}".replace(",", ".") for x in angka]
+
+
+KOLOM_DETAIL_SL = ["DAPIL", "ALOKASI KURSI", "KURSI KE-", "Partai", "Suara", "Pembagi"]
+
+
+def _bingkai_detail_sl(data, daftar_dapil, daftar_alokasi, partai):
+    # Satu frame untuk seluruh dapil (yang sudah dipastikan ada dan berkursi), urut per dapil.
+    # DAPIL (kategori urut abjad) dan Partai (kategori urutan partai) agar pencarian/pengurutan murah.
+    baris = np.array([data.baris_dapil(d) for d in daftar_dapil], dtype=np.int64)
+    kolom = np.array([data.kode_partai(p) for p in partai], dtype=np.int64)
+    alokasi = np.asarray(daftar_alokasi, dtype=np.int64)
+    suara = data.matriks_suara[np.ix_(baris, kolom)].astype(np.int64)
+    dapil, idx_partai, pembagi, _, kursi_ke = hasil_bagi_batch(suara, alokasi)
+
+    nama_dapil = pd.Categorical(np.asarray(daftar_dapil, dtype=object)[dapil], categories=sorted(set(daftar_dapil)))
+    bingkai = pd.DataFrame({
+        "DAPIL": nama_dapil,
+        "ALOKASI KURSI": alokasi[dapil],
+        "KURSI KE-": kursi_ke,
+        "Partai": pd.Categorical.from_codes(idx_partai, categories=partai),
+        "Suara": suara[dapil, idx_partai],
+        "Pembagi": pembagi,
+    })
+    return bingkai, np.searchsorted(dapil, np.arange(len(baris) + 1))
+
+
+def _dapil_sah(data, daftar_dapil, daftar_alokasi, partai):
+    return [i for i, (d, a) in enumerate(zip(daftar_dapil, daftar_alokasi))
+            if data.baris_dapil(d) >= 0 and int(a) > 0 and partai]
+
+
+@terukur()
+def tabel_detail_sl(data, daftar_dapil, daftar_alokasi, partai_lolos):
+    """Tabel pembagian kursi Sainte-Laguë untuk beberapa dapil sekaligus.
+
+    Mengembalikan list DataFrame (kolom ``KOLOM_DETAIL_SL``, angka tetap
+    bertipe; KURSI KE- bernilai 0 untuk hasil bagi tanpa kursi) sejajar dengan
+    ``daftar_dapil``; None untuk dapil yang tidak ada di perolehan_suara atau
+    tanpa kursi. Tiap tabel dimemo di ``data.cache_turunan`` per
+    (dapil, alokasi, partai_lolos); dapil yang belum ada di memo dihitung
+    bersama dalam satu ``hasil_bagi_batch``.
+    """
+    partai = [p for p in partai_lolos if data.kode_partai(p) >= 0]
+    kunci = [("detail_sl", d, int(a), tuple(partai)) for d, a in zip(daftar_dapil, daftar_alokasi)]
+    hasil = [None] * len(kunci)
+    baru = []
+    for i in _dapil_sah(data, daftar_dapil, daftar_alokasi, partai):
+        hasil[i] = data.cache_turunan.ambil(kunci[i])
+        if hasil[i] is None:
+            baru.append(i)
+
+    if baru:
+        bingkai, batas = _bingkai_detail_sl(data, [kunci[i][1] for i in baru], [kunci[i][2] for i in baru], partai)
+        for j, i in enumerate(baru):
+            hasil[i] = bingkai.iloc[batas[j]:batas[j + 1]].reset_index(drop=True)
+            data.cache_turunan.simpan(kunci[i], hasil[i])
+    return hasil
+
+
+@terukur()
+def detail_sl_gabungan(data, daftar_dapil, daftar_alokasi, partai_lolos):
+    """Tabel ``tabel_detail_sl`` seluruh dapil dalam satu frame (None bila semuanya kosong), ikut dimemo."""
+    partai = [p for p in partai_lolos if data.kode_partai(p) >= 0]
+    kunci = ("detail_sl_gabungan", tuple(daftar_dapil), tuple(int(a) for a in daftar_alokasi), tuple(partai))
+    hasil = data.cache_turunan.ambil(kunci)
+    if hasil is None:
+        sah = _dapil_sah(data, daftar_dapil, daftar_alokasi, partai)
+        if not sah:
+            return None
+        hasil = _bingkai_detail_sl(data, [daftar_dapil[i] for i in sah], [int(daftar_alokasi[i]) for i in sah], partai)[0]
+        data.cache_turunan.simpan(kunci, hasil)
+    return hasil
+
+
+# Tanpa autoescape: hanya kolom teks (partai, dapil, propinsi) yang di-escape
+# di template lewat ``|e``; sel angka sudah berupa string aman
+_env = Environment(loader=FileSystemLoader(FOLDER_TEMPLATE), auto_reload=False)
+_template_terkompilasi = {}
+
+
+def _template(nama):
+    # Dikompilasi sekali per proses, lalu dipakai ulang oleh semua sesi & skenario batch
+    template = _template_terkompilasi.get(nama)
+    if template is None:
+        template = _template_terkompilasi[nama] = _env.get_template(nama)
+    return template
+
+
+@terukur()
+def konteks_laporan(df_terpilih, df_dapil, selected_party, votes_2024, seats_2024):
+    """Variabel template laporan: ringkasan dan baris dapil per propinsi.
+
+    Baris disusun dari kolom array (bukan ``iterrows``), dikelompokkan per
+    PROPINSI (urut abjad) lalu diurutkan menurut angka romawi nama dapil.
+    Dapil tanpa PROPINSI di ``df_dapil`` tidak ditampilkan per baris, tetapi
+    tetap dihitung dalam total.
+    """
+    info_dapil = df_dapil.drop_duplicates("DAPIL").set_index("DAPIL")
+    dapil = df_terpilih["DAPIL"].astype(str).to_numpy()
+    propinsi = pd.Series(dapil).map(info_dapil["PROPINSI"])
+    gugusan = pd.Series(dapil).map(info_dapil["GUGUSAN"]) if "GUGUSAN" in info_dapil else propinsi
+    kode_dapil, nama_dapil = pd.factorize(dapil)
+    romawi = np.array([extract_roman_order(d) for d in nama_dapil], dtype=np.int64)[kode_dapil]
+
+    ada = propinsi.notna().to_numpy()
+    baris = np.flatnonzero(ada)
+    kode, nama_propinsi = pd.factorize(propinsi[ada], sort=True)
+    urutan = np.lexsort((romawi[baris], kode))
+    baris, kode = baris[urutan], kode[urutan]
+
+    kolom = list(zip(
+        dapil[baris],
+        df_terpilih["ALOKASI_KURSI"].to_numpy()[baris].tolist(),
+        df_terpilih["KURSI_2024"].to_numpy()[baris].tolist(),
+        df_terpilih["TARGET_TAMBAHAN_KURSI"].fillna(0).astype(int).to_numpy()[baris].tolist(),
+        format_ribuan_kolom(df_terpilih["SUARA_2024"].to_numpy()[baris]),
+        format_ribuan_kolom(df_terpilih["TOTAL_TARGET_SUARA_2029"].to_numpy()[baris]),
+        format_ribuan_kolom(df_terpilih["TOTAL_RAB"].to_numpy()[baris]),
+    ))
+    batas = np.flatnonzero(np.diff(kode)) + 1
+    daftar_grup = []
+    for awal, akhir in zip(np.r_[0, batas], np.r_[batas, len(baris)]):
+        if akhir > awal:
+            daftar_grup.append({
+                "propinsi": nama_propinsi[kode[awal]],
+                "gugusan": gugusan.iloc[baris[awal]],
+                "baris": kolom[awal:akhir],
+            })
+
+    return {
+        "partai": selected_party,
+        "suara_2024": format_ribuan(votes_2024),
+        "kursi_2024": format_ribuan(seats_2024),
+        "total_suara": format_ribuan(df_terpilih["TOTAL_TARGET_SUARA_2029"].sum()),
+        "total_kursi": int(df_terpilih["TARGET_TAMBAHAN_KURSI"].sum()),
+        "total_rab": format_ribuan(df_terpilih["TOTAL_RAB"].sum()),
+        "daftar_grup": daftar_grup,
+    }
+
+
+def tulis_laporan(tujuan, df_terpilih, df_dapil, selected_party, votes_2024, seats_2024,
+                  template=TEMPLATE_HTML):
+    """Render laporan HTML langsung ke file biner ``tujuan`` (file terbuka / BytesIO).
+
+    Keluaran template dialirkan per potongan, jadi laporan besar tidak pernah
+    disusun utuh sebagai satu string.
+    """
+    konteks = konteks_laporan(df_terpilih, df_dapil, selected_party, votes_2024, seats_2024)
+    with ukur("render_laporan", template=template):
+        _template(template).stream(konteks).dump(tujuan, encoding="utf-8")
+
+
+@terukur()
+def export_to_html(df_terpilih, df_dapil, selected_party, votes_2024, seats_2024):
+    """Laporan HTML sebagai string (lihat ``tulis_laporan`` untuk versi streaming)."""
+    konteks = konteks_laporan(df_terpilih, df_dapil, selected_party, votes_2024, seats_2024)
+    return _template(TEMPLATE_HTML).render(konteks)
+
+
+def backend_pdf():
+    """Nama backend PDF yang terpasang, atau None. Saat ini hanya WeasyPrint."""
+    try:
+        import weasyprint  # noqa: F401
+    except ImportError:
+        return None
+    return "weasyprint"
+
+
+@terukur()
+def tulis_pdf(tujuan, df_terpilih, df_dapil, selected_party, votes_2024, seats_2024):
+    """Laporan PDF (tata letak cetak: header tabel berulang per halaman, grup GUGUSAN — PROPINSI).
+
+    Memerlukan WeasyPrint (``pip install weasyprint``); ``tujuan`` berupa path
+    atau file biner.
+    """
+    if backend_pdf() is None:
+        raise RuntimeError("Ekspor PDF memerlukan paket weasyprint (pip install weasyprint)")
+    from weasyprint import HTML
+
+    konteks = konteks_laporan(df_terpilih, df_dapil, selected_party, votes_2024, seats_2024)
+    html = _template(TEMPLATE_CETAK).render(konteks)
+    HTML(string=html, base_url=FOLDER_TEMPLATE).write_pdf(tujuan)
@@ -0,0 +1,157 @@
+"""Metode alokasi kursi alternatif untuk membandingkan usulan perubahan UU Pemilu.
+
+Metode divisor (Sainte-Laguë murni, Sainte-Laguë modifikasi, D'Hondt) dan
+metode kuota (Hare dengan sisa terbesar) dijalankan pada seluruh matriks
+dapil × partai sekaligus, dengan perbandingan bilangan bulat eksak dan aturan
+pemecah seri yang sama dengan ``kalkulator.sainte_lague``. Metode baru cukup
+didaftarkan di ``METODE_ALOKASI`` dan ``FUNGSI_ALOKASI``.
+"""
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from kalkulator.sainte_lague import kursi_batch, kursi_pembagi, pembagi_sainte_lague, peringkat_seri
+
+METODE_ALOKASI = {
+    "sainte_lague": "Sainte-Laguë murni (1, 3, 5, ...)",
+    "sainte_lague_modifikasi": "Sainte-Laguë modifikasi (1,4; 3; 5; ...)",
+    "dhondt": "D'Hondt (1, 2, 3, ...)",
+    "hare": "Kuota Hare, sisa terbesar",
+}
+# Metode yang berlaku saat ini; selisih kursi dihitung terhadap metode ini
+METODE_ACUAN = "sainte_lague"
+
+
+def pembagi_dhondt(jumlah):
+    # Deret pembagi 1, 2, 3, ...
+    return np.arange(1, jumlah + 1)
+
+
+def pembagi_sainte_lague_modifikasi(jumlah):
+    # Deret 1,4; 3; 5; ... dikali 5 agar tetap bilangan bulat (rasio antar-pembagi tidak berubah)
+    pembagi = 5 * pembagi_sainte_lague(jumlah)
+    pembagi[:1] = 7
+    return pembagi
+
+
+def kursi_hare(suara, alokasi, partai_aktif=None, pemecah_seri="urutan", seed=0):
+    """Kuota Hare (total suara / S) dengan sisa terbesar, dapil × partai.
+
+    Kursi utuh = ⌊v·S / V⌋; kursi yang tersisa diberikan ke partai dengan sisa
+    v·S mod V terbesar (sisa sama: ``pemecah_seri``). Seluruhnya bilangan bulat.
+    V adalah total suara partai aktif; dapil dengan V = 0 tidak dibagi.
+    """
+    suara = np.asarray(suara, dtype=np.int64)
+    alokasi = np.asarray(alokasi, dtype=np.int64)
+    n_dapil, n_partai = suara.shape
+    aktif = np.ones((n_dapil, n_partai), dtype=bool) if partai_aktif is None else \
+        np.broadcast_to(np.asarray(partai_aktif, dtype=bool), (n_dapil, n_partai))
+    v = np.where(aktif, suara, 0)
+    total = v.sum(axis=1)
+    utuh, sisa = np.divmod(v * alokasi[:, None], np.maximum(total, 1)[:, None])
+    kurang = alokasi - utuh.sum(axis=1)
+
+    # Sisa menurun, lalu peringkat seri; partai tidak aktif paling belakang
+    peringkat = np.asarray(peringkat_seri(suara, pemecah_seri, seed))
+    urut = np.lexsort((peringkat, -sisa, ~aktif), axis=1)
+    tambahan = np.zeros_like(utuh)
+    np.put_along_axis(tambahan, urut, (np.arange(n_partai)[None, :] < kurang[:, None]).astype(np.int64), axis=1)
+    return np.where((total > 0)[:, None], utuh + tambahan, 0)
+
+
+FUNGSI_ALOKASI = {
+    "sainte_lague": kursi_batch,
+    "sainte_lague_modifikasi": partial(kursi_pembagi, pembagi=pembagi_sainte_lague_modifikasi),
+    "dhondt": partial(kursi_pembagi, pembagi=pembagi_dhondt),
+    "hare": kursi_hare,
+}
+
+
+def kursi_metode(suara, alokasi, metode, partai_aktif=None, pemecah_seri="urutan", seed=0):
+    """Jumlah kursi dapil × partai menurut ``metode`` (kunci ``METODE_ALOKASI``)."""
+    if metode not in FUNGSI_ALOKASI:
+        raise ValueError(f"Metode alokasi tidak dikenal: {metode}")
+    return FUNGSI_ALOKASI[metode](suara, alokasi, partai_aktif=partai_aktif, pemecah_seri=pemecah_seri, seed=seed)
+
+
+def kursi_semua_metode(data, partai_lolos, daftar_metode=None, pemecah_seri="urutan"):
+    """dict metode → kursi (dapil lengkap × partai dalam ``partai_lolos``), memo per data."""
+    partai_lolos = tuple(p for p in partai_lolos if p in data.df_suara.columns)
+    daftar_metode = tuple(METODE_ALOKASI if daftar_metode is None else daftar_metode)
+    kunci = ("kursi_metode", partai_lolos, daftar_metode, pemecah_seri)
+    hasil = data.cache_turunan.ambil(kunci)
+    if hasil is None:
+        baris = np.flatnonzero(data.dapil_lengkap)
+        suara = data.df_suara[list(partai_lolos)].fillna(0).to_numpy().astype(np.int64)[baris]
+        alokasi = data.alokasi[baris]
+        hasil = {metode: kursi_metode(suara, alokasi, metode, pemecah_seri=pemecah_seri) for metode in daftar_metode}
+        data.cache_turunan.simpan(kunci, hasil)
+    return hasil
+
+
+def tabel_selisih_metode(data, partai_lolos, daftar_metode=None, acuan=METODE_ACUAN, per_propinsi=False,
+                         pemecah_seri="urutan"):
+    """Kursi tiap metode berdampingan per partai (atau per PROPINSI × partai).
+
+    Kolom ``KURSI_<METODE>`` berisi kursi menurut metode tersebut dan
+    ``SELISIH_<METODE>`` selisihnya terhadap ``acuan``. Pada tampilan per
+    propinsi, baris tanpa kursi di semua metode tidak ditampilkan.
+    """
+    daftar_metode = list(METODE_ALOKASI if daftar_metode is None else daftar_metode)
+    if acuan not in daftar_metode:
+        daftar_metode.insert(0, acuan)
+    partai = [p for p in partai_lolos if p in data.df_suara.columns]
+    kursi = kursi_semua_metode(data, partai, daftar_metode, pemecah_seri)
+
+    if per_propinsi:
+        baris = np.flatnonzero(data.dapil_lengkap)
+        kode, propinsi = pd.factorize(data.dapil_selaras["PROPINSI"].to_numpy()[baris], sort=True)
+        jumlah = {}
+        for metode in daftar_metode:
+            per_propinsi_metode = np.zeros((len(propinsi), len(partai)), dtype=np.int64)
+            np.add.at(per_propinsi_metode, kode, kursi[metode])
+            jumlah[metode] = per_propinsi_metode.ravel()
+        df = pd.DataFrame({
+            "PROPINSI": np.repeat(np.asarray(propinsi, dtype=object), len(partai)),
+            "PARTAI": np.tile(np.asarray(partai, dtype=object), len(propinsi)),
+        })
+    else:
+        jumlah = {metode: kursi[metode].sum(axis=0) for metode in daftar_metode}
+        df = pd.DataFrame({"PARTAI": partai})
+
+    for metode in daftar_metode:
+        df[f"KURSI_{metode.upper()}"] = jumlah[metode]
+    for metode in daftar_metode:
+        if metode != acuan:
+            df[f"SELISIH_{metode.upper()}"] = jumlah[metode] - jumlah[acuan]
+    if per_propinsi:
+        ada = np.any([jumlah[metode] > 0 for metode in daftar_metode], axis=0)
+        df = df[ada].reset_index(drop=True)
+    return df
+
+
+def tabel_kursi_ambang(data, daftar_ambang, metode=METODE_ACUAN, pemecah_seri="urutan"):
+    """Kursi nasional per partai untuk setiap ambang batas parlemen di ``daftar_ambang`` (persen).
+
+    Mask partai lolos seluruh ambang dihitung sekaligus dari
+    ``data.total_suara_nasional``; ambang dengan mask yang sama dialokasikan
+    sekali, dan semua mask unik ditumpuk menjadi satu batch (baris dapil
+    diulang per mask) sehingga seluruh skenario cukup satu panggilan alokasi.
+    """
+    daftar_ambang = np.atleast_1d(np.asarray(daftar_ambang, dtype=float))
+    mask = data.mask_ambang(daftar_ambang)
+    unik, balik = np.unique(mask, axis=0, return_inverse=True)
+    baris = np.flatnonzero(data.dapil_lengkap)
+    suara = np.asarray(data.matriks_suara, dtype=np.int64)[baris]
+    n_dapil, n_partai = suara.shape
+    kursi = kursi_metode(
+        np.tile(suara, (len(unik), 1)), np.tile(data.alokasi[baris], len(unik)), metode,
+        partai_aktif=np.repeat(unik, n_dapil, axis=0), pemecah_seri=pemecah_seri,
+    )
+    nasional = kursi.reshape(len(unik), n_dapil, n_partai).sum(axis=1)[balik.ravel()]
+
+    df = pd.DataFrame({"AMBANG_PERSEN": daftar_ambang, "JUMLAH_PARTAI_LOLOS": mask.sum(axis=1)})
+    for j in np.flatnonzero(mask.any(axis=0)):
+        df[data.partai[j]] = nasional[:, j]
+    return df
@@ -0,0 +1,240 @@
+"""Simulasi Monte Carlo pergeseran suara (vote swing) dengan alokasi Sainte-Laguë.
+
+Setiap draw mengalikan matriks suara dapil × partai 2024 dengan faktor
+log-normal yang tersusun dari:
+
+- swing nasional per partai (``sigma_nasional``),
+- swing per PROPINSI × partai (``sigma_propinsi``),
+- noise lokal per dapil × partai (``sigma_dapil``),
+- pergeseran rata-rata dan pengali sigma khusus per partai
+  (``geser_partai`` / ``skala_partai``, dalam satuan log).
+
+Draw dibagi ke beberapa proses; matriks suara ditaruh di shared memory
+sehingga setiap worker hanya menerima seed dan jumlah draw.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from kalkulator.sainte_lague import kursi_batch
+
+UKURAN_BATCH = 500
+
+# Array milik worker (diisi oleh _inisialisasi_worker)
+_worker = {}
+
+
+def tabel_swing_partai(partai):
+    """Tabel bawaan (tanpa override) untuk input swing per partai di app."""
+    return pd.DataFrame({"PARTAI": list(partai), "GESER_PERSEN": 0.0, "SKALA_SIGMA": 1.0})
+
+
+def parameter_swing_partai(df_swing):
+    """Ubah tabel swing per partai menjadi ``(geser_partai, skala_partai)``.
+
+    ``GESER_PERSEN`` adalah pergeseran rata-rata suara partai (mis. 10 =
+    naik 10%), diubah ke satuan log; ``SKALA_SIGMA`` mengalikan seluruh sigma
+    untuk partai tersebut. Baris tanpa perubahan dari nilai bawaan diabaikan.
+    """
+    geser_partai, skala_partai = {}, {}
+    for partai, geser, skala in df_swing[["PARTAI", "GESER_PERSEN", "SKALA_SIGMA"]].itertuples(index=False):
+        geser = 0.0 if pd.isna(geser) else float(geser)
+        skala = 1.0 if pd.isna(skala) else float(skala)
+        if geser <= -100:
+            raise ValueError(f"Geser suara {partai} harus lebih dari -100%")
+        if skala < 0:
+            raise ValueError(f"Skala sigma {partai} tidak boleh negatif")
+        if geser != 0:
+            geser_partai[partai] = float(np.log1p(geser / 100))
+        if skala != 1:
+            skala_partai[partai] = skala
+    return geser_partai, skala_partai
+
+
+def _parameter_partai(partai, nilai, bawaan):
+    nilai = nilai or {}
+    return np.array([float(nilai.get(p, bawaan)) for p in partai])
+
+
+def _simulasi_blok(masalah, jumlah_draw, seed, ukuran_batch=UKURAN_BATCH):
+    """Jalankan ``jumlah_draw`` draw dan kembalikan statistik agregatnya."""
+    suara = masalah["suara"]
+    alokasi = masalah["alokasi"]
+    propinsi = masalah["propinsi"]
+    n_dapil, n_partai = suara.shape
+    n_propinsi = int(propinsi.max()) + 1 if n_dapil else 0
+    rng = np.random.default_rng(seed)
+
+    kursi_maks = int(alokasi.sum())
+    histogram = np.zeros((n_partai, kursi_maks + 1), dtype=np.int64)
+    total_kursi = np.zeros((n_dapil, n_partai), dtype=np.int64)
+    flip = np.zeros(len(masalah["target_dapil"]), dtype=np.int64)
+
+    selesai = 0
+    while selesai < jumlah_draw:
+        b = min(ukuran_batch, jumlah_draw - selesai)
+        acak = (
+            masalah["sigma_nasional"] * rng.standard_normal((b, 1, n_partai))
+            + masalah["sigma_propinsi"] * rng.standard_normal((b, n_propinsi, n_partai))[:, propinsi, :]
+            + masalah["sigma_dapil"] * rng.standard_normal((b, n_dapil, n_partai))
+        )
+        log_faktor = masalah["geser"] + masalah["skala"] * acak
+        suara_draw = np.rint(suara[None, :, :] * np.exp(log_faktor)).astype(np.int64)
+
+        # Seed undian seri diambil dari rng blok (reproducible); aturan lain tidak menyentuh rng
+        seed_seri = int(rng.integers(1 << 62)) if masalah["pemecah_seri"] == "undian" else 0
+        kursi = kursi_batch(
+            suara_draw.reshape(b * n_dapil, n_partai), np.tile(alokasi, b),
+            pemecah_seri=masalah["pemecah_seri"], seed=seed_seri,
+        )
+        kursi = kursi.reshape(b, n_dapil, n_partai)
+
+        total_kursi += kursi.sum(axis=0)
+        nasional = kursi.sum(axis=1)
+        for j in range(n_partai):
+            histogram[j] += np.bincount(nasional[:, j], minlength=kursi_maks + 1)
+        if len(flip):
+            kursi_target = kursi[:, masalah["target_dapil"], masalah["target_partai"]]
+            flip += (kursi_target >= masalah["target_kursi"][None, :]).sum(axis=0)
+        selesai += b
+
+    return {"jumlah_draw": jumlah_draw, "histogram": histogram, "total_kursi": total_kursi, "flip": flip}
+
+
+def _inisialisasi_worker(nama_shm, bentuk, parameter):
+    shm = shared_memory.SharedMemory(name=nama_shm)
+    _worker["shm"] = shm  # simpan referensi agar buffer tidak ditutup
+    _worker["masalah"] = dict(parameter, suara=np.ndarray(bentuk, dtype=np.int64, buffer=shm.buf))
+
+
+def _tugas_worker(jumlah_draw, seed):
+    return _simulasi_blok(_worker["masalah"], jumlah_draw, seed)
+
+
+def jalankan_monte_carlo(suara, alokasi, propinsi, partai, jumlah_draw,
+                         sigma_nasional=0.05, sigma_propinsi=0.05, sigma_dapil=0.05,
+                         geser_partai=None, skala_partai=None,
+                         target_dapil=None, target_partai=None, target_kursi=None,
+                         pemecah_seri="urutan", seed=None, n_proses=None, draw_per_tugas=5000, progress=None):
+    """Jalankan simulasi dan gabungkan hasil seluruh worker.
+
+    ``suara`` (dapil × partai) dan ``alokasi`` mengikuti ``alokasi_batch``;
+    ``propinsi`` berisi kode propinsi (0..n-1) per dapil. Bila ``target_dapil``
+    diberikan (indeks baris), ``target_partai`` dan ``target_kursi`` menyatakan
+    kursi minimum yang dianggap "flip" di dapil tersebut. ``pemecah_seri``
+    menentukan pemenang hasil bagi yang sama persis (lihat ``PEMECAH_SERI``).
+
+    ``progress(draw_selesai, jumlah_draw)`` dipanggil setiap kali satu tugas
+    selesai. Hasil hanya bergantung pada ``seed``, bukan pada jumlah proses.
+    """
+    suara = np.ascontiguousarray(suara, dtype=np.int64)
+    target_dapil = np.asarray([] if target_dapil is None else target_dapil, dtype=np.int64)
+    parameter = {
+        "alokasi": np.asarray(alokasi, dtype=np.int64),
+        "propinsi": np.asarray(propinsi, dtype=np.int64),
+        "sigma_nasional": float(sigma_nasional),
+        "sigma_propinsi": float(sigma_propinsi),
+        "sigma_dapil": float(sigma_dapil),
+        "geser": _parameter_partai(partai, geser_partai, 0.0),
+        "skala": _parameter_partai(partai, skala_partai, 1.0),
+        "target_dapil": target_dapil,
+        "target_partai": np.broadcast_to(np.asarray(0 if target_partai is None else target_partai), target_dapil.shape),
+        "target_kursi": np.broadcast_to(np.asarray(0 if target_kursi is None else target_kursi), target_dapil.shape),
+        "pemecah_seri": pemecah_seri,
+    }
+
+    # Pecah draw menjadi tugas dengan seed turunan masing-masing (reproducible)
+    jumlah_tugas = max(1, -(-int(jumlah_draw) // draw_per_tugas))
+    ukuran = [len(x) for x in np.array_split(np.arange(int(jumlah_draw)), jumlah_tugas)]
+    seeds = np.random.SeedSequence(seed).spawn(jumlah_tugas)
+    n_proses = n_proses or os.cpu_count() or 1
+
+    hasil = []
+    selesai = 0
+    if n_proses <= 1 or jumlah_tugas == 1:
+        masalah = dict(parameter, suara=suara)
+        for n, s in zip(ukuran, seeds):
+            hasil.append(_simulasi_blok(masalah, n, s))
+            selesai += n
+            if progress:
+                progress(selesai, jumlah_draw)
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(suara.nbytes, 1))
+        try:
+            np.ndarray(suara.shape, dtype=np.int64, buffer=shm.buf)[:] = suara
+            with ProcessPoolExecutor(
+                max_workers=min(n_proses, jumlah_tugas),
+                initializer=_inisialisasi_worker,
+                initargs=(shm.name, suara.shape, parameter),
+            ) as pool:
+                futures = [pool.submit(_tugas_worker, n, s) for n, s in zip(ukuran, seeds)]
+                for future in as_completed(futures):
+                    hasil.append(future.result())
+                    selesai += hasil[-1]["jumlah_draw"]
+                    if progress:
+                        progress(selesai, jumlah_draw)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    return {
+        "partai": list(partai),
+        "jumlah_draw": int(jumlah_draw),
+        "histogram": sum(h["histogram"] for h in hasil),
+        "rata_kursi_dapil": sum(h["total_kursi"] for h in hasil) / max(int(jumlah_draw), 1),
+        "peluang_flip": sum(h["flip"] for h in hasil) / max(int(jumlah_draw), 1),
+    }
+
+
+def ringkasan_kursi(hasil, persentil=(5, 50, 95)):
+    """Distribusi kursi nasional per partai: rata-rata dan persentil."""
+    histogram = hasil["histogram"]
+    kursi = np.arange(histogram.shape[1])
+    baris = []
+    for partai, h in zip(hasil["partai"], histogram):
+        kumulatif = np.cumsum(h) / max(h.sum(), 1)
+        data = {"PARTAI": partai, "RATA_RATA_KURSI": float((h * kursi).sum() / max(h.sum(), 1))}
+        for p in persentil:
+            data[f"P{p}"] = int(np.searchsorted(kumulatif, p / 100))
+        baris.append(data)
+    return pd.DataFrame(baris)
+
+
+def monte_carlo_terpilih(data, df_terpilih, selected_party, partai_terpilih, jumlah_draw, **opsi):
+    """Monte Carlo untuk rencana di ``df_terpilih``.
+
+    Suara partai di dapil terpilih dinaikkan ke TOTAL_TARGET_SUARA_2029
+    (rencana tercapai), lalu seluruh suara diberi swing acak. Sebuah dapil
+    "flip" bila partai meraih minimal KURSI_2024 + TARGET_TAMBAHAN_KURSI.
+
+    Mengembalikan ``(hasil, df_peluang)``; ``df_peluang`` berisi peluang flip
+    tiap dapil terpilih.
+    """
+    partai = list(partai_terpilih)
+    if selected_party not in partai:
+        partai.append(selected_party)
+    partai = [p for p in partai if p in data.df_suara.columns]
+    baris = np.flatnonzero(data.dapil_lengkap)
+    suara = data.df_suara[partai].fillna(0).to_numpy().astype(np.int64)[baris]
+    propinsi = pd.factorize(data.dapil_selaras["PROPINSI"].to_numpy()[baris])[0]
+
+    posisi = {nama: i for i, nama in enumerate(np.asarray(data.nama_dapil)[baris])}
+    df_terpilih = df_terpilih[df_terpilih["DAPIL"].isin(posisi)]
+    target_dapil = df_terpilih["DAPIL"].map(posisi).to_numpy(dtype=np.int64)
+    kolom = partai.index(selected_party)
+    suara[target_dapil, kolom] = np.maximum(
+        suara[target_dapil, kolom], df_terpilih["TOTAL_TARGET_SUARA_2029"].to_numpy(dtype=np.int64)
+    )
+    target_kursi = (df_terpilih["KURSI_2024"] + df_terpilih["TARGET_TAMBAHAN_KURSI"]).to_numpy(dtype=np.int64)
+
+    hasil = jalankan_monte_carlo(
+        suara, data.alokasi[baris], propinsi, partai, jumlah_draw,
+        target_dapil=target_dapil, target_partai=kolom, target_kursi=target_kursi, **opsi,
+    )
+    df_peluang = df_terpilih[["DAPIL", "KURSI_2024", "TARGET_TAMBAHAN_KURSI", "TOTAL_TARGET_SUARA_2029"]].copy()
+    df_peluang["RATA_RATA_KURSI"] = hasil["rata_kursi_dapil"][target_dapil, kolom]
+    df_peluang["PELUANG_FLIP"] = hasil["peluang_flip"]
+    return hasil, df_peluang.reset_index(drop=True)
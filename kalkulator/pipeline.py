@@ -0,0 +1,274 @@
+"""Graf tahap perhitungan dengan memo per tahap.
+
+Script Streamlit dijalankan ulang dari atas setiap kali satu input berubah.
+Dengan graf ini setiap tahap (tabel dapil → kriteria → seleksi → SP → RAB →
+rangkuman/ekspor, serta analisis sweep, ambang parlemen dan transfer suara)
+mendeklarasikan dependensinya lewat nama parameter
+fungsinya: nama tahap lain atau nama masukan dari UI. Hasil tahap disimpan
+bersama kunci dependensinya, sehingga pada rerun hanya tahap yang
+masukannya berubah yang dihitung ulang.
+
+Tahap yang ditandai ``bersama`` juga dicari di cache lintas sesi
+(``kalkulator.cache_hasil``) dengan kunci isi masukannya, sebelum tahap
+hulunya ditarik. Hasil tahap dipakai bersama antar-rerun (dan antar-sesi);
+pemanggil tidak boleh mengubahnya di tempat.
+"""
+import inspect
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from kalkulator.instrumen import ukur, ukuran_hasil
+from kalkulator.kriteria import kriteria_partai
+from kalkulator.laporan import tulis_laporan, tulis_pdf
+from kalkulator.metode_alokasi import tabel_kursi_ambang
+from kalkulator.rab import KOLOM_SP_KURSI, hitung_sp, hitung_total_rab
+from kalkulator.seleksi import seleksi_dapil
+from kalkulator.sensitivitas import sweep_sensitivitas
+from kalkulator.transfer_suara import evaluasi_transfer
+
+
+def kunci_nilai(nilai):
+    """Kunci hashable untuk membandingkan masukan tahap antar-rerun."""
+    if isinstance(nilai, dict):
+        return ("dict",) + tuple(sorted((k, kunci_nilai(v)) for k, v in nilai.items()))
+    if isinstance(nilai, (list, tuple)):
+        return ("list",) + tuple(kunci_nilai(v) for v in nilai)
+    if isinstance(nilai, np.ndarray):
+        return ("array", nilai.dtype.str, nilai.shape, nilai.tobytes())
+    if hasattr(nilai, "versi"):
+        # DataPemilu: satu versi file = satu isi data
+        return ("versi", nilai.versi)
+    return nilai
+
+
+class Tahap:
+    def __init__(self, nama, fungsi, bergantung=None, bersama=False):
+        self.nama = nama
+        self.fungsi = fungsi
+        self.bergantung = list(bergantung or inspect.signature(fungsi).parameters)
+        self.bersama = bersama
+
+
+class GrafTahap:
+    """Kumpulan tahap yang dievaluasi secara malas (pull) dengan memo.
+
+    ``cache`` (opsional, ``CacheHasil``) dipakai untuk tahap ``bersama``.
+    """
+
+    def __init__(self, daftar_tahap, cache=None):
+        self.tahap = {t.nama: t for t in daftar_tahap}
+        self.masukan = {}
+        self._memo = {}
+        self.status = {}
+        self.cache = cache
+
+    def mulai_rerun(self):
+        # Status dihitung/cache hanya untuk rerun yang sedang berjalan
+        self.status = {}
+
+    def atur(self, **masukan):
+        self.masukan.update(masukan)
+
+    def kunci_isi(self, nama):
+        """Kunci dari isi seluruh masukan (transitif) sebuah tahap, tanpa menghitung tahap hulu.
+
+        Berbeda dengan kunci memo per sesi (yang memakai nomor versi tahap
+        hulu), kunci ini sama untuk semua sesi dengan masukan yang sama.
+        """
+        bagian = []
+        for dep in self.tahap[nama].bergantung:
+            if dep in self.tahap:
+                bagian.append((dep, self.kunci_isi(dep)))
+            elif dep in self.masukan:
+                bagian.append((dep, kunci_nilai(self.masukan[dep])))
+            else:
+                raise KeyError(f"Masukan '{dep}' untuk tahap '{nama}' belum diatur")
+        return (nama, tuple(bagian))
+
+    def hasil(self, nama):
+        tahap = self.tahap[nama]
+        memo = self._memo.get(nama)
+        kunci_bersama = None
+        if tahap.bersama and self.cache is not None:
+            kunci_bersama = self.kunci_isi(nama)
+            if memo is not None and memo["kunci"] == kunci_bersama:
+                self.status.setdefault(nama, "cache")
+                return memo["hasil"]
+            hasil = self.cache.ambil(kunci_bersama)
+            if hasil is not None:
+                self._catat(nama, kunci_bersama, hasil, 0.0, memo)
+                self.status[nama] = "bersama"
+                return hasil
+
+        argumen = {}
+        kunci = []
+        for dep in tahap.bergantung:
+            if dep in self.tahap:
+                argumen[dep] = self.hasil(dep)
+                kunci.append((dep, self._memo[dep]["versi"]))
+            elif dep in self.masukan:
+                argumen[dep] = self.masukan[dep]
+                kunci.append((dep, kunci_nilai(self.masukan[dep])))
+            else:
+                raise KeyError(f"Masukan '{dep}' untuk tahap '{nama}' belum diatur")
+        if kunci_bersama is not None:
+            kunci = kunci_bersama
+
+        if memo is not None and memo["kunci"] == kunci:
+            self.status.setdefault(nama, "cache")
+            return memo["hasil"]
+
+        mulai = time.perf_counter()
+        with ukur(f"tahap:{nama}") as kejadian:
+            hasil = tahap.fungsi(**argumen)
+            kejadian["baris"], kejadian["byte"] = ukuran_hasil(hasil)
+        self._catat(nama, kunci, hasil, time.perf_counter() - mulai, memo)
+        if kunci_bersama is not None:
+            self.cache.simpan(kunci_bersama, hasil)
+        self.status[nama] = "dihitung"
+        return hasil
+
+    def _catat(self, nama, kunci, hasil, detik, memo):
+        self._memo[nama] = {
+            "kunci": kunci,
+            "hasil": hasil,
+            "versi": memo["versi"] + 1 if memo else 1,
+            "detik": detik,
+        }
+
+    def tabel_waktu(self):
+        """Status rerun terakhir dan durasi perhitungan terakhir tiap tahap."""
+        baris = []
+        for nama in self.tahap:
+            memo = self._memo.get(nama)
+            baris.append({
+                "TAHAP": nama,
+                "STATUS": self.status.get(nama, "-"),
+                "DETIK_TERAKHIR": memo["detik"] if memo else None,
+                "JUMLAH_HITUNG": memo["versi"] if memo else 0,
+            })
+        return pd.DataFrame(baris)
+
+
+# === Tahap kalkulator ===
+
+def _tahap_dapil(data, selected_party):
+    # Tabel sebaran suara & kursi partai per dapil (Bagian 2); angka tetap bertipe,
+    # diformat per halaman saat ditampilkan
+    suara_dapil = data.suara_per_dapil[selected_party].to_dict() if selected_party in data.df_suara.columns else {}
+    kursi_dapil = data.kursi_per_dapil[selected_party].to_dict() if selected_party in data.df_kursi.columns else {}
+
+    tabel_dapil = data.df_dapil.copy()
+    tabel_dapil["Perolehan Suara"] = tabel_dapil["DAPIL"].map(suara_dapil).fillna(0).astype(int)
+    tabel_dapil["Perolehan Kursi"] = tabel_dapil["DAPIL"].map(kursi_dapil).fillna(0).astype(int)
+    tabel_dapil["Persentase Perolehan Suara"] = (
+        (tabel_dapil["Perolehan Suara"] / tabel_dapil["TOTAL DPT"]) * 100
+    ).round(2)
+    tabel_dapil["No"] = range(1, len(tabel_dapil) + 1)
+    return tabel_dapil[["No", "DAPIL", "ALOKASI KURSI", "TOTAL DPT", "Perolehan Suara", "Perolehan Kursi", "Persentase Perolehan Suara"]]
+
+
+def _tahap_kriteria(data, selected_party, partai_list, partai_terpilih, metode_target):
+    return kriteria_partai(data, selected_party, partai_list, partai_terpilih, metode_target)
+
+
+def _tahap_seleksi(kriteria, target_kursi_2029, metode_seleksi, parameter_seleksi):
+    return seleksi_dapil(kriteria, target_kursi_2029, metode_seleksi, **parameter_seleksi)
+
+
+def _tahap_sp(seleksi, kehilangan_2024, kehilangan_sp, proporsi):
+    df_terpilih = seleksi.copy()
+    df_terpilih["TARGET_KEBUTUHAN"] = df_terpilih["TOTAL_TARGET_SUARA_2029"]
+    kolom_sp = hitung_sp(
+        df_terpilih["TARGET_TAMBAHAN_KURSI"].to_numpy(),
+        df_terpilih["TARGET_KEBUTUHAN"].to_numpy(),
+        df_terpilih["SUARA_2024"].to_numpy(),
+        kehilangan_2024, kehilangan_sp, proporsi,
+    )
+    for kolom, nilai in kolom_sp.items():
+        df_terpilih[kolom] = nilai
+    return df_terpilih
+
+
+def _tahap_rab(sp, angka_psikologis, biaya_manajemen, biaya_pendampingan):
+    df_terpilih = sp.copy()
+    df_terpilih["TOTAL_RAB"] = hitung_total_rab(
+        [df_terpilih[kolom].to_numpy() for kolom in KOLOM_SP_KURSI],
+        angka_psikologis, biaya_manajemen, biaya_pendampingan,
+    )
+    return df_terpilih
+
+
+def _tahap_rangkuman(rab):
+    # Tabel rangkuman dapil potensial (Bagian 5) beserta total-totalnya; angka tetap bertipe
+    df_summary_display = rab[[
+        "DAPIL", "ALOKASI_KURSI", "SUARA_2024", "KURSI_2024",
+        "TARGET_TAMBAHAN_KURSI", "TOTAL_TARGET_SUARA_2029", "TOTAL_RAB"
+    ]].copy()
+    df_summary_display.columns = [
+        "DAPIL", "Alokasi Kursi", "Suara 2024", "Kursi 2024",
+        "Target Kursi 2029", "Target Suara 2029", "Total RAB"
+    ]
+    return {
+        "tabel": df_summary_display,
+        "total_suara_2029": rab["TOTAL_TARGET_SUARA_2029"].sum(),
+        "total_kursi_2029": rab["TARGET_TAMBAHAN_KURSI"].sum(),
+        # Total dari RAB per dapil yang dibulatkan ke bawah, sama dengan angka di tabel
+        "total_rab": rab["TOTAL_RAB"].astype(np.int64).sum(),
+    }
+
+
+def _tahap_ekspor(rab, data, selected_party):
+    buffer = io.BytesIO()
+    tulis_laporan(buffer, rab, data.df_dapil, selected_party, *data.total_partai(selected_party))
+    return buffer.getvalue()
+
+
+def _tahap_ekspor_pdf(rab, data, selected_party):
+    # Hanya ditarik bila backend PDF terpasang (lihat laporan.backend_pdf)
+    buffer = io.BytesIO()
+    tulis_pdf(buffer, rab, data.df_dapil, selected_party, *data.total_partai(selected_party))
+    return buffer.getvalue()
+
+
+def _tahap_sweep(kriteria, grid_sweep, proporsi, biaya_manajemen, biaya_pendampingan, metode_seleksi):
+    # Grid sensitivitas (Bagian 6) dengan metode seleksi yang sama seperti Bagian 4–5;
+    # dihitung ulang hanya bila grid atau masukannya berubah
+    return sweep_sensitivitas(
+        kriteria, grid_sweep["target_kursi_2029"], grid_sweep["kehilangan_2024"],
+        grid_sweep["kehilangan_sp"], grid_sweep["angka_psikologis"],
+        proporsi, biaya_manajemen, biaya_pendampingan, metode_seleksi,
+    )
+
+
+def _tahap_kursi_ambang(data, daftar_ambang, metode_ambang):
+    return tabel_kursi_ambang(data, daftar_ambang, metode_ambang)
+
+
+def _tahap_transfer(data, aturan_transfer, partai_terpilih, ambang_parlemen):
+    return evaluasi_transfer(data, aturan_transfer, partai_terpilih, ambang_parlemen)
+
+
+def buat_pipeline(cache=None):
+    """Graf tahap kalkulator kebutuhan suara (satu instance per sesi).
+
+    Dengan ``cache`` (mis. ``cache_hasil.cache_bersama()``), hasil seleksi,
+    SP, RAB (``df_terpilih``), rangkuman dan tahap analisis (sweep, kursi
+    per ambang, transfer suara) dipakai bersama antar-sesi.
+    """
+    return GrafTahap([
+        Tahap("dapil", _tahap_dapil),
+        Tahap("kriteria", _tahap_kriteria),
+        Tahap("seleksi", _tahap_seleksi, bersama=True),
+        Tahap("sp", _tahap_sp, bersama=True),
+        Tahap("rab", _tahap_rab, bersama=True),
+        Tahap("rangkuman", _tahap_rangkuman, bersama=True),
+        Tahap("ekspor", _tahap_ekspor),
+        Tahap("ekspor_pdf", _tahap_ekspor_pdf),
+        Tahap("sweep", _tahap_sweep, bersama=True),
+        Tahap("kursi_ambang", _tahap_kursi_ambang, bersama=True),
+        Tahap("transfer", _tahap_transfer, bersama=True),
+    ], cache=cache)
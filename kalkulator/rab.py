@@ -0,0 +1,109 @@
+"""Perhitungan SP (Suara Potensial) dan RAB sebagai operasi kolom NumPy.
+
+Semua fungsi menerima kolom dapil terpilih sebagai array dan parameter
+skalar dari UI, sehingga bisa dipakai di luar Streamlit. Parameter skalar
+boleh berupa array yang dapat di-broadcast (mis. bentuk (G, 1) untuk G
+titik sweep) untuk mengevaluasi banyak kombinasi sekaligus.
+"""
+import numpy as np
+import pandas as pd
+
+from kalkulator.instrumen import terukur
+
+JUMLAH_KURSI_SP = 4
+KOLOM_SP_KURSI = [f"SP_KURSI_{i}" for i in range(1, JUMLAH_KURSI_SP + 1)]
+
+
+def matriks_proporsi(kursi_input):
+    """Ubah input ``proporsi_{target}_{kursi}`` (persen) menjadi matriks 4 × 4.
+
+    Baris ke-(j-1) berisi proporsi tiap kursi untuk target penambahan j kursi.
+    """
+    proporsi = np.zeros((JUMLAH_KURSI_SP, JUMLAH_KURSI_SP))
+    for j in range(1, JUMLAH_KURSI_SP + 1):
+        for i in range(1, JUMLAH_KURSI_SP + 1):
+            proporsi[j - 1, i - 1] = kursi_input.get(f"proporsi_{j}_{i}", 0)
+    return proporsi
+
+
+def bobot_sp_kursi(target_tambahan_kursi, proporsi):
+    """Bagian SP untuk kursi ke-1..4 per dapil, bentuk (N, 4).
+
+    Target 1 kursi → seluruh SP ke kursi ke-1; target 2–4 kursi → SP dibagi
+    rata lalu dikali proporsi tiap kursi; target lain → 0.
+    """
+    jumlah = np.asarray(target_tambahan_kursi).astype(np.int64)
+    bobot = np.zeros((len(jumlah), JUMLAH_KURSI_SP))
+    bobot[jumlah == 1, 0] = 1.0
+    for j in range(2, JUMLAH_KURSI_SP + 1):
+        baris = jumlah == j
+        if baris.any():
+            bobot[baris, :j] = np.asarray(proporsi)[j - 1, :j] / 100
+    return jumlah, bobot
+
+
+@terukur()
+def hitung_sp(target_tambahan_kursi, target_kebutuhan, suara_2024, kehilangan_2024, kehilangan_sp, proporsi):
+    """SUARA_TAMBAHAN, TOTAL_SUARA_TAMBAHAN, SP dan SP_KURSI_1..4 (dict kolom → array)."""
+    target_tambahan_kursi = np.asarray(target_tambahan_kursi)
+    target_kebutuhan = np.asarray(target_kebutuhan)
+    suara_2024 = np.asarray(suara_2024)
+
+    suara_tambahan = np.where(
+        (target_tambahan_kursi == 0) | (target_kebutuhan < suara_2024), 0, target_kebutuhan - suara_2024
+    )
+    kehilangan_2024 = np.asarray(kehilangan_2024, dtype=float)
+    kehilangan_sp = np.asarray(kehilangan_sp, dtype=float)
+    total_suara_tambahan = np.where(suara_tambahan == 0, 0.0, suara_tambahan + suara_2024 * (kehilangan_2024 / 100))
+    sp = np.where(total_suara_tambahan == 0, 0.0, total_suara_tambahan * (1 + kehilangan_sp / 100))
+
+    # SP per kursi: (SP / jumlah kursi) × proporsi; target 1 kursi memakai SP utuh
+    jumlah, bobot = bobot_sp_kursi(target_tambahan_kursi, proporsi)
+    pembagi = np.where(jumlah > 1, jumlah, 1)
+    sp_rata = sp / pembagi
+
+    hasil = {
+        "SUARA_TAMBAHAN": suara_tambahan,
+        "TOTAL_SUARA_TAMBAHAN": total_suara_tambahan,
+        "SP": sp,
+    }
+    for i, kolom in enumerate(KOLOM_SP_KURSI):
+        hasil[kolom] = np.where(jumlah == 1, sp if i == 0 else 0.0, sp_rata * bobot[:, i])
+    return hasil
+
+
+def hitung_total_rab(sp_kursi, angka_psikologis, biaya_manajemen, biaya_pendampingan):
+    """TOTAL_RAB per dapil: Σ (SP kursi × angka psikologis + manajemen + pendampingan) untuk SP > 0."""
+    total = 0.0
+    for sp in sp_kursi:
+        sp = np.asarray(sp)
+        total = total + np.where(sp > 0, sp * angka_psikologis + biaya_manajemen + biaya_pendampingan, 0)
+    return total
+
+
+def rab_per_kursi(sp_kursi, angka_psikologis):
+    """RAB SP per kursi satu dapil (dibulatkan ke bawah) untuk tabel RAB SP per Kursi."""
+    return [int(sp * angka_psikologis) for sp in sp_kursi]
+
+
+def total_rab_per_kursi(rab_kursi, biaya_manajemen, biaya_pendampingan):
+    # Biaya manajemen & pendampingan hanya untuk kursi yang RAB SP-nya tidak nol
+    return [rab + biaya_manajemen + biaya_pendampingan if rab > 0 else 0 for rab in rab_kursi]
+
+
+def hitung_sp_rab(df_terpilih, kehilangan_2024, kehilangan_sp, proporsi,
+                  angka_psikologis=0, biaya_manajemen=0, biaya_pendampingan=0):
+    """Seluruh kolom SP & RAB untuk ``df_terpilih`` sekaligus, sebagai DataFrame baru.
+
+    Kolom TARGET_KEBUTUHAN diambil dari TOTAL_TARGET_SUARA_2029.
+    """
+    sp = hitung_sp(
+        df_terpilih["TARGET_TAMBAHAN_KURSI"].to_numpy(),
+        df_terpilih["TOTAL_TARGET_SUARA_2029"].to_numpy(),
+        df_terpilih["SUARA_2024"].to_numpy(),
+        kehilangan_2024, kehilangan_sp, proporsi,
+    )
+    sp["TOTAL_RAB"] = hitung_total_rab(
+        [sp[k] for k in KOLOM_SP_KURSI], angka_psikologis, biaya_manajemen, biaya_pendampingan
+    )
+    return pd.DataFrame(sp, index=df_terpilih.index)
@@ -0,0 +1,501 @@
+"""Mesin alokasi kursi Sainte-Laguë yang dijalankan sekaligus untuk banyak dapil.
+
+Hasil bagi v1/d1 dan v2/d2 dibandingkan secara eksak (perkalian silang
+bilangan bulat v1·d2 vs v2·d1), dan hasil bagi yang tepat sama besar
+diputuskan oleh aturan pemecah seri yang eksplisit (``PEMECAH_SERI``),
+sehingga hasil alokasi identik di semua mesin.
+"""
+import heapq
+from fractions import Fraction
+from functools import cmp_to_key
+
+import numpy as np
+
+from kalkulator.instrumen import terukur
+
+# Aturan pemecah seri untuk hasil bagi yang tepat sama besar
+PEMECAH_SERI = {
+    "urutan": "Nomor urut partai",
+    "suara": "Suara partai terbanyak di dapil",
+    "undian": "Undian (acak dengan seed, dapat direproduksi)",
+}
+
+# Urutan hasil bagi float v/d sama dengan urutan eksaknya selama v·d < 2^52:
+# dua hasil bagi berbeda terpaut minimal 1/(d1·d2), lebih besar dari galat
+# pembulatan keduanya (relatif 2^-53). Di atas batas ini dipakai jalur bilangan bulat murni.
+BATAS_FLOAT_EKSAK = 1 << 52
+# Perkalian silang v·d pada int64 aman di bawah batas ini
+BATAS_INT64 = 1 << 62
+
+
+def pembagi_sainte_lague(jumlah):
+    # Deret pembagi ganjil 1, 3, 5, ...
+    return np.arange(1, 2 * jumlah, 2)
+
+
+def peringkat_seri(suara, pemecah_seri="urutan", seed=0):
+    """Peringkat pemecah seri tiap dapil × partai (0 = didahulukan bila hasil bagi sama).
+
+    ``urutan``: nomor urut partai (urutan kolom). ``suara``: suara partai di
+    dapil terbanyak lebih dulu, lalu nomor urut. ``undian``: permutasi acak
+    per dapil dari ``np.random.default_rng(seed)`` (PCG64, hasil sama di semua mesin).
+    """
+    suara = np.asarray(suara)
+    n_dapil, n_partai = suara.shape
+    if pemecah_seri == "urutan":
+        return np.broadcast_to(np.arange(n_partai), (n_dapil, n_partai))
+    if pemecah_seri == "suara":
+        urut = np.argsort(-suara, axis=1, kind="stable")
+    elif pemecah_seri == "undian":
+        urut = np.argsort(np.random.default_rng(seed).random((n_dapil, n_partai)), axis=1, kind="stable")
+    else:
+        raise ValueError(f"Pemecah seri tidak dikenal: {pemecah_seri}")
+    peringkat = np.empty_like(urut)
+    np.put_along_axis(peringkat, urut, np.broadcast_to(np.arange(n_partai), urut.shape), axis=1)
+    return peringkat
+
+
+def _banding_hasil_bagi(a, b):
+    # a, b = (suara, pembagi, peringkat seri, partai, ...); hasil bagi lebih besar didahulukan
+    kiri, kanan = a[0] * b[1], b[0] * a[1]
+    if kiri != kanan:
+        return -1 if kiri > kanan else 1
+    return -1 if (a[2], a[1]) < (b[2], b[1]) else 1
+
+
+# Kunci urut (heap/sort) dari tuple (suara, pembagi, peringkat seri, partai)
+_KUNCI_HASIL_BAGI = cmp_to_key(_banding_hasil_bagi)
+
+
+def _calon_baris_eksak(suara, alokasi, aktif, peringkat, pembagi=None):
+    # Jalur lambat tanpa float (int Python tak terbatas) untuk suara yang sangat besar:
+    # seluruh hasil bagi sah satu baris sebagai (partai, indeks pembagi), urut menurun
+    pembagi = pembagi_sainte_lague(int(alokasi)) if pembagi is None else pembagi
+    calon = [
+        (int(v), int(pembagi[k]), int(peringkat[p]), p, k)
+        for p, v in enumerate(suara) if aktif[p]
+        for k in range(int(alokasi))
+    ]
+    calon.sort(key=_KUNCI_HASIL_BAGI)
+    return [(p, k) for *_, p, k in calon]
+
+
+def _urutan_baris_eksak(suara, alokasi, aktif, peringkat, pembagi=None):
+    return [p for p, _ in _calon_baris_eksak(suara, alokasi, aktif, peringkat, pembagi)[:int(alokasi)]]
+
+
+def _aktif(partai_aktif, n_dapil, n_partai):
+    if partai_aktif is None:
+        return np.ones((n_dapil, n_partai), dtype=bool)
+    return np.broadcast_to(np.asarray(partai_aktif, dtype=bool), (n_dapil, n_partai))
+
+
+def urutan_hasil_bagi(suara, alokasi, aktif, peringkat=None, lebar=None):
+    """Seluruh hasil bagi Sainte-Laguë sah tiap baris, diurutkan menurun secara eksak.
+
+    ``aktif`` berbentuk (dapil × partai) dan ``peringkat`` adalah peringkat
+    seri dari ``peringkat_seri`` (None = nomor urut partai). Hasil bagi sama
+    besar diurutkan menurut peringkat seri lalu pembagi, sama dengan
+    ``alokasi_batch``. Mengembalikan ``(partai, pembagi)`` berbentuk (dapil ×
+    ``lebar``, bawaan seluruh partai × kursi maksimum): pemilik dan pembagi
+    hasil bagi ke-1, ke-2, ... tiap baris, -1 setelah hasil bagi sah terakhir.
+
+    Urutan float dipakai hanya untuk baris dengan suara × pembagi di bawah
+    ``BATAS_FLOAT_EKSAK`` (di sana urutannya terbukti eksak); baris lain
+    diurutkan dengan perkalian silang bilangan bulat.
+    """
+    n_dapil, n_partai = suara.shape
+    maks_kursi = int(alokasi.max())
+    lebar = n_partai * maks_kursi if lebar is None else lebar
+
+    # Kolom partai disusun per baris menurut peringkat seri, sehingga sort stabil di
+    # atas susunan partai-mayor langsung menghasilkan urutan pemecah seri lalu pembagi
+    if peringkat is None:
+        susunan = None
+    else:
+        susunan = np.argsort(peringkat, axis=1, kind="stable")
+        suara = np.take_along_axis(suara, susunan, axis=1)
+        aktif = np.take_along_axis(aktif, susunan, axis=1)
+
+    # Tensor hasil bagi (dapil × partai × pembagi); slot di luar alokasi dapil bernilai -1
+    pembagi = pembagi_sainte_lague(maks_kursi)
+    hasil_bagi = suara[:, :, None] / pembagi[None, None, :]
+    tidak_sah = (np.arange(maks_kursi)[None, None, :] >= alokasi[:, None, None]) | ~aktif[:, :, None]
+    hasil_bagi = np.where(tidak_sah, -1.0, hasil_bagi).reshape(n_dapil, n_partai * maks_kursi)
+
+    posisi = np.argsort(-hasil_bagi, axis=1, kind="stable")[:, :lebar]
+    sah = np.take_along_axis(hasil_bagi, posisi, axis=1) >= 0
+    partai, k = np.divmod(posisi, maks_kursi)
+
+    # suara × pembagi dibandingkan lewat pembagian agar tidak melimpah di int64
+    besar = np.flatnonzero(suara.max(axis=1, initial=0) >= BATAS_FLOAT_EKSAK // np.maximum(2 * alokasi - 1, 1))
+    for d in besar:
+        calon = _calon_baris_eksak(suara[d], alokasi[d], aktif[d], np.arange(n_partai))[:lebar]
+        sah[d] = np.arange(lebar) < len(calon)
+        if calon:
+            partai[d, :len(calon)], k[d, :len(calon)] = zip(*calon)
+    if susunan is not None:
+        partai = np.take_along_axis(susunan, partai, axis=1)
+    return np.where(sah, partai, -1), np.where(sah, pembagi[k], -1)
+
+
+def alokasi_batch(suara, alokasi, partai_aktif=None, pemecah_seri="urutan", seed=0):
+    """Alokasi Sainte-Laguë untuk seluruh baris matriks suara dalam satu langkah NumPy.
+
+    ``suara`` berbentuk (dapil × partai), ``alokasi`` berisi jumlah kursi tiap
+    dapil, dan ``partai_aktif`` (opsional, bentuk (partai,) atau (dapil × partai))
+    menandai partai yang ikut dibagi kursinya.
+
+    Mengembalikan ``(kursi, urutan)``: ``kursi`` adalah jumlah kursi per
+    dapil × partai, ``urutan`` berisi indeks partai peraih kursi ke-1, ke-2, ...
+    tiap dapil (dipadati -1 setelah kursi terakhir).
+
+    Hasil bagi sama besar diurutkan menurut ``pemecah_seri`` (lihat
+    ``peringkat_seri``), lalu pembagi; urutan hasil bagi eksak (lihat
+    ``urutan_hasil_bagi``).
+    """
+    suara = np.asarray(suara, dtype=np.int64)
+    alokasi = np.asarray(alokasi, dtype=np.int64)
+    n_dapil, n_partai = suara.shape
+    maks_kursi = int(alokasi.max()) if n_dapil else 0
+    if maks_kursi <= 0 or n_partai == 0:
+        # Tanpa kursi atau tanpa partai peserta: tidak ada kursi yang dibagikan
+        urutan = np.full((n_dapil, max(maks_kursi, 0)), -1, dtype=np.int64)
+        return np.zeros((n_dapil, n_partai), dtype=np.int64), urutan
+    aktif = _aktif(partai_aktif, n_dapil, n_partai)
+    peringkat = None if pemecah_seri == "urutan" else peringkat_seri(suara, pemecah_seri, seed)
+    urutan, _ = urutan_hasil_bagi(suara, alokasi, aktif, peringkat, lebar=maks_kursi)
+    return kursi_dari_urutan(urutan, alokasi, n_partai)
+
+
+def kursi_dari_urutan(urutan, alokasi, n_partai):
+    """``(kursi, urutan)`` dari pemilik hasil bagi terurut: ``alokasi`` hasil bagi teratas tiap baris."""
+    n_dapil = len(urutan)
+    maks_kursi = int(alokasi.max()) if n_dapil else 0
+    urutan = np.where(np.arange(maks_kursi)[None, :] < alokasi[:, None], urutan[:, :maks_kursi], -1)
+    kursi = np.zeros((n_dapil, n_partai), dtype=np.int64)
+    ada = urutan >= 0
+    baris = np.broadcast_to(np.arange(n_dapil)[:, None], urutan.shape)
+    np.add.at(kursi, (baris[ada], urutan[ada]), 1)
+    return kursi, urutan
+
+
+def _bagi_sisa_seri(sama, sisa, peringkat):
+    # Sisa kursi untuk hasil bagi kembar, dibagikan menurut peringkat seri (None = nomor urut partai)
+    if peringkat is None:
+        sebelum = np.cumsum(sama, axis=1) - sama
+        return np.clip(sisa[:, None] - sebelum, 0, sama)
+    urut = np.argsort(peringkat, axis=1, kind="stable")
+    sama_urut = np.take_along_axis(sama, urut, axis=1)
+    sebelum = np.cumsum(sama_urut, axis=1) - sama_urut
+    dapat = np.zeros_like(sama)
+    np.put_along_axis(dapat, urut, np.clip(sisa[:, None] - sebelum, 0, sama_urut), axis=1)
+    return dapat
+
+
+def kursi_batch(suara, alokasi, partai_aktif=None, pemecah_seri="urutan", seed=0):
+    """Hanya jumlah kursi (dapil × partai), tanpa urutan kursi, dengan perbandingan eksak.
+
+    Lebih murah dari ``alokasi_batch`` untuk batch besar (mis. Monte Carlo).
+    Per kelompok dapil dengan alokasi S yang sama:
+
+    1. kandidat hasil bagi ke-S (ambang v*/d*) dicari dengan ``np.partition``;
+    2. kursi pasti tiap partai = banyaknya pembagi ganjil d dengan d·v* < v·d*
+       (hasil bagi di atas ambang), dihitung tertutup pada int64;
+    3. kandidat sah bila kursi pasti < S ≤ kursi pasti + hasil bagi yang tepat
+       sama dengan ambang; sisa kursi dibagikan ke hasil bagi kembar itu menurut
+       ``pemecah_seri``. Baris yang gagal verifikasi (hanya mungkin untuk suara
+       × pembagi ≥ 2^52) dihitung ulang lewat jalur bilangan bulat murni.
+
+    Dengan pemecah seri yang sama hasilnya identik dengan ``alokasi_batch``.
+    """
+    suara = np.asarray(suara, dtype=np.int64)
+    alokasi = np.asarray(alokasi, dtype=np.int64)
+    n_dapil, n_partai = suara.shape
+    kursi = np.zeros((n_dapil, n_partai), dtype=np.int64)
+    if n_partai == 0:
+        return kursi
+    aktif = None if partai_aktif is None else _aktif(partai_aktif, n_dapil, n_partai)
+    peringkat = None if pemecah_seri == "urutan" else peringkat_seri(suara, pemecah_seri, seed)
+
+    for s in np.unique(alokasi):
+        if s <= 0:
+            continue
+        baris = np.flatnonzero(alokasi == s)
+        v = suara[baris]
+        datar = (v[:, :, None] / pembagi_sainte_lague(s)[None, None, :])
+        if aktif is not None:
+            datar = np.where(aktif[baris][:, :, None], datar, -1.0)
+        datar = datar.reshape(len(baris), -1)
+        ambang = -np.partition(-datar, s - 1, axis=1)[:, s - 1]
+        calon = np.argmax(datar == ambang[:, None], axis=1)
+        p_calon, k_calon = np.divmod(calon, s)
+        v_bintang = v[np.arange(len(baris)), p_calon][:, None]
+        d_bintang = 2 * k_calon[:, None] + 1
+
+        # Untuk m = v·d*: pembagi ganjil d dengan d·v* < m ada ceil(n/2) buah, n = ceil(m/v*) - 1;
+        # d·v* == m hanya bila m habis dibagi v* dengan hasil bagi ganjil ≤ 2S - 1
+        nol = v_bintang[:, 0] == 0
+        hasil, sisa_bagi = np.divmod(v * d_bintang, np.maximum(v_bintang, 1))
+        habis = sisa_bagi == 0
+        lebih = np.minimum((hasil - habis + 1) >> 1, s)
+        sama = (habis & (hasil & 1).astype(bool) & (hasil < 2 * s)).astype(np.int64)
+        if nol.any():
+            # Ambang 0: semua hasil bagi partai bersuara di atasnya, semua milik partai tanpa suara kembar
+            lebih[nol] = np.where(v[nol] > 0, s, 0)
+            sama[nol] = np.where(v[nol] == 0, s, 0)
+        if aktif is not None:
+            lebih = lebih * aktif[baris]
+            sama = sama * aktif[baris]
+
+        sisa = s - lebih.sum(axis=1)
+        kursi[baris] = lebih + _bagi_sisa_seri(sama, sisa, None if peringkat is None else peringkat[baris])
+
+        # Verifikasi eksak kandidat ambang; baris tanpa partai aktif tidak mendapat kursi
+        jumlah_sama = sama.sum(axis=1)
+        gagal = ~((sisa > 0) & (sisa <= jumlah_sama))
+        if aktif is not None:
+            tanpa_partai = ~aktif[baris].any(axis=1)
+            kursi[baris[tanpa_partai]] = 0
+            gagal &= ~tanpa_partai
+        gagal |= v.max(axis=1, initial=0) >= BATAS_INT64 // (2 * s - 1)
+        for i in np.flatnonzero(gagal):
+            d = baris[i]
+            aktif_d = np.ones(n_partai, dtype=bool) if aktif is None else aktif[d]
+            peringkat_d = np.arange(n_partai) if peringkat is None else peringkat[d]
+            kursi[d] = np.bincount(_urutan_baris_eksak(suara[d], s, aktif_d, peringkat_d), minlength=n_partai)
+    return kursi
+
+
+def kursi_pembagi(suara, alokasi, pembagi, partai_aktif=None, pemecah_seri="urutan", seed=0):
+    """Jumlah kursi (dapil × partai) untuk metode divisor dengan deret pembagi sembarang.
+
+    ``pembagi(S)`` mengembalikan S pembagi bilangan bulat positif yang naik
+    tegas; pembagi pecahan diskalakan lebih dulu (mis. 1,4; 3; 5 menjadi
+    7, 15, 25), karena yang menentukan hanya rasio antar-pembagi. Ambang hasil
+    bagi ke-S dicari seperti ``kursi_batch``, lalu hasil bagi di atas dan sama
+    dengan ambang dihitung dengan perkalian silang bilangan bulat. Baris yang
+    gagal verifikasi dihitung ulang lewat jalur bilangan bulat murni.
+    """
+    suara = np.asarray(suara, dtype=np.int64)
+    alokasi = np.asarray(alokasi, dtype=np.int64)
+    n_dapil, n_partai = suara.shape
+    kursi = np.zeros((n_dapil, n_partai), dtype=np.int64)
+    if n_partai == 0:
+        return kursi
+    aktif = None if partai_aktif is None else _aktif(partai_aktif, n_dapil, n_partai)
+    peringkat = None if pemecah_seri == "urutan" else peringkat_seri(suara, pemecah_seri, seed)
+
+    for s in np.unique(alokasi):
+        if s <= 0:
+            continue
+        baris = np.flatnonzero(alokasi == s)
+        d = np.asarray(pembagi(int(s)), dtype=np.int64)
+        v = suara[baris]
+        datar = v[:, :, None] / d[None, None, :]
+        if aktif is not None:
+            datar = np.where(aktif[baris][:, :, None], datar, -1.0)
+        datar = datar.reshape(len(baris), -1)
+        ambang = -np.partition(-datar, s - 1, axis=1)[:, s - 1]
+        p_calon, k_calon = np.divmod(np.argmax(datar == ambang[:, None], axis=1), s)
+        v_bintang = v[np.arange(len(baris)), p_calon]
+
+        # d·v* dibanding v·d* untuk seluruh hasil bagi (dapil × partai × pembagi)
+        kiri = d[None, None, :] * v_bintang[:, None, None]
+        kanan = v[:, :, None] * d[k_calon][:, None, None]
+        lebih = (kiri < kanan).sum(axis=2)
+        sama = (kiri == kanan).sum(axis=2)
+        if aktif is not None:
+            lebih = lebih * aktif[baris]
+            sama = sama * aktif[baris]
+        sisa = s - lebih.sum(axis=1)
+        kursi[baris] = lebih + _bagi_sisa_seri(sama, sisa, None if peringkat is None else peringkat[baris])
+
+        gagal = ~((sisa > 0) & (sisa <= sama.sum(axis=1)))
+        if aktif is not None:
+            tanpa_partai = ~aktif[baris].any(axis=1)
+            kursi[baris[tanpa_partai]] = 0
+            gagal &= ~tanpa_partai
+        gagal |= v.max(axis=1, initial=0) >= BATAS_INT64 // d[-1]
+        for i in np.flatnonzero(gagal):
+            r = baris[i]
+            aktif_r = np.ones(n_partai, dtype=bool) if aktif is None else aktif[r]
+            peringkat_r = np.arange(n_partai) if peringkat is None else peringkat[r]
+            kursi[r] = np.bincount(_urutan_baris_eksak(suara[r], s, aktif_r, peringkat_r, d), minlength=n_partai)
+    return kursi
+
+
+@terukur(agregat=True)
+def simulasi_sainte_lague(dapil_nama, alokasi_kursi, df_suara, partai_lolos, pemecah_seri="urutan", seed=0):
+    """Pengganti langsung fungsi simulasi lama: (urutan_kursi, hasil_akhir) satu dapil.
+
+    ``df_suara`` boleh berupa sheet perolehan_suara (kolom DAPIL, dicari
+    dengan scan) atau frame yang sudah diindeks per DAPIL seperti
+    ``DataPemilu.suara_per_dapil`` (lookup hash, untuk ribuan dapil).
+    """
+    alokasi_kursi = int(alokasi_kursi)
+    if df_suara.index.name == "DAPIL":
+        posisi = df_suara.index.get_indexer_for([dapil_nama])[:1]
+        baris = df_suara.iloc[posisi[posisi >= 0]]
+    else:
+        baris = df_suara[df_suara["DAPIL"] == dapil_nama]
+    if baris.empty:
+        return [], {}
+
+    # Partai tanpa kolom atau dengan suara tidak valid dilewati, seperti sebelumnya
+    partai_sah, suara = [], []
+    for partai in partai_lolos:
+        try:
+            suara.append(int(baris[partai].values[0]))
+        except (KeyError, ValueError, TypeError):
+            continue
+        partai_sah.append(partai)
+    if not partai_sah:
+        return [], {}
+
+    _, urutan = alokasi_batch(np.array([suara]), np.array([alokasi_kursi]), pemecah_seri=pemecah_seri, seed=seed)
+    urutan_kursi = [partai_sah[i] for i in urutan[0] if i >= 0]
+    hasil_akhir = {}
+    for partai in urutan_kursi:
+        hasil_akhir[partai] = hasil_akhir.get(partai, 0) + 1
+    return urutan_kursi, hasil_akhir
+
+
+def hasil_bagi_batch(suara, alokasi):
+    """Seluruh hasil bagi Sainte-Laguë banyak dapil sebagai tabel panjang terurut.
+
+    Tiap partai di dapil ke-i mendapat pembagi 1, 3, ..., 2 × ``alokasi[i]`` - 1.
+    Mengembalikan array sejajar ``(dapil, partai, pembagi, hasil_bagi, kursi_ke)``
+    yang diurutkan per dapil lalu menurut hasil bagi menurun; hasil bagi sama
+    besar menurut urutan partai lalu pembagi, sehingga ``kursi_ke`` (1, 2, ...
+    untuk ``alokasi[i]`` baris teratas, 0 selainnya) sama dengan ``alokasi_batch``.
+    """
+    suara = np.asarray(suara, dtype=np.int64)
+    alokasi = np.maximum(np.asarray(alokasi, dtype=np.int64), 0)
+    n_dapil, n_partai = suara.shape
+    maks_kursi = int(alokasi.max()) if n_dapil else 0
+
+    # Susunan dapil-mayor, partai, pembagi; lexsort stabil menjaga urutan itu untuk hasil bagi kembar
+    sah = np.arange(maks_kursi)[None, None, :] < alokasi[:, None, None]
+    dapil, partai, k = np.nonzero(np.broadcast_to(sah, (n_dapil, n_partai, maks_kursi)))
+    pembagi = 2 * k + 1
+    hasil_bagi = suara[dapil, partai] / pembagi
+    urut = np.lexsort((-hasil_bagi, dapil))
+    dapil, partai, pembagi, hasil_bagi = dapil[urut], partai[urut], pembagi[urut], hasil_bagi[urut]
+
+    awal = np.searchsorted(dapil, dapil, side="left")
+    peringkat = np.arange(len(dapil)) - awal
+    kursi_ke = np.where(peringkat < alokasi[dapil], peringkat + 1, 0)
+    return dapil, partai, pembagi, hasil_bagi, kursi_ke
+
+
+def urutan_ke_nama(urutan, nama_partai):
+    """Ubah matriks indeks ``urutan`` menjadi list nama partai per dapil."""
+    nama = np.asarray(nama_partai, dtype=object)
+    return [nama[baris[baris >= 0]].tolist() for baris in urutan]
+
+
+class AlokatorSainteLague:
+    """Alokasi kursi inkremental untuk satu dapil.
+
+    Priority queue hanya menyimpan satu hasil bagi tertunda per partai, sehingga
+    mengalokasikan S kursi berbiaya O(S log P) dan kursi ke-S+1 bisa ditanyakan
+    tanpa menghitung ulang. Hasil bagi dibandingkan eksak (perkalian silang
+    bilangan bulat) dan hasil bagi sama besar diputuskan ``pemecah_seri``
+    (lihat ``peringkat_seri``), sama seperti ``alokasi_batch`` pada baris yang sama.
+    """
+
+    def __init__(self, suara, partai=None, pemecah_seri="urutan", seed=0):
+        self.suara = [int(v) for v in suara]
+        self.partai = list(partai) if partai is not None else list(range(len(self.suara)))
+        self.kursi = [0] * len(self.suara)
+        self.urutan = []
+        self.pemecah_seri = pemecah_seri
+        self.peringkat = [int(r) for r in peringkat_seri(np.array([self.suara], dtype=np.int64), pemecah_seri, seed)[0]] \
+            if self.suara else []
+        self._heap = [self._entri(i) for i in range(len(self.suara))]
+        heapq.heapify(self._heap)
+
+    def _pembagi(self, i):
+        # Pembagi hasil bagi tertunda partai ke-i
+        return 2 * self.kursi[i] + 1
+
+    def _entri(self, i):
+        # Entri heap yang diurutkan eksak: hasil bagi menurun, lalu peringkat seri
+        return _KUNCI_HASIL_BAGI((self.suara[i], self._pembagi(i), self.peringkat[i], i))
+
+    def alokasikan(self, jumlah_kursi):
+        """Tambah ``jumlah_kursi`` kursi; mengembalikan nama partai peraihnya."""
+        hasil = []
+        for _ in range(int(jumlah_kursi)):
+            if not self._heap:
+                break
+            i = heapq.heappop(self._heap).obj[3]
+            self.kursi[i] += 1
+            self.urutan.append(i)
+            hasil.append(self.partai[i])
+            heapq.heappush(self._heap, self._entri(i))
+        return hasil
+
+    def hasil_akhir(self):
+        hasil = {}
+        for i in self.urutan:
+            hasil[self.partai[i]] = hasil.get(self.partai[i], 0) + 1
+        return hasil
+
+    def kursi_berikutnya(self):
+        """Peraih kursi ke-S+1 dan selisih hasil baginya.
+
+        Mengembalikan dict ``partai``, ``hasil_bagi``, ``runner_up``,
+        ``hasil_bagi_runner_up`` (hasil bagi tertunda terbesar partai lain) dan
+        ``selisih_kursi_terakhir`` (jarak ke hasil bagi kursi ke-S), atau None
+        bila tidak ada partai.
+        """
+        if not self._heap:
+            return None
+        v, d, _, i = self._heap[0].obj
+        lain = [e.obj for e in heapq.nsmallest(2, self._heap) if e.obj[3] != i]
+        hasil = {
+            "partai": self.partai[i],
+            "hasil_bagi": v / d,
+            "runner_up": self.partai[lain[0][3]] if lain else None,
+            "hasil_bagi_runner_up": lain[0][0] / lain[0][1] if lain else None,
+            "selisih_kursi_terakhir": None,
+        }
+        if self.urutan:
+            terakhir = self.urutan[-1]
+            # Selisih dihitung sebagai pecahan eksak, baru dikonversi ke float untuk ditampilkan
+            selisih = Fraction(self.suara[terakhir], 2 * self.kursi[terakhir] - 1) - Fraction(v, d)
+            hasil["selisih_kursi_terakhir"] = float(selisih)
+        return hasil
+
+    def suara_untuk_kursi_tambahan(self, partai):
+        """Tambahan suara minimum agar ``partai`` meraih satu kursi lebih banyak
+        dari alokasi saat ini, dengan suara partai lain tetap.
+
+        Kursi tambahan diperoleh bila hasil bagi tertunda partai mengalahkan
+        hasil bagi kursi terendah milik partai lain. Perbandingan dilakukan
+        secara eksak dengan perkalian silang bilangan bulat. Mengembalikan None
+        bila belum ada kursi partai lain yang bisa direbut.
+        """
+        p = self.partai.index(partai)
+        # Kursi terakhir (hasil bagi terendah) milik partai lain
+        lawan = None
+        for i in reversed(self.urutan):
+            if i != p:
+                lawan = i
+                break
+        if lawan is None:
+            return None
+
+        v_lawan, d_lawan = self.suara[lawan], 2 * self.kursi[lawan] - 1
+        d_p = self._pembagi(p)
+        # Butuh (v_p + x) / d_p > v_lawan / d_lawan, atau sama dan p menang pemecah seri atas lawan
+        batas, sisa = divmod(v_lawan * d_p, d_lawan)
+        if self.pemecah_seri == "suara":
+            # Peringkat ikut suara baru p (= batas saat seri): suara terbanyak, lalu nomor urut
+            menang_seri = (batas, -p) > (v_lawan, -lawan)
+        else:
+            menang_seri = self.peringkat[p] < self.peringkat[lawan]
+        target = batas if (sisa == 0 and menang_seri) else batas + 1
+        return max(0, target - self.suara[p])
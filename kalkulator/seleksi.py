@@ -0,0 +1,188 @@
+"""Seleksi dapil untuk mencapai target kursi.
+
+Metode bawaan (``urutan``) mengikuti loop lama: ambil dapil teratas
+``df_all_kriteria`` (urut TOTAL_TARGET_SUARA_2029) sampai target tercapai.
+Metode ``rab`` dan ``suara`` memilih himpunan dapil dengan biaya total
+minimum lewat DP knapsack 0/1 atas jumlah kursi: setiap dapil adalah satu
+item dengan bobot TARGET_TAMBAHAN_KURSI. Tabel DP dibatasi pada target kursi
+(item × (target + 1) sel), jadi solusinya eksak dan tetap ringan untuk
+ribuan dapil.
+"""
+import numpy as np
+import pandas as pd
+
+from kalkulator.rab import hitung_sp_rab
+
+METODE_SELEKSI = {
+    "urutan": "Urutan Target Suara Terendah",
+    "rab": "Total RAB Minimum",
+    "suara": "Total Tambahan Suara Minimum",
+}
+
+
+def jumlah_dapil_terpilih(target_tambahan_kursi, target_kursi):
+    """Banyak baris teratas yang dipilih loop seleksi untuk setiap target kursi.
+
+    Loop seleksi mengambil baris selama total kursi < target, jadi hasilnya
+    adalah indeks pertama dengan kumulatif kursi ≥ target, ditambah satu.
+    """
+    kumulatif = np.cumsum(target_tambahan_kursi)
+    target_kursi = np.asarray(target_kursi)
+    n = np.searchsorted(kumulatif, target_kursi, side="left") + 1
+    n = np.minimum(n, len(kumulatif))
+    return np.where(target_kursi <= 0, 0, n)
+
+
+def biaya_dapil(df_all_kriteria, metode, kehilangan_2024, kehilangan_sp, proporsi,
+                angka_psikologis=0, biaya_manajemen=0, biaya_pendampingan=0):
+    """Biaya utama dan biaya pemecah seri per dapil untuk metode ``rab``/``suara``.
+
+    Biaya dihitung dengan rumus SP & RAB yang sama dengan Bagian 4–5, jadi
+    total biaya rencana sama dengan yang ditampilkan di Rangkuman. Bila
+    biaya utama seri (mis. angka psikologis masih 0), dapil dengan total
+    tambahan suara lebih kecil yang didahulukan.
+    """
+    sp_rab = hitung_sp_rab(df_all_kriteria, kehilangan_2024, kehilangan_sp, proporsi,
+                           angka_psikologis, biaya_manajemen, biaya_pendampingan)
+    suara = sp_rab["TOTAL_SUARA_TAMBAHAN"].to_numpy(dtype=float)
+    if metode == "rab":
+        return sp_rab["TOTAL_RAB"].to_numpy(dtype=float), suara
+    if metode == "suara":
+        return suara, df_all_kriteria["TOTAL_TARGET_SUARA_2029"].to_numpy(dtype=float)
+    raise ValueError(f"Metode seleksi tidak dikenal: {metode}")
+
+
+def _lebih_baik(a, b):
+    # Perbandingan leksikografis (biaya, biaya kedua, kursi) elemen demi elemen
+    return (a[0] < b[0]) | ((a[0] == b[0]) & ((a[1] < b[1]) | ((a[1] == b[1]) & (a[2] < b[2]))))
+
+
+def knapsack_kursi(kursi, biaya, biaya_kedua=None, batas=None):
+    """DP biaya minimum untuk total kursi 0..``batas``.
+
+    State ``batas`` berarti "``batas`` kursi atau lebih", jadi ukuran tabel
+    hanya item × (batas + 1) walaupun jumlah dapil ribuan. Tanpa ``batas``
+    setiap total kursi dihitung tepat. Dalam satu state, rencana dibandingkan
+    menurut biaya, lalu ``biaya_kedua``, lalu jumlah kursi paling sedikit.
+
+    Mengembalikan dict berisi ``biaya``, ``biaya_kedua``, ``kursi_total``
+    (inf bila state tidak bisa dicapai) dan tabel ``asal`` (item × state →
+    state sebelum item diambil, -1 bila tidak diambil) untuk rekonstruksi.
+    """
+    kursi = np.asarray(kursi, dtype=np.int64)
+    biaya = np.asarray(biaya, dtype=float)
+    biaya_kedua = np.zeros_like(biaya) if biaya_kedua is None else np.asarray(biaya_kedua, dtype=float)
+    total = int(kursi[kursi > 0].sum())
+    batas = total if batas is None else min(max(int(batas), 0), total)
+
+    dp = [np.full(batas + 1, np.inf) for _ in range(3)]
+    for d in dp:
+        d[0] = 0.0
+    asal = np.full((len(kursi), batas + 1), -1, dtype=np.int32)
+    for i, w in enumerate(kursi):
+        if w <= 0:
+            continue
+        calon = [np.full(batas + 1, np.inf) for _ in range(3)]
+        sumber = np.full(batas + 1, -1, dtype=np.int32)
+        tambah = (biaya[i], biaya_kedua[i], w)
+        if w < batas:
+            for c, d, t in zip(calon, dp, tambah):
+                c[w:batas] = d[:batas - w] + t
+            sumber[w:batas] = np.arange(batas - w)
+        # State batas dicapai dari state mana pun ≥ batas − w; ambil yang terbaik
+        awal = max(batas - w, 0)
+        terbaik = awal + np.lexsort((dp[2][awal:], dp[1][awal:], dp[0][awal:]))[0]
+        for c, d, t in zip(calon, dp, tambah):
+            c[batas] = d[terbaik] + t
+        sumber[batas] = terbaik
+
+        ganti = _lebih_baik(calon, dp) & (sumber >= 0)
+        asal[i] = np.where(ganti, sumber, -1)
+        dp = [np.where(ganti, c, d) for c, d in zip(calon, dp)]
+    return {"biaya": dp[0], "biaya_kedua": dp[1], "kursi_total": dp[2], "asal": asal}
+
+
+def rekonstruksi(tabel, state):
+    """Indeks item (urut naik) yang membentuk solusi DP pada ``state``."""
+    terpilih = []
+    s = int(state)
+    for i in range(tabel["asal"].shape[0] - 1, -1, -1):
+        if tabel["asal"][i, s] >= 0:
+            terpilih.append(i)
+            s = int(tabel["asal"][i, s])
+    return terpilih[::-1]
+
+
+def seleksi_optimal(kursi, biaya, target_kursi, biaya_kedua=None):
+    """Indeks dapil dengan biaya total minimum yang mencapai ``target_kursi``.
+
+    Bila target melebihi seluruh kursi yang tersedia, semua dapil diambil
+    (sama seperti metode urutan).
+    """
+    if target_kursi <= 0:
+        return []
+    tabel = knapsack_kursi(kursi, biaya, biaya_kedua, batas=target_kursi)
+    return rekonstruksi(tabel, len(tabel["biaya"]) - 1)
+
+
+def seleksi_optimal_per_target(kursi, biaya, daftar_target, biaya_kedua=None):
+    """Mask (target × dapil) seleksi biaya minimum untuk banyak target kursi dari satu tabel DP.
+
+    Tabel dibangun sekali sampai target terbesar; rencana untuk target t adalah
+    state terbaik (biaya, biaya kedua, kursi) di antara state ≥ t, yaitu
+    optimum yang sama dengan ``seleksi_optimal(kursi, biaya, t, biaya_kedua)``.
+    """
+    target = np.asarray(daftar_target, dtype=float).astype(np.int64)
+    mask = np.zeros((len(target), len(kursi)), dtype=bool)
+    if not len(target) or target.max() <= 0:
+        return mask
+    tabel = knapsack_kursi(kursi, biaya, biaya_kedua, batas=int(target.max()))
+    batas = len(tabel["biaya"]) - 1
+    for j, t in enumerate(target):
+        if t <= 0:
+            continue
+        awal = min(int(t), batas)
+        state = awal + np.lexsort((
+            tabel["kursi_total"][awal:], tabel["biaya_kedua"][awal:], tabel["biaya"][awal:],
+        ))[0]
+        mask[j, rekonstruksi(tabel, state)] = True
+    return mask
+
+
+def frontier_pareto(df_all_kriteria, biaya, biaya_kedua=None, batas=None):
+    """Frontier Pareto kursi vs biaya: titik yang tidak didominasi rencana lain.
+
+    Setiap baris adalah rencana termurah untuk total kursinya, dan tidak ada
+    rencana lain dengan kursi lebih banyak yang biayanya sama atau lebih kecil.
+    Dengan ``batas``, frontier berhenti pada rencana termurah ≥ ``batas`` kursi.
+    """
+    tabel = knapsack_kursi(df_all_kriteria["TARGET_TAMBAHAN_KURSI"].to_numpy(), biaya, biaya_kedua, batas)
+    dp = tabel["biaya"]
+    # Minimum biaya untuk state > s (dari kanan)
+    min_kanan = np.append(np.minimum.accumulate(dp[::-1])[::-1][1:], np.inf)
+    baris = []
+    for s in np.flatnonzero(np.isfinite(dp) & (dp < min_kanan)):
+        if s == 0:
+            continue
+        indeks = rekonstruksi(tabel, s)
+        baris.append({
+            "TOTAL_KURSI": int(tabel["kursi_total"][s]),
+            "TOTAL_BIAYA": float(dp[s]),
+            "JUMLAH_DAPIL": len(indeks),
+            "DAPIL": ", ".join(df_all_kriteria["DAPIL"].iloc[indeks]),
+        })
+    return pd.DataFrame(baris, columns=["TOTAL_KURSI", "TOTAL_BIAYA", "JUMLAH_DAPIL", "DAPIL"])
+
+
+def seleksi_dapil(df_all_kriteria, target_kursi, metode="urutan", **parameter_biaya):
+    """Baris ``df_all_kriteria`` yang dipilih untuk ``target_kursi``.
+
+    ``parameter_biaya`` diteruskan ke ``biaya_dapil`` untuk metode ``rab``
+    dan ``suara``. Urutan baris hasil mengikuti ``df_all_kriteria``.
+    """
+    if metode == "urutan":
+        n = int(jumlah_dapil_terpilih(df_all_kriteria["TARGET_TAMBAHAN_KURSI"].to_numpy(), target_kursi))
+        return df_all_kriteria.iloc[:n].reset_index(drop=True)
+    biaya, biaya_kedua = biaya_dapil(df_all_kriteria, metode, **parameter_biaya)
+    indeks = seleksi_optimal(df_all_kriteria["TARGET_TAMBAHAN_KURSI"].to_numpy(), biaya, target_kursi, biaya_kedua)
+    return df_all_kriteria.iloc[indeks].reset_index(drop=True)
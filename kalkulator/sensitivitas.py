@@ -0,0 +1,174 @@
+"""Analisis sensitivitas: total target suara & RAB di atas grid parameter.
+
+Untuk satu ``df_all_kriteria`` (hasil Sainte-Laguë per dapil dipakai ulang),
+seleksi dapil metode ``urutan`` untuk target kursi t selalu berupa prefiks
+tabel yang sudah diurutkan, dan TOTAL_RAB tiap dapil linear terhadap faktor
+kehilangan serta angka psikologis. Karena itu seluruh grid dievaluasi dengan
+prefix-sum dan broadcasting, tanpa menjalankan ulang script Streamlit per titik.
+
+Metode seleksi biaya minimum (``rab``/``suara``) memilih dapil yang berbeda
+per titik grid: biaya seluruh titik dihitung sekaligus, lalu satu tabel DP
+knapsack per vektor biaya unik melayani semua target kursi.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from kalkulator.rab import KOLOM_SP_KURSI, bobot_sp_kursi, hitung_sp, hitung_total_rab
+from kalkulator.seleksi import jumlah_dapil_terpilih, seleksi_optimal_per_target
+
+SUMBU = ["target_kursi_2029", "kehilangan_2024", "kehilangan_sp", "angka_psikologis"]
+LABEL_SUMBU = {
+    "target_kursi_2029": "Target Kursi 2029",
+    "kehilangan_2024": "Potensi Kehilangan Suara 2029 (%)",
+    "kehilangan_sp": "Potensi Kehilangan SP (%)",
+    "angka_psikologis": "Angka Psikologis",
+}
+
+
+def rentang_nilai(teks):
+    """Parse input grid: daftar ``"0, 5, 10"`` dan/atau rentang ``"0:20:5"`` (akhir inklusif)."""
+    nilai = []
+    for bagian in re.split(r"[,;\s]+", teks.strip()):
+        if not bagian:
+            continue
+        if ":" in bagian:
+            awal, akhir, *langkah = (float(x) for x in bagian.split(":"))
+            langkah = langkah[0] if langkah else 1.0
+            if langkah <= 0:
+                raise ValueError(f"Langkah rentang harus positif: {bagian}")
+            nilai.extend(np.arange(awal, akhir + langkah / 2, langkah).tolist())
+        else:
+            nilai.append(float(bagian))
+    return np.array(nilai)
+
+
+def sweep_sensitivitas(df_all_kriteria, target_kursi_2029, kehilangan_2024, kehilangan_sp, angka_psikologis,
+                       proporsi, biaya_manajemen=0, biaya_pendampingan=0, metode_seleksi="urutan"):
+    """Evaluasi seluruh kombinasi grid sekaligus.
+
+    Mengembalikan dict berisi ``sumbu`` (nilai tiap sumbu sesuai ``SUMBU``)
+    serta ``jumlah_dapil``, ``total_kursi``, ``total_target_suara``,
+    ``total_sp`` dan ``total_rab``, masing-masing dapat di-broadcast ke
+    (target kursi × kehilangan 2024 × kehilangan SP × angka psikologis).
+    Dapil dipilih dengan ``metode_seleksi`` yang sama seperti ``seleksi_dapil``.
+    """
+    sumbu = [np.atleast_1d(np.asarray(x, dtype=float)) for x in
+             (target_kursi_2029, kehilangan_2024, kehilangan_sp, angka_psikologis)]
+    if metode_seleksi != "urutan":
+        return _sweep_optimal(df_all_kriteria, sumbu, proporsi, biaya_manajemen, biaya_pendampingan, metode_seleksi)
+    t, a, b, c = sumbu
+
+    tambah_kursi = df_all_kriteria["TARGET_TAMBAHAN_KURSI"].to_numpy()
+    target_suara = df_all_kriteria["TOTAL_TARGET_SUARA_2029"].to_numpy()
+    suara_2024 = df_all_kriteria["SUARA_2024"].to_numpy()
+
+    # SP_i = (suara tambahan + suara 2024 × a/100) × (1 + b/100) bila suara tambahan > 0
+    suara_tambahan = np.where((tambah_kursi == 0) | (target_suara < suara_2024), 0, target_suara - suara_2024)
+    ada = suara_tambahan > 0
+    _, bobot = bobot_sp_kursi(tambah_kursi, proporsi)
+    pembagi = np.where(tambah_kursi > 1, tambah_kursi, 1)
+    bobot_total = np.where(tambah_kursi == 1, 1.0, bobot.sum(axis=1) / pembagi)
+    kursi_berbiaya = np.where(ada, (bobot > 0).sum(axis=1), 0)
+
+    def prefiks(x):
+        return np.concatenate([[0], np.cumsum(x)])
+
+    n = jumlah_dapil_terpilih(tambah_kursi, t)
+    sp_tetap = prefiks(np.where(ada, suara_tambahan, 0))[n]
+    sp_suara = prefiks(np.where(ada, suara_2024 / 100, 0))[n]
+    rab_tetap = prefiks(np.where(ada, suara_tambahan * bobot_total, 0))[n]
+    rab_suara = prefiks(np.where(ada, suara_2024 / 100 * bobot_total, 0))[n]
+    biaya = prefiks(kursi_berbiaya)[n] * (biaya_manajemen + biaya_pendampingan)
+
+    # Broadcast ke (T, A, B, C)
+    a_ = a[None, :, None, None]
+    b_ = b[None, None, :, None]
+    c_ = c[None, None, None, :]
+    faktor_sp = 1 + b_ / 100
+    total_sp = (sp_tetap[:, None, None, None] + sp_suara[:, None, None, None] * a_) * faktor_sp
+    total_rab = c_ * (rab_tetap[:, None, None, None] + rab_suara[:, None, None, None] * a_) * faktor_sp
+    total_rab = total_rab + biaya[:, None, None, None]
+
+    per_target = (len(t), 1, 1, 1)
+    return {
+        "sumbu": dict(zip(SUMBU, sumbu)),
+        "jumlah_dapil": n.reshape(per_target),
+        "total_kursi": prefiks(tambah_kursi)[n].reshape(per_target),
+        "total_target_suara": prefiks(target_suara)[n].reshape(per_target),
+        "total_sp": np.broadcast_to(total_sp, (len(t), len(a), len(b), 1)),
+        "total_rab": total_rab,
+    }
+
+
+def _sweep_optimal(df_all_kriteria, sumbu, proporsi, biaya_manajemen, biaya_pendampingan, metode_seleksi):
+    # Sweep untuk metode seleksi biaya minimum: biaya per titik (a, b, c) × dapil memakai
+    # rumus SP & RAB yang sama dengan biaya_dapil, lalu satu DP per vektor biaya unik
+    t, a, b, c = sumbu
+    tambah_kursi = df_all_kriteria["TARGET_TAMBAHAN_KURSI"].to_numpy()
+    target_suara = df_all_kriteria["TOTAL_TARGET_SUARA_2029"].to_numpy()
+    ga, gb, gc = (x.ravel()[:, None] for x in np.meshgrid(a, b, c, indexing="ij"))
+
+    sp = hitung_sp(tambah_kursi, target_suara, df_all_kriteria["SUARA_2024"].to_numpy(), ga, gb, proporsi)
+    rab = hitung_total_rab([sp[k] for k in KOLOM_SP_KURSI], gc, biaya_manajemen, biaya_pendampingan)
+    suara = np.broadcast_to(sp["TOTAL_SUARA_TAMBAHAN"], rab.shape)
+    if metode_seleksi == "rab":
+        biaya, biaya_kedua = rab, suara
+    elif metode_seleksi == "suara":
+        biaya, biaya_kedua = suara, np.broadcast_to(target_suara.astype(float), rab.shape)
+    else:
+        raise ValueError(f"Metode seleksi tidak dikenal: {metode_seleksi}")
+
+    unik, balik = np.unique(np.concatenate([biaya, biaya_kedua], axis=1), axis=0, return_inverse=True)
+    n_dapil = len(tambah_kursi)
+    mask = np.stack([
+        seleksi_optimal_per_target(tambah_kursi, u[:n_dapil], t, u[n_dapil:]) for u in unik
+    ])[balik.ravel()]  # (titik a·b·c × target × dapil)
+
+    bentuk = (len(a), len(b), len(c), len(t))
+
+    def total(nilai):
+        # Jumlah nilai dapil terpilih per titik, disusun ulang menjadi (target × a × b × c)
+        nilai = np.broadcast_to(nilai, (len(mask), n_dapil)).astype(float)
+        return np.moveaxis(np.einsum("gtn,gn->gt", mask, nilai).reshape(bentuk), 3, 0)
+
+    return {
+        "sumbu": dict(zip(SUMBU, sumbu)),
+        "jumlah_dapil": np.moveaxis(mask.sum(axis=2).reshape(bentuk), 3, 0),
+        "total_kursi": total(tambah_kursi).astype(np.int64),
+        "total_target_suara": total(target_suara),
+        "total_sp": total(sp["SP"]),
+        "total_rab": total(rab),
+    }
+
+
+def tabel_sweep(hasil):
+    """Hasil sweep dalam format panjang (satu baris per titik grid)."""
+    sumbu = hasil["sumbu"]
+    grid = np.meshgrid(*[sumbu[s] for s in SUMBU], indexing="ij")
+    bentuk = grid[0].shape
+    df = pd.DataFrame({s: g.ravel() for s, g in zip(SUMBU, grid)})
+    df["JUMLAH_DAPIL"] = np.broadcast_to(hasil["jumlah_dapil"], bentuk).ravel()
+    df["TOTAL_KURSI"] = np.broadcast_to(hasil["total_kursi"], bentuk).ravel()
+    df["TOTAL_TARGET_SUARA"] = np.broadcast_to(hasil["total_target_suara"], bentuk).ravel()
+    df["TOTAL_SP"] = np.broadcast_to(hasil["total_sp"], bentuk).ravel()
+    df["TOTAL_RAB"] = hasil["total_rab"].ravel()
+    return df
+
+
+def heatmap(hasil, sumbu_baris, sumbu_kolom, nilai="total_rab", tetap=None):
+    """Matriks 2D ``nilai`` untuk dua sumbu; sumbu lain diambil pada indeks ``tetap`` (default 0)."""
+    tetap = tetap or {}
+    data = np.broadcast_to(hasil[nilai], tuple(len(hasil["sumbu"][s]) for s in SUMBU))
+    indeks = []
+    for s in SUMBU:
+        indeks.append(slice(None) if s in (sumbu_baris, sumbu_kolom) else tetap.get(s, 0))
+    matriks = data[tuple(indeks)]
+    if SUMBU.index(sumbu_baris) > SUMBU.index(sumbu_kolom):
+        matriks = matriks.T
+    return pd.DataFrame(
+        matriks,
+        index=pd.Index(hasil["sumbu"][sumbu_baris], name=sumbu_baris),
+        columns=pd.Index(hasil["sumbu"][sumbu_kolom], name=sumbu_kolom),
+    )
@@ -0,0 +1,168 @@
+"""Snapshot kolumnar dari data_calculated.xlsx.
+
+Snapshot berupa direktori ``<nama workbook>.snapshot/`` berisi file ``.npy``
+mentah (bisa di-memory-map dan dibagi page cache antar proses worker) dan
+``meta.json`` yang mencatat nama dapil/partai serta versi workbook sumber.
+Workbook multi-tingkat disimpan satu subfolder per tingkat.
+
+Bangun ulang snapshot setiap kali workbook diperbarui::
+
+    python -m kalkulator.snapshot data_calculated.xlsx
+"""
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+VERSI_FORMAT = 2
+FILE_META = "meta.json"
+
+
+def path_snapshot(path_workbook):
+    root, _ = os.path.splitext(os.path.abspath(path_workbook))
+    return root + ".snapshot"
+
+
+def baca_meta(path_workbook):
+    """Baca meta.json snapshot milik workbook, atau None bila tidak ada/rusak."""
+    try:
+        with open(os.path.join(path_snapshot(path_workbook), FILE_META), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("versi_format") != VERSI_FORMAT:
+        return None
+    return meta
+
+
+def _tulis_tingkat(data, folder):
+    # Array satu tingkat ke ``folder``; mengembalikan bagian meta tingkat tersebut
+    df_suara, df_kursi, df_dapil = data.df_suara, data.df_kursi, data.df_dapil
+    partai_suara = df_suara.columns[1:].tolist()
+    partai_kursi = df_kursi.columns[1:].tolist()
+
+    kolom_float = [p for p in partai_suara if pd.api.types.is_float_dtype(df_suara[p])]
+    arrays = {
+        "suara": df_suara[partai_suara].fillna(0).to_numpy(dtype=np.int32),
+        "kursi": df_kursi[partai_kursi].fillna(0).to_numpy(dtype=np.int16),
+    }
+    if kolom_float:
+        # Kolom bertipe float (mis. ada sel kosong/desimal) disimpan apa adanya
+        # agar frame hasil muat sama persis dengan sheet aslinya
+        arrays["suara_float"] = df_suara[kolom_float].to_numpy(dtype=np.float64)
+
+    # Sheet dapil: kolom teks disimpan di meta, kolom angka sebagai .npy
+    kolom_dapil = []
+    for kolom in df_dapil.columns:
+        seri = df_dapil[kolom]
+        if pd.api.types.is_numeric_dtype(seri):
+            dtype = np.int16 if kolom == "ALOKASI KURSI" else seri.dtype
+            arrays[f"dapil_{len(kolom_dapil)}"] = seri.to_numpy(dtype=dtype)
+            kolom_dapil.append({"nama": kolom, "jenis": "angka", "dtype": str(seri.dtype)})
+        else:
+            kolom_dapil.append({"nama": kolom, "jenis": "teks", "nilai": seri.tolist()})
+
+    os.makedirs(folder)
+    for nama, arr in arrays.items():
+        np.save(os.path.join(folder, nama + ".npy"), arr)
+    return {
+        "nama": data.tingkat,
+        "folder": os.path.basename(folder),
+        "partai_lolos": data.partai_lolos,
+        "dapil_suara": df_suara["DAPIL"].tolist(),
+        "dapil_kursi": df_kursi["DAPIL"].tolist(),
+        "partai_suara": partai_suara,
+        "partai_kursi": partai_kursi,
+        "kolom_float": kolom_float,
+        "kolom_dapil": kolom_dapil,
+    }
+
+
+def tulis_snapshot(semua, path_workbook, sha, kunci_stat):
+    """Tulis snapshot dari dict tingkat → DataPemilu hasil baca workbook (satu subfolder per tingkat)."""
+    # Tulis ke direktori sementara lalu tukar, agar pembaca tidak melihat snapshot setengah jadi
+    tujuan = path_snapshot(path_workbook)
+    sementara = tujuan + ".tmp"
+    shutil.rmtree(sementara, ignore_errors=True)
+    os.makedirs(sementara)
+    meta = {
+        "versi_format": VERSI_FORMAT,
+        "sumber": os.path.basename(path_workbook),
+        "sumber_sha256": sha,
+        "sumber_mtime_ns": kunci_stat[0],
+        "sumber_size": kunci_stat[1],
+        "tingkat": [
+            _tulis_tingkat(data, os.path.join(sementara, f"tingkat_{i}")) for i, data in enumerate(semua.values())
+        ],
+    }
+    with open(os.path.join(sementara, FILE_META), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    shutil.rmtree(tujuan, ignore_errors=True)
+    os.replace(sementara, tujuan)
+    return tujuan
+
+
+def _muat_tingkat(folder, meta):
+    def _npy(nama):
+        return np.load(os.path.join(folder, nama + ".npy"), mmap_mode="r")
+
+    matriks_suara = _npy("suara")
+    matriks_kursi = _npy("kursi")
+
+    kolom_float = {p: j for j, p in enumerate(meta["kolom_float"])}
+    suara_float = _npy("suara_float") if kolom_float else None
+    kolom = {"DAPIL": meta["dapil_suara"]}
+    for j, partai in enumerate(meta["partai_suara"]):
+        if partai in kolom_float:
+            kolom[partai] = np.array(suara_float[:, kolom_float[partai]])
+        else:
+            kolom[partai] = matriks_suara[:, j].astype(np.int64)
+    df_suara = pd.DataFrame(kolom)
+
+    kolom = {"DAPIL": meta["dapil_kursi"]}
+    for j, partai in enumerate(meta["partai_kursi"]):
+        kolom[partai] = matriks_kursi[:, j].astype(np.int64)
+    df_kursi = pd.DataFrame(kolom)
+
+    kolom = {}
+    for i, info in enumerate(meta["kolom_dapil"]):
+        if info["jenis"] == "teks":
+            kolom[info["nama"]] = info["nilai"]
+        else:
+            kolom[info["nama"]] = _npy(f"dapil_{i}").astype(info["dtype"])
+    df_dapil = pd.DataFrame(kolom)
+
+    return {
+        "df_suara": df_suara, "df_kursi": df_kursi, "df_dapil": df_dapil,
+        "matriks_suara": matriks_suara, "matriks_kursi": matriks_kursi,
+        "partai_lolos": meta["partai_lolos"],
+    }
+
+
+def muat_snapshot(path_workbook, meta):
+    """Muat snapshot (memory-mapped) menjadi frame dengan bentuk seperti sheet aslinya.
+
+    Mengembalikan dict tingkat → dict argumen ``DataPemilu`` (df_suara,
+    df_kursi, df_dapil, matriks_suara, matriks_kursi, partai_lolos).
+    """
+    folder = path_snapshot(path_workbook)
+    return {t["nama"]: _muat_tingkat(os.path.join(folder, t["folder"]), t) for t in meta["tingkat"]}
+
+
+def main(argv=None):
+    from kalkulator.data import baca_semua_tingkat, hash_file, kunci_stat
+
+    argv = sys.argv[1:] if argv is None else argv
+    path_workbook = argv[0] if argv else "data_calculated.xlsx"
+    kunci = kunci_stat(path_workbook)
+    sha = hash_file(path_workbook)
+    semua = baca_semua_tingkat(path_workbook, versi=sha)
+    tujuan = tulis_snapshot(semua, path_workbook, sha, kunci)
+    print(f"Snapshot ditulis ke {tujuan}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Tabel berhalaman di sisi server: saring, urutkan, lalu format hanya halaman yang tampil.
+
+Frame sumber tetap bertipe (angka tetap angka), sehingga pengurutan numerik
+benar dan biaya format/``to_html`` hanya sebanding dengan jumlah baris satu
+halaman, bukan jumlah baris total (penting untuk data DPRD kabupaten/kota).
+"""
+import numpy as np
+import pandas as pd
+
+# Gaya tabel HTML app; disuntikkan sekali per rerun
+CSS_TABEL = """
+<style>
+.scrollable-table { overflow-x: auto; overflow-y: auto; max-height: 600px; width: 100%; border: 1px solid #333; border-radius: 8px; background-color: rgba(255,255,255,0.02); margin-bottom: 0.5rem; }
+.centered-table { width: 100% !important; table-layout: fixed; font-family: "Segoe UI", "Roboto", sans-serif; border-collapse: collapse; text-align: center; }
+.centered-table th, .centered-table td { text-align: center !important; vertical-align: middle !important; font-size: 14px; white-space: nowrap; padding: 10px 8px; border-bottom: 1px solid #2c2c2c; }
+.centered-table th { background-color: #1f1f1f; color: #ffffff; text-transform: uppercase; }
+.centered-table tr:hover td { background-color: rgba(255,255,255,0.05); }
+</style>
+"""
+
+
+def format_persen(x):
+    # Nilai sudah dibulatkan di tahapnya; sama dengan .astype(str) + " %" pada versi lama
+    return f"{float(x)} %"
+
+
+def format_kursi_ke(x):
+    # Nomor kursi Sainte-Laguë; 0 = hasil bagi yang tidak mendapat kursi
+    return x if x else ""
+
+
+def jumlah_halaman(jumlah_baris, per_halaman):
+    return max(1, (jumlah_baris - 1) // per_halaman + 1)
+
+
+def saring_urutkan(df, cari="", kolom_urut=None, menurun=False):
+    """Baris ``df`` yang memuat teks ``cari`` lalu diurutkan menurut ``kolom_urut``.
+
+    Pencarian tanpa beda huruf besar/kecil di kolom teks (object/kategori);
+    untuk kolom kategori cukup kategorinya yang dicocokkan. Pengurutan stabil
+    dengan nilai kosong di akhir. Tanpa pencarian/pengurutan ``df`` dikembalikan
+    apa adanya (tanpa salinan).
+    """
+    cari = (cari or "").strip().lower()
+    if cari:
+        cocok = np.zeros(len(df), dtype=bool)
+        for kolom in df.columns:
+            nilai = df[kolom]
+            if isinstance(nilai.dtype, pd.CategoricalDtype):
+                kategori = nilai.cat.categories.astype(str).str.lower().str.contains(cari, regex=False)
+                cocok |= np.isin(nilai.cat.codes.to_numpy(), np.flatnonzero(kategori))
+            elif nilai.dtype == object:
+                cocok |= nilai.astype(str).str.lower().str.contains(cari, regex=False).to_numpy()
+        df = df[cocok]
+    if kolom_urut is not None and kolom_urut in df.columns:
+        df = df.sort_values(kolom_urut, ascending=not menurun, kind="stable", na_position="last")
+    return df
+
+
+def potong_halaman(df, halaman, per_halaman, format_kolom=None):
+    """Baris halaman ke-``halaman`` (mulai 1), dengan ``format_kolom`` (kolom → fungsi) diterapkan."""
+    halaman = min(max(1, halaman), jumlah_halaman(len(df), per_halaman))
+    potongan = df.iloc[(halaman - 1) * per_halaman:halaman * per_halaman]
+    if format_kolom:
+        potongan = potongan.copy()
+        for kolom, fungsi in format_kolom.items():
+            if kolom in potongan.columns:
+                potongan[kolom] = [fungsi(x) for x in potongan[kolom].tolist()]
+    return potongan
+
+
+def html_tabel(df):
+    """Potongan tabel sebagai HTML (kelas CSS ``CSS_TABEL``)."""
+    return f'<div class="scrollable-table">{df.to_html(index=False, classes="centered-table", escape=False)}</div>'
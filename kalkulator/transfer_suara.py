@@ -0,0 +1,261 @@
+"""Skenario transfer suara & koalisi: "X% suara A pindah ke B di propinsi P", "C dan D bergabung".
+
+Setiap skenario adalah daftar aturan transfer yang disimpan jarang (sparse):
+satu entri (skenario, propinsi, partai asal, partai tujuan, basis poin).
+Seluruh aturan berlaku serentak terhadap suara 2024 (bukan berurutan) dan
+suara yang pindah dibulatkan ke bawah, jadi total suara dapil tetap.
+
+``evaluasi_transfer`` hanya mengalokasikan ulang baris (skenario, dapil) yang
+suaranya berubah; baris lain kursinya sama dengan kondisi awal. Semua baris
+yang terdampak dari seluruh skenario ditumpuk menjadi satu batch alokasi,
+sehingga ribuan skenario dievaluasi sekaligus.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from kalkulator.data import DataPemilu
+from kalkulator.metode_alokasi import METODE_ACUAN, kursi_metode
+
+BASIS_POIN = 10_000
+# Batas elemen tensor hasil bagi (baris × partai × kursi) per blok alokasi ulang
+ELEMEN_BLOK = 1 << 22
+# Anggaran cache turunan data skenario (tabel kriteria skenario); ikut dihitung penuh
+# di cache data induk, sehingga jumlah skenario yang ditahan ikut terbatas
+BATAS_CACHE_SKENARIO_BYTE = 16 << 20
+
+# "A > B 30%" atau "A > B 30% @ JAWA TIMUR" (pindah sebagian), "A + B + C" (gabung ke A)
+POLA_PINDAH = re.compile(r"^\s*(?P<dari>[^>]+?)\s*>\s*(?P<ke>\S+)\s+(?P<persen>[\d.,]+)\s*%?\s*(?:@\s*(?P<propinsi>.+?))?\s*$")
+
+
+def baca_aturan(teks):
+    """Parse teks skenario: satu skenario per baris, aturan dipisah ``;``.
+
+    Aturan berbentuk ``A > B 30%`` (30% suara A pindah ke B), opsional
+    ``@ PROPINSI`` untuk membatasi wilayah, atau ``A + B`` (B bergabung ke A,
+    100% suara B pindah ke A). Mengembalikan daftar ``(label, aturan)``.
+    """
+    hasil = []
+    for baris in teks.splitlines():
+        baris = baris.strip()
+        if not baris or baris.startswith("#"):
+            continue
+        aturan = []
+        for bagian in baris.split(";"):
+            bagian = bagian.strip()
+            if not bagian:
+                continue
+            if "+" in bagian and ">" not in bagian:
+                anggota = [p.strip() for p in bagian.split("+")]
+                if len(anggota) < 2 or not all(anggota):
+                    raise ValueError(f"Aturan gabung tidak valid: {bagian}")
+                aturan.append({"gabung": anggota})
+                continue
+            cocok = POLA_PINDAH.match(bagian)
+            if cocok is None:
+                raise ValueError(f"Aturan tidak dikenali: {bagian}")
+            aturan.append({
+                "dari": cocok["dari"], "ke": cocok["ke"],
+                "persen": float(cocok["persen"].replace(",", ".")), "propinsi": cocok["propinsi"],
+            })
+        hasil.append((baris, aturan))
+    return hasil
+
+
+def _uraikan(aturan):
+    # Aturan gabung = transfer 100% nasional dari setiap anggota ke anggota pertama
+    for a in aturan:
+        if "gabung" in a:
+            for anggota in a["gabung"][1:]:
+                yield {"dari": anggota, "ke": a["gabung"][0], "persen": 100.0, "propinsi": None}
+        else:
+            yield a
+
+
+def kompilasi_transfer(data, daftar_skenario):
+    """Seluruh aturan ``daftar_skenario`` (daftar berisi daftar aturan) sebagai array COO.
+
+    Mengembalikan dict ``skenario``, ``propinsi`` (kode dari ``kode_propinsi``,
+    -1 = nasional), ``dari``, ``ke`` (indeks kolom ``data.partai``), dan
+    ``basis_poin`` (persen × 100).
+    """
+    _, propinsi = kode_propinsi(data)
+    posisi_propinsi = {p: i for i, p in enumerate(propinsi)}
+    kolom = {k: [] for k in ("skenario", "propinsi", "dari", "ke", "basis_poin")}
+    for s, aturan in enumerate(daftar_skenario):
+        for a in _uraikan(aturan):
+            for peran in ("dari", "ke"):
+                if data.kode_partai(a[peran]) < 0:
+                    raise ValueError(f"Partai tidak dikenal: {a[peran]}")
+            if a["dari"] == a["ke"]:
+                raise ValueError(f"Partai asal dan tujuan sama: {a['dari']}")
+            if not 0 <= a["persen"] <= 100:
+                raise ValueError(f"Persentase transfer harus 0–100: {a['persen']}")
+            wilayah = a.get("propinsi")
+            if wilayah and wilayah not in posisi_propinsi:
+                raise ValueError(f"Propinsi tidak dikenal: {wilayah}")
+            kolom["skenario"].append(s)
+            kolom["propinsi"].append(posisi_propinsi[wilayah] if wilayah else -1)
+            kolom["dari"].append(data.kode_partai(a["dari"]))
+            kolom["ke"].append(data.kode_partai(a["ke"]))
+            kolom["basis_poin"].append(int(round(a["persen"] * 100)))
+    return {k: np.asarray(v, dtype=np.int64) for k, v in kolom.items()}
+
+
+def kode_propinsi(data):
+    """Kode propinsi per baris ``nama_dapil`` (-1 bila tidak diketahui) dan daftar namanya."""
+    kode, propinsi = pd.factorize(data.dapil_selaras["PROPINSI"].to_numpy(), sort=True)
+    return kode, list(propinsi)
+
+
+def _rincian_pindah(transfer, suara, kode):
+    """Entri (skenario, baris, dari, ke, suara pindah) untuk setiap aturan × baris dalam cakupannya.
+
+    Menolak skenario yang memindahkan lebih dari 100% suara satu partai di satu baris.
+    """
+    cakupan = (transfer["propinsi"][:, None] == -1) | (transfer["propinsi"][:, None] == kode[None, :])
+    e, d = np.nonzero(cakupan)
+    dari = transfer["dari"][e]
+    basis_poin = transfer["basis_poin"][e]
+    skenario = transfer["skenario"][e]
+
+    kunci = (skenario * len(kode) + d) * suara.shape[1] + dari
+    unik, balik = np.unique(kunci, return_inverse=True)
+    if len(unik) and np.bincount(balik, weights=basis_poin).max() > BASIS_POIN:
+        s = int(unik[np.argmax(np.bincount(balik, weights=basis_poin))] // (len(kode) * suara.shape[1]))
+        raise ValueError(f"Skenario ke-{s + 1} memindahkan lebih dari 100% suara satu partai")
+
+    pindah = suara[d, dari] * basis_poin // BASIS_POIN
+    ada = pindah > 0
+    return skenario[ada], d[ada], dari[ada], transfer["ke"][e][ada], pindah[ada]
+
+
+def evaluasi_transfer(data, daftar_skenario, partai_terpilih, ambang_parlemen=None, metode=METODE_ACUAN,
+                      pemecah_seri="urutan"):
+    """Kursi seluruh skenario transfer dibanding kondisi awal (suara 2024).
+
+    Partai peserta pembagian kursi adalah ``partai_terpilih``; bila
+    ``ambang_parlemen`` (persen) diberikan, kelolosan dihitung ulang per
+    skenario dari total suara nasional setelah transfer, dan skenario yang
+    mengubah daftar partai lolos dialokasikan ulang di semua dapil.
+
+    Mengembalikan dict: ``kursi_awal`` (partai), ``selisih`` (skenario ×
+    partai), ``selisih_propinsi`` (skenario × propinsi × partai),
+    ``aktif`` (skenario × partai), serta ``baris_skenario``, ``baris_dapil``
+    (posisi di ``nama_dapil``) dan ``selisih_baris`` untuk baris yang berubah.
+    """
+    baris = np.flatnonzero(data.dapil_lengkap)
+    suara = np.asarray(data.matriks_suara, dtype=np.int64)[baris]
+    alokasi = data.alokasi[baris]
+    kode_semua, propinsi = kode_propinsi(data)
+    kode = kode_semua[baris]
+    n_skenario, n_dapil, n_partai = len(daftar_skenario), len(baris), len(data.partai)
+
+    if ambang_parlemen is None:
+        aktif_awal = np.isin(data.partai, list(partai_terpilih))
+    else:
+        aktif_awal = data.mask_ambang(ambang_parlemen)
+    kursi_awal = kursi_metode(suara, alokasi, metode, partai_aktif=aktif_awal, pemecah_seri=pemecah_seri)
+
+    transfer = kompilasi_transfer(data, daftar_skenario)
+    skenario, d, dari, ke, pindah = _rincian_pindah(transfer, suara, kode)
+
+    aktif = np.broadcast_to(aktif_awal, (n_skenario, n_partai))
+    pasangan = skenario * n_dapil + d
+    if ambang_parlemen is not None:
+        total = np.broadcast_to(data.total_suara_nasional, (n_skenario, n_partai)).copy()
+        np.add.at(total, (skenario, dari), -pindah)
+        np.add.at(total, (skenario, ke), pindah)
+        aktif = total * 100.0 >= float(ambang_parlemen) * total.sum(axis=1, keepdims=True)
+        berubah = np.flatnonzero((aktif != aktif_awal).any(axis=1))
+        pasangan = np.concatenate([pasangan, (berubah[:, None] * n_dapil + np.arange(n_dapil)).ravel()])
+
+    # Hanya baris (skenario, dapil) yang terdampak yang dialokasikan ulang, ditumpuk per blok
+    unik, balik = np.unique(pasangan, return_inverse=True)
+    sk_u, d_u = np.divmod(unik, n_dapil)
+    suara_u = suara[d_u]
+    i = balik[:len(pindah)]
+    np.add.at(suara_u, (i, dari), -pindah)
+    np.add.at(suara_u, (i, ke), pindah)
+    selisih_u = np.empty_like(suara_u)
+    ukuran = max(ELEMEN_BLOK // max(n_partai * int(alokasi.max(initial=1)), 1), 1)
+    for awal in range(0, len(unik), ukuran):
+        blok = slice(awal, awal + ukuran)
+        selisih_u[blok] = kursi_metode(
+            suara_u[blok], alokasi[d_u[blok]], metode, partai_aktif=aktif[sk_u[blok]], pemecah_seri=pemecah_seri,
+        ) - kursi_awal[d_u[blok]]
+
+    selisih = np.zeros((n_skenario, n_partai), dtype=np.int64)
+    np.add.at(selisih, sk_u, selisih_u)
+    selisih_propinsi = np.zeros((n_skenario, len(propinsi), n_partai), dtype=np.int64)
+    dikenal = kode[d_u] >= 0
+    np.add.at(selisih_propinsi, (sk_u[dikenal], kode[d_u][dikenal]), selisih_u[dikenal])
+    return {
+        "partai": list(data.partai),
+        "propinsi": propinsi,
+        "kursi_awal": kursi_awal.sum(axis=0),
+        "selisih": selisih,
+        "selisih_propinsi": selisih_propinsi,
+        "aktif": np.asarray(aktif),
+        "baris_skenario": sk_u,
+        "baris_dapil": baris[d_u],
+        "selisih_baris": selisih_u,
+    }
+
+
+def tabel_transfer(hasil, label):
+    """Tabel panjang kursi nasional per skenario × partai (partai tanpa kursi di kedua kondisi dilewati)."""
+    n_skenario, n_partai = hasil["selisih"].shape
+    kursi_awal = np.tile(hasil["kursi_awal"], n_skenario)
+    selisih = hasil["selisih"].ravel()
+    df = pd.DataFrame({
+        "SKENARIO": np.repeat(np.asarray(label, dtype=object), n_partai),
+        "PARTAI": np.tile(np.asarray(hasil["partai"], dtype=object), n_skenario),
+        "KURSI_AWAL": kursi_awal,
+        "KURSI_SKENARIO": kursi_awal + selisih,
+        "SELISIH": selisih,
+    })
+    return df[(df["KURSI_AWAL"] > 0) | (df["KURSI_SKENARIO"] > 0)].reset_index(drop=True)
+
+
+def data_transfer(data, aturan, partai_terpilih, ambang_parlemen=None, metode=METODE_ACUAN):
+    """``DataPemilu`` turunan untuk satu skenario: suara setelah transfer dan kursi hasil alokasi ulang.
+
+    Dipakai untuk menghitung ulang ``df_all_kriteria`` (SUARA_2024 dan
+    KURSI_2024 menjadi kondisi skenario). Memo per data di ``cache_turunan``.
+    Mengembalikan ``(data_skenario, partai_lolos_skenario)``.
+    """
+    kunci = ("transfer", repr(aturan), tuple(partai_terpilih), ambang_parlemen, metode)
+    hasil = data.cache_turunan.ambil(kunci)
+    if hasil is not None:
+        return hasil
+
+    suara = np.array(data.matriks_suara, dtype=np.int64)
+    kode, _ = kode_propinsi(data)
+    _, d, dari, ke, pindah = _rincian_pindah(kompilasi_transfer(data, [aturan]), suara, kode)
+    np.add.at(suara, (d, dari), -pindah)
+    np.add.at(suara, (d, ke), pindah)
+
+    if ambang_parlemen is None:
+        aktif = np.isin(data.partai, list(partai_terpilih))
+    else:
+        total = suara.sum(axis=0)
+        aktif = total * 100.0 >= float(ambang_parlemen) * total.sum()
+    partai_lolos = [p for p, a in zip(data.partai, aktif) if a]
+
+    baris = np.flatnonzero(data.dapil_lengkap)
+    kursi = kursi_metode(suara[baris], data.alokasi[baris], metode, partai_aktif=aktif)
+    nama = np.asarray(data.nama_dapil, dtype=object)
+    df_suara = pd.DataFrame(suara, columns=data.partai)
+    df_suara.insert(0, "DAPIL", nama)
+    df_kursi = pd.DataFrame(kursi[:, aktif], columns=partai_lolos)
+    df_kursi.insert(0, "DAPIL", nama[baris])
+    data_skenario = DataPemilu(
+        df_suara, df_kursi, data.df_dapil, (data.versi, "transfer", repr(aturan), ambang_parlemen, metode),
+        matriks_suara=suara, tingkat=data.tingkat, partai_lolos=partai_lolos,
+        batas_cache_byte=BATAS_CACHE_SKENARIO_BYTE,
+    )
+    hasil = (data_skenario, partai_lolos)
+    data.cache_turunan.simpan(kunci, hasil)
+    return hasil
@@ -1,28 +1,73 @@
 import streamlit as st
 import pandas as pd
-from pathlib import Path
-from jinja2 import Template
-import tempfile
-import base64
-import re
+import uuid
+
+from kalkulator.ambang import tabel_kerentanan
+from kalkulator.cache_hasil import cache_bersama
+from kalkulator.data import AMBANG_PARLEMEN_BAWAAN, AMBANG_PARLEMEN_MAKS, TINGKAT_BERAMBANG, daftar_tingkat, muat_data
+from kalkulator.instrumen import Perekam, aktifkan
+from kalkulator.kriteria import METODE_TARGET, kriteria_partai
+from kalkulator.laporan import backend_pdf, detail_sl_gabungan, format_ribuan, tabel_detail_sl
+from kalkulator.metode_alokasi import METODE_ACUAN, METODE_ALOKASI, tabel_selisih_metode
+from kalkulator.monte_carlo import monte_carlo_terpilih, parameter_swing_partai, ringkasan_kursi, tabel_swing_partai
+from kalkulator.pipeline import buat_pipeline
+from kalkulator.rab import KOLOM_SP_KURSI, matriks_proporsi, rab_per_kursi, total_rab_per_kursi
+from kalkulator.sainte_lague import AlokatorSainteLague, simulasi_sainte_lague
+from kalkulator.seleksi import METODE_SELEKSI, biaya_dapil, frontier_pareto
+from kalkulator.sensitivitas import LABEL_SUMBU, SUMBU, heatmap, rentang_nilai, tabel_sweep
+from kalkulator.tabel import CSS_TABEL, format_kursi_ke, format_persen, html_tabel, jumlah_halaman, potong_halaman, saring_urutkan
+from kalkulator.transfer_suara import baca_aturan, data_transfer, tabel_transfer
 
 # Konfigurasi halaman
 st.set_page_config(page_title="Kalkulator Kebutuhan Suara Pemilu 2029", layout="wide")
 
-# Load data dari Excel
-file_path = "data_calculated.xlsx"
-df_suara = pd.read_excel(file_path, sheet_name="perolehan_suara")
-df_kursi = pd.read_excel(file_path, sheet_name="hasil_sl")
-df_dapil = pd.read_excel(file_path, sheet_name="dapil")
+# Instrumentasi per rerun (ditampilkan di panel debug & ditulis ke log JSON lines)
+if "id_sesi" not in st.session_state:
+    st.session_state.id_sesi = uuid.uuid4().hex[:12]
+    st.session_state.jumlah_rerun = 0
+st.session_state.jumlah_rerun += 1
+perekam = Perekam(
+    sesi=st.session_state.id_sesi, rerun=st.session_state.jumlah_rerun,
+    lacak_alokasi=st.session_state.get("debug_alokasi", False),
+)
+aktifkan(perekam)
 
-def format_ribuan(x):
-    try:
-        return f"{int(x):,}".replace(",", ".")
-    except:
-        return x
+# Gaya tabel HTML, cukup sekali per rerun
+st.markdown(CSS_TABEL, unsafe_allow_html=True)
 
-# Daftar partai yang lolos
-partai_terpilih = ["PKB", "GERINDRA", "PDIP", "GOLKAR", "NASDEM", "PKS", "PAN", "DEMOKRAT"]
+# Load data dari Excel (di-cache per versi file untuk seluruh sesi)
+file_path = "data_calculated.xlsx"
+tingkat_tersedia = daftar_tingkat(file_path)
+# Pilihan tingkat hanya muncul untuk workbook multi-tingkat (DPR RI / DPRD I / DPRD II)
+tingkat = st.sidebar.selectbox("Tingkat Pemilihan", tingkat_tersedia) if len(tingkat_tersedia) > 1 else None
+data = muat_data(file_path, tingkat)
+df_suara = data.df_suara
+df_kursi = data.df_kursi
+df_dapil = data.df_dapil
+
+# Graf tahap perhitungan per sesi: tahap hanya dihitung ulang bila masukannya berubah.
+# Hasil seleksi/SP/RAB/rangkuman juga dibagi antar-sesi lewat cache bersama.
+if "pipeline" not in st.session_state:
+    st.session_state.pipeline = buat_pipeline(cache=cache_bersama())
+pipeline = st.session_state.pipeline
+pipeline.mulai_rerun()
+
+# Daftar partai yang ikut pembagian kursi di tingkat ini; di tingkat berambang (DPR RI)
+# diturunkan dari total suara nasional terhadap ambang batas parlemen skenario
+ambang_parlemen = None
+if data.tingkat in TINGKAT_BERAMBANG:
+    ambang_parlemen = st.sidebar.number_input(
+        "Ambang Batas Parlemen (%)", min_value=0.0, max_value=AMBANG_PARLEMEN_MAKS, value=AMBANG_PARLEMEN_BAWAAN,
+        step=0.5, key="ambang_parlemen",
+    )
+    partai_terpilih = data.partai_lolos_ambang(ambang_parlemen)
+    if not partai_terpilih:
+        st.warning(f"Tidak ada partai yang lolos ambang batas parlemen {ambang_parlemen:g}%. Turunkan ambang.")
+        st.stop()
+    st.sidebar.caption(f"{len(partai_terpilih)} partai lolos: {', '.join(partai_terpilih)}")
+else:
+    partai_terpilih = list(data.partai_lolos)
+pipeline.atur(data=data, partai_terpilih=partai_terpilih)
 
 # Fungsi total suara & kursi nasional
 def get_total_suara(partai):
@@ -31,31 +76,48 @@ def get_total_suara(partai):
 def get_total_kursi(partai):
     return df_kursi[partai].sum() if partai in df_kursi.columns else 0
 
-# Fungsi Sainte-Lague
-def simulasi_sainte_lague(dapil_nama, alokasi_kursi, df_suara, partai_lolos):
-    alokasi_kursi = int(alokasi_kursi)  # ⬅️ Perbaikan WAJIB
-    baris = df_suara[df_suara["DAPIL"] == dapil_nama]
-    if baris.empty:
-        return [], {}
-    hasil_bagi = []
-    for partai in partai_lolos:
-        try:
-            suara = int(baris[partai].values[0])
-        except (KeyError, ValueError, TypeError):
-            continue  # skip partai tidak valid
-        alokasi_kursi = int(alokasi_kursi)
-        for pembagi in range(1, alokasi_kursi * 2, 2):
-            hasil_bagi.append((partai, suara / pembagi))
-    hasil_bagi.sort(key=lambda x: x[1], reverse=True)
-    alokasi = hasil_bagi[:alokasi_kursi]
-    hasil_akhir = {}
-    for partai, _ in alokasi:
-        hasil_akhir[partai] = hasil_akhir.get(partai, 0) + 1
-    urutan_kursi = [p[0] for p in alokasi]
-    return urutan_kursi, hasil_akhir
+URUTAN_ASLI = "(urutan asli)"
+
+def tampilkan_tabel(df, kunci, format_kolom=None, per_halaman=10, label_berikutnya="Berikutnya →"):
+    """Tabel berhalaman: saring & urutkan di server, lalu format dan kirim hanya halaman aktif."""
+    kunci_halaman = f"{kunci}_halaman"
+    if kunci_halaman not in st.session_state:
+        st.session_state[kunci_halaman] = 1
+
+    def ke_halaman_awal():
+        st.session_state[kunci_halaman] = 1
+
+    def geser(langkah):
+        st.session_state[kunci_halaman] += langkah
+
+    col_cari, col_urut, col_arah = st.columns([3, 2, 1])
+    with col_cari:
+        cari = st.text_input("Cari", key=f"{kunci}_cari", on_change=ke_halaman_awal)
+    with col_urut:
+        kolom_urut = st.selectbox("Urutkan", [URUTAN_ASLI] + list(df.columns), key=f"{kunci}_urut", on_change=ke_halaman_awal)
+    with col_arah:
+        menurun = st.toggle("Menurun", key=f"{kunci}_menurun")
+
+    df_tampil = saring_urutkan(df, cari, None if kolom_urut == URUTAN_ASLI else kolom_urut, menurun)
+    total_halaman = jumlah_halaman(len(df_tampil), per_halaman)
+    halaman = st.session_state[kunci_halaman] = min(st.session_state[kunci_halaman], total_halaman)
+    st.markdown(html_tabel(potong_halaman(df_tampil, halaman, per_halaman, format_kolom)), unsafe_allow_html=True)
+
+    # Tombol navigasi memakai callback agar halaman baru langsung tampil pada rerun yang sama
+    col_prev, _, col_next = st.columns([1, 6, 1])
+    with col_prev:
+        if halaman > 1:
+            st.button("← Sebelumnya", key=f"{kunci}_sebelumnya", on_click=geser, args=(-1,))
+    with col_next:
+        if halaman < total_halaman:
+            st.button(label_berikutnya, key=f"{kunci}_berikutnya", on_click=geser, args=(1,))
+    keterangan = f"Menampilkan halaman ke-{halaman} dari {total_halaman}"
+    if len(df_tampil) < len(df):
+        keterangan += f" ({format_ribuan(len(df_tampil))} dari {format_ribuan(len(df))} baris cocok)"
+    st.caption(keterangan)
 
 def partai_kursi_ke_2_terbawah(dapil_nama, alokasi_kursi):
-    urutan_kursi, _ = simulasi_sainte_lague(dapil_nama, alokasi_kursi, df_suara, partai_terpilih)
+    urutan_kursi, _ = simulasi_sainte_lague(dapil_nama, alokasi_kursi, data.suara_per_dapil, partai_terpilih)
     return urutan_kursi[-2] if len(urutan_kursi) >= 2 else None
 
 # UI - Bagian 1: Data Umum Partai
@@ -63,6 +125,7 @@ st.title("PERHITUNGAN KEBUTUHAN SUARA PEMILU LEGISLATIF 2029")
 st.header("1. Data Umum Partai")
 partai_list = df_suara.columns[1:].tolist()
 selected_party = st.selectbox("Partai", partai_list)
+pipeline.atur(selected_party=selected_party, partai_list=partai_list)
 
 votes_2024 = get_total_suara(selected_party)
 seats_2024 = get_total_kursi(selected_party)
@@ -75,59 +138,10 @@ st.markdown("<br>", unsafe_allow_html=True)  # Spasi vertikal
 # UI - Bagian 2: Sebaran Suara & Kursi per Dapil
 st.header("2. Sebaran Perolehan Suara dan Kursi Tiap Dapil Pemilu 2024")
 
-def get_suara_per_dapil(partai):
-    return df_suara.set_index("DAPIL")[partai].to_dict() if partai in df_suara.columns else {}
-
-def get_kursi_per_dapil(partai):
-    return df_kursi.set_index("DAPIL")[partai].to_dict() if partai in df_kursi.columns else {}
-
-suara_dapil = get_suara_per_dapil(selected_party)
-kursi_dapil = get_kursi_per_dapil(selected_party)
-
-tabel_dapil = df_dapil.copy()
-tabel_dapil["Perolehan Suara"] = tabel_dapil["DAPIL"].map(suara_dapil).fillna(0).astype(int)
-tabel_dapil["Perolehan Kursi"] = tabel_dapil["DAPIL"].map(kursi_dapil).fillna(0).astype(int)
-tabel_dapil["Persentase Perolehan Suara"] = (
-    (tabel_dapil["Perolehan Suara"] / tabel_dapil["TOTAL DPT"]) * 100
-).round(2).astype(str) + " %"
-tabel_dapil["TOTAL DPT"] = tabel_dapil["TOTAL DPT"].apply(lambda x: f"{x:,}".replace(",", "."))
-tabel_dapil["Perolehan Suara"] = tabel_dapil["Perolehan Suara"].apply(lambda x: f"{x:,}".replace(",", "."))
-tabel_dapil["No"] = range(1, len(tabel_dapil) + 1)
-tabel_dapil = tabel_dapil[["No", "DAPIL", "ALOKASI KURSI", "TOTAL DPT", "Perolehan Suara", "Perolehan Kursi", "Persentase Perolehan Suara"]]
-
-# Pagination
-per_page = 10
-if "current_page" not in st.session_state:
-    st.session_state.current_page = 1
-start_idx = (st.session_state.current_page - 1) * per_page
-end_idx = start_idx + per_page
-tabel_page = tabel_dapil.iloc[start_idx:end_idx]
-
-st.markdown("""
-<style>
-.scrollable-table { overflow-x: auto; overflow-y: auto; max-height: 600px; width: 100%; border: 1px solid #333; border-radius: 8px; background-color: rgba(255,255,255,0.02); margin-bottom: 0.5rem; }
-.centered-table { width: 100% !important; table-layout: fixed; font-family: "Segoe UI", "Roboto", sans-serif; border-collapse: collapse; text-align: center; }
-.centered-table th, .centered-table td { text-align: center !important; vertical-align: middle !important; font-size: 14px; white-space: nowrap; padding: 10px 8px; border-bottom: 1px solid #2c2c2c; }
-.centered-table th { background-color: #1f1f1f; color: #ffffff; text-transform: uppercase; }
-.centered-table tr:hover td { background-color: rgba(255,255,255,0.05); }
-</style>
-""", unsafe_allow_html=True)
-
-st.markdown(f'<div class="scrollable-table">{tabel_page.to_html(index=False, classes="centered-table", escape=False)}</div>', unsafe_allow_html=True)
-# Navigasi setelah tabel sebaran dapil
-col_prev, col_center, col_next = st.columns([1, 6, 1])
-
-with col_prev:
-    if st.session_state.current_page > 1:
-        if st.button("← Sebelumnya", key="prev_page"):
-            st.session_state.current_page -= 1
-
-with col_next:
-    if st.session_state.current_page < (len(tabel_dapil) - 1) // per_page + 1:
-        if st.button("Berikutnya →", key="next_page"):
-            st.session_state.current_page += 1
-
-st.caption(f"Menampilkan halaman ke-{st.session_state.current_page} dari {(len(tabel_dapil) - 1) // per_page + 1}")
+tabel_dapil = pipeline.hasil("dapil")
+tampilkan_tabel(tabel_dapil, "sebaran", format_kolom={
+    "TOTAL DPT": format_ribuan, "Perolehan Suara": format_ribuan, "Persentase Perolehan Suara": format_persen,
+})
 
 st.markdown("<br>", unsafe_allow_html=True)  # Spasi vertikal
 
@@ -157,283 +171,57 @@ with st.expander("Faktor Pengurang dan Target Suara", expanded=False):
     with col3:
         target_suara_2029 = st.number_input("Proporsi Target Suara 2029 (%)", min_value=0.0, max_value=200.0, step=1.0, format="%.2f")
 
-kriteria1_dapil = []
-
-for dapil in df_suara["DAPIL"].tolist():
-    alokasi_row = df_dapil[df_dapil["DAPIL"] == dapil]
-    if alokasi_row.empty:
-        continue
-
-    alokasi = int(alokasi_row["ALOKASI KURSI"].values[0])
-    kursi_partai = df_kursi[df_kursi["DAPIL"] == dapil]
-    suara_partai = df_suara[df_suara["DAPIL"] == dapil]
-
-    if kursi_partai.empty or suara_partai.empty:
-        continue
-
-    kursi = int(kursi_partai.get(selected_party, pd.Series([0])).values[0])
-    suara = int(suara_partai.get(selected_party, pd.Series([0])).values[0])
-
-    if kursi != 0:
-        continue  # hanya ambil dapil dengan perolehan kursi = 0
-
-    # Jalankan simulasi Sainte-Laguë
-    partai_lolos = partai_terpilih.copy()
-    if selected_party not in partai_lolos:
-        partai_lolos.append(selected_party)
-
-    urutan_kursi, _ = simulasi_sainte_lague(dapil, alokasi, df_suara, partai_lolos)
-
-    if len(urutan_kursi) < 2:
-        continue
-
-    partai_k2 = urutan_kursi[-2]  # kursi ke-2 terakhir
-    suara_k2 = int(suara_partai[partai_k2].values[0])
-
-    total_target_suara = int(suara_k2 * 1.1)  # naik 10%
-
-    kriteria1_dapil.append({
-        "DAPIL": dapil,
-        "PARTAI": selected_party,
-        "ALOKASI_KURSI": alokasi,
-        "SUARA_2024": suara,
-        "KURSI_2024": kursi,
-        "TARGET_TAMBAHAN_KURSI": 1,
-        "PARTAI_K2_TERENDAH": partai_k2,
-        "SUARA_K2": suara_k2,
-        "TOTAL_TARGET_SUARA_2029": total_target_suara
-    })
-
-# Konversi ke DataFrame
-df_kriteria1 = pd.DataFrame(kriteria1_dapil)
-
-# Kriteria 2: Kursi = 1 & Kursi ke-2 terbawah adalah PAN/DEMOKRAT
-kriteria2_dapil = []
-
-for dapil in df_suara["DAPIL"].tolist():
-    alokasi_row = df_dapil[df_dapil["DAPIL"] == dapil]
-    if alokasi_row.empty:
-        continue
-
-    alokasi = int(alokasi_row["ALOKASI KURSI"].values[0])
-    kursi_partai = df_kursi[df_kursi["DAPIL"] == dapil]
-    suara_partai = df_suara[df_suara["DAPIL"] == dapil]
-
-    if kursi_partai.empty or suara_partai.empty:
-        continue
-
-    kursi = int(kursi_partai.get(selected_party, pd.Series([0])).values[0])
-    suara = int(suara_partai.get(selected_party, pd.Series([0])).values[0])
-
-    if kursi != 1:
-        continue
-
-    urutan_kursi, _ = simulasi_sainte_lague(dapil, alokasi, df_suara, partai_terpilih)
-    if len(urutan_kursi) < 2:
-        continue
-
-    partai_k2 = urutan_kursi[-2]
-    if partai_k2 not in ["PAN", "DEMOKRAT"]:
-        continue
+metode_target = st.radio(
+    "Metode Target Suara", list(METODE_TARGET), format_func=METODE_TARGET.get, horizontal=True,
+    help="Ambang eksak menghitung suara minimum untuk meraih target kursi tambahan, dengan suara partai lain tetap."
+)
 
-    suara_k2 = int(suara_partai[partai_k2].values[0])
-    total_target_suara = int(suara_k2 * 3 * 1.1)
+# 1. Klasifikasi Kriteria 1–4: tabel skenario seluruh partai dihitung sekali per
+# versi data, lalu dipotong untuk partai yang dipilih
+pipeline.atur(metode_target=metode_target)
+df_all_kriteria = pipeline.hasil("kriteria")
+
+# 2. Seleksi Dapil Sesuai Target Kursi (urutan target suara, atau biaya minimum
+# lewat knapsack). Angka psikologis & biaya diambil dari input Bagian 4.
+proporsi = matriks_proporsi(kursi_input)
+parameter_biaya = dict(
+    kehilangan_2024=kehilangan_2024, kehilangan_sp=kehilangan_sp, proporsi=proporsi,
+    angka_psikologis=st.session_state.get("angka_psikologis", 0),
+    biaya_manajemen=st.session_state.get("biaya_manajemen", 0),
+    biaya_pendampingan=st.session_state.get("biaya_pendampingan", 0),
+)
+metode_seleksi = st.radio(
+    "Metode Seleksi Dapil", list(METODE_SELEKSI), format_func=METODE_SELEKSI.get, horizontal=True,
+    help="Metode biaya minimum memilih kombinasi dapil termurah (eksak) yang mencapai target kursi."
+)
 
-    # REVISI TARGET TAMBAHAN KURSI
-    if alokasi <= 4:
-        target_kursi = 1
-    else:
-        target_kursi = 1 + kursi
-
-    kriteria2_dapil.append({
-        "DAPIL": dapil,
-        "PARTAI": selected_party,
-        "ALOKASI_KURSI": alokasi,
-        "SUARA_2024": suara,
-        "KURSI_2024": kursi,
-        "TARGET_TAMBAHAN_KURSI": target_kursi,
-        "PARTAI_K2_TERENDAH": partai_k2,
-        "SUARA_K2": suara_k2,
-        "TOTAL_TARGET_SUARA_2029": total_target_suara
-    })
-
-df_kriteria2 = pd.DataFrame(kriteria2_dapil)
-
-# Kriteria 3: Kursi = 1 (umum)
-kriteria3_dapil = []
-
-for dapil in df_suara["DAPIL"].tolist():
-    alokasi_row = df_dapil[df_dapil["DAPIL"] == dapil]
-    if alokasi_row.empty:
-        continue
-
-    alokasi = int(alokasi_row["ALOKASI KURSI"].values[0])
-    kursi_partai = df_kursi[df_kursi["DAPIL"] == dapil]
-    suara_partai = df_suara[df_suara["DAPIL"] == dapil]
-
-    if kursi_partai.empty or suara_partai.empty:
-        continue
-
-    kursi = int(kursi_partai.get(selected_party, pd.Series([0])).values[0])
-    suara = int(suara_partai.get(selected_party, pd.Series([0])).values[0])
-
-    if kursi != 1:
-        continue
-
-    urutan_kursi, _ = simulasi_sainte_lague(dapil, alokasi, df_suara, partai_terpilih)
-    if len(urutan_kursi) < 2:
-        continue
-
-    partai_k2 = urutan_kursi[-2]
-    suara_k2 = int(suara_partai[partai_k2].values[0])
-    total_target_suara = int(suara_k2 * 3 * 1.1)
-
-    # REVISI TARGET TAMBAHAN KURSI
-    if alokasi <= 4:
-        target_kursi = 1
-    else:
-        target_kursi = 1 + kursi
-
-    kriteria3_dapil.append({
-        "DAPIL": dapil,
-        "PARTAI": selected_party,
-        "ALOKASI_KURSI": alokasi,
-        "SUARA_2024": suara,
-        "KURSI_2024": kursi,
-        "TARGET_TAMBAHAN_KURSI": target_kursi,
-        "PARTAI_K2_TERENDAH": partai_k2,
-        "SUARA_K2": suara_k2,
-        "TOTAL_TARGET_SUARA_2029": total_target_suara
-    })
-
-df_kriteria3 = pd.DataFrame(kriteria3_dapil)
-
-# Bagian kalkulasi untuk Kriteria 4: Kursi > 1 (Target Kursi 2029 = Kursi 2024)
-kriteria4_dapil = []
-
-for dapil in df_suara["DAPIL"].tolist():
-    alokasi_row = df_dapil[df_dapil["DAPIL"] == dapil]
-    if alokasi_row.empty:
-        continue
-
-    alokasi = int(alokasi_row["ALOKASI KURSI"].values[0])
-    kursi_partai = df_kursi[df_kursi["DAPIL"] == dapil]
-    suara_partai = df_suara[df_suara["DAPIL"] == dapil]
-
-    if kursi_partai.empty or suara_partai.empty:
-        continue
-
-    kursi = int(kursi_partai.get(selected_party, pd.Series([0])).values[0])
-    suara = int(suara_partai.get(selected_party, pd.Series([0])).values[0])
-
-    if kursi <= 1:
-        continue  # hanya untuk dapil dengan kursi > 1
-
-    # Ambil partai ke-2 terakhir dari simulasi Sainte-Laguë
-    urutan_kursi, _ = simulasi_sainte_lague(dapil, alokasi, df_suara, partai_terpilih)
-    if len(urutan_kursi) < 2:
-        continue
-
-    partai_k2 = urutan_kursi[-2]
-    suara_k2 = int(suara_partai[partai_k2].values[0])
-    total_target_suara = int(suara_k2 * 3 * 1.1)
-
-    kriteria4_dapil.append({
-        "DAPIL": dapil,
-        "PARTAI": selected_party,
-        "ALOKASI_KURSI": alokasi,
-        "SUARA_2024": suara,
-        "KURSI_2024": kursi,
-        "TARGET_TAMBAHAN_KURSI": kursi,  # Target sama dengan jumlah kursi 2024
-        "PARTAI_K2_TERENDAH": partai_k2,
-        "SUARA_K2": suara_k2,
-        "TOTAL_TARGET_SUARA_2029": total_target_suara
-    })
-
-df_kriteria4 = pd.DataFrame(kriteria4_dapil)
-df_kriteria4["KRITERIA"] = 4
-
-# 1. Gabungkan seluruh df_kriteria1, df_kriteria2, df_kriteria3, df_kriteria4
-for df_k, k in zip([df_kriteria1, df_kriteria2, df_kriteria3, df_kriteria4], [1, 2, 3, 4]):
-    df_k["KRITERIA"] = k
-
-# Gabungkan dan urutkan
-df_all_kriteria = pd.concat([df_kriteria1, df_kriteria2, df_kriteria3, df_kriteria4], ignore_index=True)
-df_all_kriteria = df_all_kriteria.sort_values(by="TOTAL_TARGET_SUARA_2029", ascending=True)
-
-# Hapus duplikat berdasarkan DAPIL → prioritas kriteria terendah
-df_all_kriteria = df_all_kriteria.drop_duplicates(subset=["DAPIL"], keep="first")
-
-# 2. Seleksi Dapil Sesuai Target Kursi
-selected_rows = []
-total_kursi = 0
-for _, row in df_all_kriteria.iterrows():
-    if total_kursi >= target_kursi_2029:
-        break
-    selected_rows.append(row.to_dict())  # ✅ Penting agar semua kolom terbawa
-    total_kursi += row["TARGET_TAMBAHAN_KURSI"]
-
-# 3. Bentuk df_terpilih dari selected_rows
-df_terpilih = pd.DataFrame(selected_rows).reset_index(drop=True)
+# 3. Bentuk df_terpilih dari dapil terpilih (parameter biaya hanya relevan untuk
+# metode biaya minimum, agar metode urutan tidak dihitung ulang saat RAB berubah)
+pipeline.atur(
+    target_kursi_2029=target_kursi_2029, metode_seleksi=metode_seleksi,
+    parameter_seleksi={} if metode_seleksi == "urutan" else parameter_biaya,
+)
+df_terpilih = pipeline.hasil("seleksi")
+if metode_seleksi != "urutan":
+    with st.expander("Frontier Kursi vs Biaya", expanded=False):
+        df_frontier = frontier_pareto(df_all_kriteria, *biaya_dapil(df_all_kriteria, metode_seleksi, **parameter_biaya))
+        df_frontier_tampil = df_frontier.copy()
+        df_frontier_tampil["TOTAL_BIAYA"] = df_frontier_tampil["TOTAL_BIAYA"].apply(format_ribuan)
+        st.dataframe(df_frontier_tampil, use_container_width=True, hide_index=True)
 
 # 4. Validasi kolom
-if "TOTAL_TARGET_SUARA_2029" not in df_terpilih.columns:
+if df_terpilih.empty:
     st.error("SILAHKAN ISI TOTAL TARGET PEROLEHAN KURSI PEMILU 2029 TERLEBIH DAHULU")
+    perekam.tutup()
     st.stop()
 
 # ============================
 # Perhitungan SP & SP per Kursi
 # ============================
 
-# Pastikan TARGET_KEBUTUHAN sudah dihitung sebelumnya
-df_terpilih["TARGET_KEBUTUHAN"] = df_terpilih["TOTAL_TARGET_SUARA_2029"]
-
-# Hitung SUARA TAMBAHAN
-def hitung_suara_tambahan(row):
-    if row["TARGET_TAMBAHAN_KURSI"] == 0:
-        return 0
-    elif row["TARGET_KEBUTUHAN"] < row["SUARA_2024"]:
-        return 0
-    return row["TARGET_KEBUTUHAN"] - row["SUARA_2024"]
-
-df_terpilih["SUARA_TAMBAHAN"] = df_terpilih.apply(hitung_suara_tambahan, axis=1)
-
-# Hitung TOTAL SUARA TAMBAHAN
-def hitung_total_suara_tambahan(row):
-    if row["SUARA_TAMBAHAN"] == 0:
-        return 0
-    return row["SUARA_TAMBAHAN"] + (row["SUARA_2024"] * (kehilangan_2024 / 100))
-
-df_terpilih["TOTAL_SUARA_TAMBAHAN"] = df_terpilih.apply(hitung_total_suara_tambahan, axis=1)
-
-# Hitung SP
-def hitung_sp(row):
-    if row["TOTAL_SUARA_TAMBAHAN"] == 0:
-        return 0
-    return row["TOTAL_SUARA_TAMBAHAN"] * (1 + kehilangan_sp / 100)
-
-df_terpilih["SP"] = df_terpilih.apply(hitung_sp, axis=1)
-
-# SP per Kursi
-for i in range(1, 5):
-    df_terpilih[f"SP_KURSI_{i}"] = 0.0
-
-def hitung_sp_per_kursi(row):
-    jumlah_kursi = int(row["TARGET_TAMBAHAN_KURSI"])
-    total_sp = row["SP"]
-    hasil = [0.0, 0.0, 0.0, 0.0]
-
-    if jumlah_kursi == 1:
-        hasil[0] = total_sp
-    elif jumlah_kursi in [2, 3, 4]:
-        for i in range(jumlah_kursi):
-            proporsi_key = f"proporsi_{jumlah_kursi}_{i+1}"
-            proporsi = kursi_input.get(proporsi_key, 0)
-            hasil[i] = (total_sp / jumlah_kursi) * (proporsi / 100)
-    return pd.Series(hasil)
-
-sp_result = df_terpilih.apply(hitung_sp_per_kursi, axis=1)
-df_terpilih[["SP_KURSI_1", "SP_KURSI_2", "SP_KURSI_3", "SP_KURSI_4"]] = sp_result
+# SUARA TAMBAHAN, TOTAL SUARA TAMBAHAN, SP dan SP per Kursi (operasi kolom)
+pipeline.atur(kehilangan_2024=kehilangan_2024, kehilangan_sp=kehilangan_sp, proporsi=proporsi)
+df_terpilih = pipeline.hasil("sp")
 
 st.markdown("<br>", unsafe_allow_html=True)  # Spasi vertikal
 
@@ -448,6 +236,8 @@ total_dapil = len(df_terpilih)
 if total_dapil == 0:
     st.warning("Tidak ada dapil yang memenuhi kriteria atau target kursi.")
 else:
+    # Jumlah dapil bisa berkurang saat target atau metode seleksi berubah
+    st.session_state.dapil_page = min(st.session_state.dapil_page, total_dapil - 1)
     dapil = df_terpilih.iloc[st.session_state.dapil_page]
 
     st.markdown(f"### DAPIL: **{dapil['DAPIL']}**")
@@ -483,92 +273,34 @@ else:
     for col in df_single.columns:
         df_single[col] = df_single[col].apply(lambda x: f"{int(x):,}".replace(",", ".") if x > 0 else "0")
 
-    st.markdown("""
-    <style>
-    .scrollable-table {
-        overflow-x: auto;
-        overflow-y: auto;
-        max-height: 600px;
-        width: 100%;
-        border: 1px solid #333;
-        border-radius: 8px;
-        background-color: rgba(255,255,255,0.02);
-        margin-bottom: 0.5rem;
-    }
-    .centered-table {
-        width: 100% !important;
-        table-layout: fixed;
-        font-family: "Segoe UI", "Roboto", sans-serif;
-        border-collapse: collapse;
-        text-align: center;
-    }
-    .centered-table th, .centered-table td {
-        text-align: center !important;
-        vertical-align: middle !important;
-        font-size: 14px;
-        white-space: nowrap;
-        padding: 10px 8px;
-        border-bottom: 1px solid #2c2c2c;
-    }
-    .centered-table th {
-        background-color: #1f1f1f;
-        color: #ffffff;
-        text-transform: uppercase;
-    }
-    .centered-table tr:hover td {
-        background-color: rgba(255,255,255,0.05);
-    }
-    </style>
-    """, unsafe_allow_html=True)
 
-    st.markdown(
-        f'<div class="scrollable-table">{df_single.to_html(index=False, classes="centered-table", escape=False)}</div>',
-        unsafe_allow_html=True
-    )
+    st.markdown(html_tabel(df_single), unsafe_allow_html=True)
 
     # Input angka psikologis
-    angka_psikologis = st.number_input("Angka Psikologis", min_value=0, value=0, step=1000, format="%d")
+    angka_psikologis = st.number_input("Angka Psikologis", min_value=0, value=0, step=1000, format="%d", key="angka_psikologis")
 
     # Hitung RAB SP per kursi
-    rab_sp_kursi = []
-    for i in range(1, 5):
-        sp = dapil.get(f"SP_KURSI_{i}", 0)
-        rab = int(sp * angka_psikologis)
-        rab_sp_kursi.append(rab)
+    sp_kursi = [dapil.get(kolom, 0) for kolom in KOLOM_SP_KURSI]
+    rab_sp_kursi = rab_per_kursi(sp_kursi, angka_psikologis)
 
     df_rab = pd.DataFrame([rab_sp_kursi], columns=["RAB Kursi 1", "RAB Kursi 2", "RAB Kursi 3", "RAB Kursi 4"])
     for col in df_rab.columns:
         df_rab[col] = df_rab[col].apply(lambda x: f"{x:,}".replace(",", "."))
 
     st.markdown("#### Tabel RAB SP per Kursi")
-    st.markdown(
-        f'<div class="scrollable-table">{df_rab.to_html(index=False, classes="centered-table", escape=False)}</div>',
-        unsafe_allow_html=True
-    )
+    st.markdown(html_tabel(df_rab), unsafe_allow_html=True)
 
     # Input Manajemen dan Pendampingan
     col_mgmt, col_pdmp = st.columns(2)
     with col_mgmt:
-        biaya_manajemen = st.number_input("Biaya Manajemen", min_value=0, value=0, step=100000, format="%d")
+        biaya_manajemen = st.number_input("Biaya Manajemen", min_value=0, value=0, step=100000, format="%d", key="biaya_manajemen")
     with col_pdmp:
-        biaya_pendampingan = st.number_input("Biaya Pendampingan", min_value=0, value=0, step=100000, format="%d")
+        biaya_pendampingan = st.number_input("Biaya Pendampingan", min_value=0, value=0, step=100000, format="%d", key="biaya_pendampingan")
 
     # Hitung total RAB per kursi hanya jika SP tidak nol
-    try:
-        rab_numerik = [int(str(r).replace(".", "")) for r in df_rab.iloc[0]]
-    except Exception as e:
-        st.error(f"Gagal menghitung RAB: {e}")
-        rab_numerik = [0, 0, 0, 0]
-
-    total_rab_kursi = [rab + biaya_manajemen + biaya_pendampingan if rab > 0 else 0 for rab in rab_numerik]
+    total_rab_kursi = total_rab_per_kursi(rab_sp_kursi, biaya_manajemen, biaya_pendampingan)
     total_rab_all = sum(total_rab_kursi)
 
-    # Simpan ke df_terpilih agar bisa direkap di bagian Rangkuman
-    if "TOTAL_RAB" not in df_terpilih.columns:
-        df_terpilih["TOTAL_RAB"] = 0  # inisialisasi kolom jika belum ada
-
-    df_terpilih.at[st.session_state.dapil_page, "TOTAL_RAB"] = total_rab_all
-
     # Tampilkan tabel
     df_total_rab = pd.DataFrame(
         [total_rab_kursi + [total_rab_all]],
@@ -579,10 +311,7 @@ else:
         df_total_rab[col] = df_total_rab[col].apply(lambda x: f"{int(x):,}".replace(",", "."))
 
     st.markdown("#### Total RAB (SP + Manajemen + Pendampingan)")
-    st.markdown(
-        f'<div class="scrollable-table">{df_total_rab.to_html(index=False, classes="centered-table", escape=False)}</div>',
-        unsafe_allow_html=True
-    )
+    st.markdown(html_tabel(df_total_rab), unsafe_allow_html=True)
 
     # Navigasi
     col_prev, _, col_next = st.columns([1, 8, 1])
@@ -597,47 +326,37 @@ else:
 
     st.caption(f"Menampilkan dapil ke-{st.session_state.dapil_page + 1} dari {total_dapil}")
 
-# Pop-up hasil Sainte-Laguë di UI Dapil (dalam expander per dapil)
-urutan_kursi, hasil_akhir = simulasi_sainte_lague(dapil['DAPIL'], dapil['ALOKASI_KURSI'], df_suara, partai_terpilih)
-
-if urutan_kursi:
-    hasil_sl_detail = []
-    baris = df_suara[df_suara["DAPIL"] == dapil["DAPIL"]]
-    alokasi = dapil["ALOKASI_KURSI"]
-
-    for partai in partai_terpilih:
-        suara = int(baris[partai].values[0])
-        alokasi = int(alokasi)
-        for pembagi in range(1, alokasi * 2, 2):
-            hasil_sl_detail.append({
-                "Partai": partai,
-                "Suara": suara,
-                "Pembagi": pembagi,
-                "Hasil Bagi": suara / pembagi
-            })
-
-    # Sort dan ambil kursi terbanyak
-    df_sl = pd.DataFrame(hasil_sl_detail).sort_values(by="Hasil Bagi", ascending=False).reset_index(drop=True)
-    df_sl["DAPIL"] = dapil["DAPIL"]
-    df_sl["ALOKASI KURSI"] = alokasi
-
-    # Tambahkan nomor kursi ke- untuk alokasi terbanyak
-    df_sl["KURSI KE-"] = ""
-    for i in range(min(alokasi, len(df_sl))):
-        df_sl.at[i, "KURSI KE-"] = i + 1
-
-    df_sl = df_sl[["DAPIL", "ALOKASI KURSI", "KURSI KE-", "Partai", "Suara", "Pembagi"]]
-
-    # Format angka
-    df_sl["Suara"] = df_sl["Suara"].apply(lambda x: f"{x:,}".replace(",", "."))
-    df_sl["Pembagi"] = df_sl["Pembagi"].astype(int)
-
-    with st.expander("Lihat Detail Hasil Sainte-Laguë"):
-        st.markdown("##### Tabel Pembagian Kursi Berdasarkan Metode Sainte-Laguë")
-        st.markdown(
-            f'<div class="scrollable-table">{df_sl.to_html(index=False, classes="centered-table", escape=False)}</div>',
-            unsafe_allow_html=True
-        )
+# Detail hasil Sainte-Laguë: tabel hasil bagi hanya dibangun (dan dimemo per dapil)
+# bila tampilan detail dibuka
+if st.toggle("Lihat Detail Hasil Sainte-Laguë", key="detail_sl"):
+    format_sl = {"KURSI KE-": format_kursi_ke, "Suara": format_ribuan}
+    if st.checkbox("Tampilkan semua dapil dalam satu halaman", key="detail_sl_semua"):
+        df_sl = detail_sl_gabungan(data, df_terpilih["DAPIL"].tolist(), df_terpilih["ALOKASI_KURSI"].tolist(), partai_terpilih)
+        if df_sl is not None:
+            st.markdown("##### Tabel Pembagian Kursi Berdasarkan Metode Sainte-Laguë (Semua Dapil)")
+            tampilkan_tabel(df_sl, "sl_semua", format_kolom=format_sl, per_halaman=50)
+    else:
+        df_sl = tabel_detail_sl(data, [dapil["DAPIL"]], [dapil["ALOKASI_KURSI"]], partai_terpilih)[0]
+        if df_sl is not None:
+            alokasi = int(dapil["ALOKASI_KURSI"])
+            st.markdown("##### Tabel Pembagian Kursi Berdasarkan Metode Sainte-Laguë")
+            tampilkan_tabel(df_sl, "sl_dapil", format_kolom=format_sl, per_halaman=50)
+
+            # Kursi berikutnya & tambahan suara eksak dari hasil bagi marjinal
+            baris = df_suara.iloc[[data.baris_dapil(dapil["DAPIL"])]]
+            partai_sl = partai_terpilih if selected_party in partai_terpilih else partai_terpilih + [selected_party]
+            alokator = AlokatorSainteLague([int(baris[p].fillna(0).values[0]) for p in partai_sl], partai_sl)
+            alokator.alokasikan(alokasi)
+            info = alokator.kursi_berikutnya()
+            if info:
+                st.caption(
+                    f"Kursi ke-{alokasi + 1} berikutnya jatuh ke {info['partai']} "
+                    f"(hasil bagi {format_ribuan(info['hasil_bagi'])}, runner-up {info['runner_up']} "
+                    f"{format_ribuan(info['hasil_bagi_runner_up'])})"
+                )
+            tambahan = alokator.suara_untuk_kursi_tambahan(selected_party)
+            if tambahan is not None:
+                st.caption(f"Tambahan suara minimum {selected_party} untuk +1 kursi di dapil ini: {format_ribuan(tambahan)}")
 
 st.markdown("<br>", unsafe_allow_html=True)  # Spasi vertikal
 st.markdown("<br>", unsafe_allow_html=True)  # Spasi vertikal
@@ -645,41 +364,14 @@ st.markdown("<br>", unsafe_allow_html=True)  # Spasi vertikal
 # === PART 5: RANGKUMAN PERHITUNGAN AKHIR ===
 st.header("5. Rangkuman Hasil Akhir Kalkulasi")
 
-# === Hitung TOTAL RAB untuk semua DAPIL (gunakan apply, bukan loop) ===
-
-def hitung_total_rab(row):
-    total = 0
-    for i in range(1, 5):
-        sp = row.get(f"SP_KURSI_{i}", 0)
-        if sp > 0:
-            rab = sp * angka_psikologis + biaya_manajemen + biaya_pendampingan
-            total += rab
-    return total
-
-df_terpilih["TOTAL_RAB"] = df_terpilih.apply(hitung_total_rab, axis=1)
-
-# Siapkan data untuk tabel rangkuman dapil potensial
-df_summary_display = df_terpilih[[
-    "DAPIL", "ALOKASI_KURSI", "SUARA_2024", "KURSI_2024",
-    "TARGET_TAMBAHAN_KURSI", "TOTAL_TARGET_SUARA_2029", "TOTAL_RAB"
-]].copy()
-
-df_summary_display.columns = [
-    "DAPIL", "Alokasi Kursi", "Suara 2024", "Kursi 2024",
-    "Target Kursi 2029", "Target Suara 2029", "Total RAB"
-]
-
-# Format angka
-for col in ["Suara 2024", "Target Suara 2029", "Total RAB"]:
-    df_summary_display[col] = df_summary_display[col].apply(lambda x: f"{int(x):,}".replace(",", "."))
-
-# Tambahkan kolom bantu numerik untuk akumulasi RAB
-df_summary_display["TOTAL_RAB_INT"] = df_summary_display["Total RAB"].str.replace(".", "", regex=False).astype(int)
-
-# Hitung ringkasan total
-total_suara_2029 = df_terpilih['TOTAL_TARGET_SUARA_2029'].sum()
-total_kursi_2029 = df_terpilih['TARGET_TAMBAHAN_KURSI'].sum()
-total_rab = df_summary_display["TOTAL_RAB_INT"].sum()
+# === Hitung TOTAL RAB untuk semua DAPIL & tabel rangkuman (tahap RAB → rangkuman) ===
+pipeline.atur(angka_psikologis=angka_psikologis, biaya_manajemen=biaya_manajemen, biaya_pendampingan=biaya_pendampingan)
+df_terpilih = pipeline.hasil("rab")
+rangkuman = pipeline.hasil("rangkuman")
+df_summary_display = rangkuman["tabel"]
+total_suara_2029 = rangkuman["total_suara_2029"]
+total_kursi_2029 = rangkuman["total_kursi_2029"]
+total_rab = rangkuman["total_rab"]
 
 # Tampilkan metrik utama
 col1, col2, col3 = st.columns(3)
@@ -693,179 +385,11 @@ with col3:
 st.markdown("---")
 st.subheader("Tabel Rangkuman Persebaran Dapil Potensial")
 
-# Pagination
-per_page = 10
-total_pages = (len(df_summary_display) - 1) // per_page + 1
-if "summary_page" not in st.session_state:
-    st.session_state.summary_page = 1
-start_idx = (st.session_state.summary_page - 1) * per_page
-end_idx = start_idx + per_page
-df_page = df_summary_display.iloc[start_idx:end_idx].drop(columns=["TOTAL_RAB_INT"])
-
-# Tabel HTML + CSS
-st.markdown("""
-<style>
-.scrollable-table { overflow-x: auto; overflow-y: auto; max-height: 600px; width: 100%; border: 1px solid #333; border-radius: 8px; background-color: rgba(255,255,255,0.02); margin-bottom: 0.5rem; }
-.centered-table { width: 100% !important; table-layout: fixed; font-family: "Segoe UI", "Roboto", sans-serif; border-collapse: collapse; text-align: center; }
-.centered-table th, .centered-table td { text-align: center !important; vertical-align: middle !important; font-size: 14px; white-space: nowrap; padding: 10px 8px; border-bottom: 1px solid #2c2c2c; }
-.centered-table th { background-color: #1f1f1f; color: #ffffff; text-transform: uppercase; }
-.centered-table tr:hover td { background-color: rgba(255,255,255,0.05); }
-</style>
-""", unsafe_allow_html=True)
-
-st.markdown(
-    f'<div class="scrollable-table">{df_page.to_html(index=False, classes="centered-table", escape=False)}</div>',
-    unsafe_allow_html=True
-)
+tampilkan_tabel(df_summary_display, "rangkuman", format_kolom={
+    "Suara 2024": format_ribuan, "Target Suara 2029": format_ribuan, "Total RAB": format_ribuan,
+}, label_berikutnya="Selanjutnya →")
 
-# Navigasi bawah tabel
-col_prev, col_mid, col_next = st.columns([1, 6, 1])
-with col_prev:
-    if st.session_state.summary_page > 1:
-        if st.button("← Sebelumnya", key="summary_prev"):
-            st.session_state.summary_page -= 1
-with col_next:
-    if st.session_state.summary_page < total_pages:
-        if st.button("Selanjutnya →", key="summary_next"):
-            st.session_state.summary_page += 1
-
-
-# Konversi angka romawi ke integer
-def roman_to_int(roman):
-    roman_dict = {
-        "I": 1, "II": 2, "III": 3, "IV": 4, "V": 5,
-        "VI": 6, "VII": 7, "VIII": 8, "IX": 9, "X": 10,
-        "XI": 11, "XII": 12, "XIII": 13, "XIV": 14, "XV": 15,
-        "XVI": 16, "XVII": 17, "XVIII": 18, "XIX": 19, "XX": 20
-    }
-    return roman_dict.get(roman.strip().upper(), 0)
-
-def extract_roman_order(dapil_name):
-    match = re.search(r"(I{1,3}|IV|V|VI{0,3}|IX|X|XI{0,3}|XIV|XV|XVI|XVII|XVIII|XIX|XX)$", dapil_name.strip(), re.IGNORECASE)
-    if match:
-        return roman_to_int(match.group())
-    return 0
-
-def export_to_html(df_terpilih, df_dapil, selected_party, votes_2024, seats_2024):
-    df = df_terpilih.copy()
-
-    # Format dan persiapan kolom
-    df["Total RAB"] = df["TOTAL_RAB"].fillna(0).apply(format_ribuan)
-    df["Target Suara 2029"] = df["TOTAL_TARGET_SUARA_2029"].fillna(0).apply(format_ribuan)
-    df["Suara 2024"] = df["SUARA_2024"].fillna(0).apply(format_ribuan)
-    df["Target Kursi 2029"] = df["TARGET_TAMBAHAN_KURSI"].fillna(0).astype(int)
-
-    # Gabungkan kolom bantu dari df_dapil (untuk ambil PROPINSI dan GUGUSAN)
-    df = df.merge(df_dapil[["DAPIL", "PROPINSI"]], on="DAPIL", how="left")
-    df["ROMAWI_ORDER"] = df["DAPIL"].apply(extract_roman_order)
-
-    grouped = df.groupby("PROPINSI")
-
-    total_suara = format_ribuan(df["TOTAL_TARGET_SUARA_2029"].sum())
-    total_kursi = int(df["TARGET_TAMBAHAN_KURSI"].sum())
-    total_rab = format_ribuan(df["TOTAL_RAB"].sum())
-    suara_2024 = format_ribuan(votes_2024)
-    kursi_2024 = format_ribuan(seats_2024)
-
-    rows_html = ""
-    for propinsi, sub_df in grouped:
-        sorted_df = sub_df.sort_values(by="ROMAWI_ORDER")
-        rows_html += f"<tr><th colspan='7' class='propinsi-header'>{propinsi}</th></tr>"
-        for _, row in sorted_df.iterrows():
-            rows_html += f"""
-            <tr>
-                <td>{row['DAPIL']}</td>
-                <td>{row['ALOKASI_KURSI']}</td>
-                <td>{row['KURSI_2024']}</td>
-                <td>{row['Target Kursi 2029']}</td>
-                <td style='text-align:right'>{row['Suara 2024']}</td>
-                <td style='text-align:right'>{row['Target Suara 2029']}</td>
-                <td style='text-align:right'>{row['Total RAB']}</td>
-            </tr>
-            """
-
-    html_template = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>Rangkuman Kalkulasi Pemilu 2029</title>
-        <style>
-            body {{
-                font-family: 'Segoe UI', sans-serif;
-                padding: 40px;
-                color: #222;
-                background-color: #fff;
-            }}
-            h1 {{
-                font-size: 24px;
-                color: #0b3d91;
-            }}
-            .info-box {{
-                margin-bottom: 20px;
-                font-size: 16px;
-            }}
-            .info-box strong {{
-                display: inline-block;
-                width: 220px;
-            }}
-            table {{
-                border-collapse: collapse;
-                width: 100%;
-                margin-top: 20px;
-                font-size: 14px;
-            }}
-            th, td {{
-                border: 1px solid #ccc;
-                padding: 8px;
-                text-align: center;
-            }}
-            th {{
-                background-color: #1f1f1f;
-                color: white;
-            }}
-            .propinsi-header {{
-                background-color: #f1f1f1;
-                color: #222;
-                text-align: left;
-                font-weight: bold;
-                padding-left: 12px;
-            }}
-            tr:hover td {{
-                background-color: #f9f9f9;
-            }}
-        </style>
-    </head>
-    <body>
-        <h1>Rangkuman Hasil Akhir Kalkulasi Pemilu 2029</h1>
-        <div class="info-box">
-            <div><strong>Partai:</strong> {selected_party}</div>
-            <div><strong>Perolehan Suara 2024:</strong> {suara_2024}</div>
-            <div><strong>Perolehan Kursi 2024:</strong> {kursi_2024}</div>
-            <div><strong>Total Target Suara 2029:</strong> {total_suara}</div>
-            <div><strong>Total Target Kursi 2029:</strong> {total_kursi}</div>
-            <div><strong>Total RAB (Rp):</strong> {total_rab}</div>
-        </div>
-        <h2>Persebaran Dapil Potensial</h2>
-        <table>
-            <tr>
-                <th>Dapil</th>
-                <th>Alokasi Kursi</th>
-                <th>Kursi 2024</th>
-                <th>Target Kursi 2029</th>
-                <th>Suara 2024</th>
-                <th>Target Suara 2029</th>
-                <th>Total RAB</th>
-            </tr>
-            {rows_html}
-        </table>
-    </body>
-    </html>
-    """
-    return html_template
-
-html_export = export_to_html(df_terpilih, df_dapil, selected_party, votes_2024, seats_2024)
-html_bytes = html_export.encode("utf-8")
+html_bytes = pipeline.hasil("ekspor")
 
 st.download_button(
     label="📥 Download Ringkasan (HTML)",
@@ -874,4 +398,248 @@ st.download_button(
     mime="text/html"
 )
 
-st.caption("Setelah mengunduh file, buka di browser dan tekan Ctrl+P (atau ⌘+P di Mac) untuk menyimpan sebagai PDF.")
\ No newline at end of file
+if backend_pdf():
+    st.download_button(
+        label="📥 Download Ringkasan (PDF)",
+        data=pipeline.hasil("ekspor_pdf"),
+        file_name="rangkuman_kalkulasi_2029.pdf",
+        mime="application/pdf"
+    )
+else:
+    st.caption("Setelah mengunduh file, buka di browser dan tekan Ctrl+P (atau ⌘+P di Mac) untuk menyimpan sebagai PDF.")
+
+st.markdown("<br>", unsafe_allow_html=True)  # Spasi vertikal
+
+# === PART 6: ANALISIS SENSITIVITAS ===
+st.header("6. Analisis Sensitivitas")
+
+with st.expander("Sweep Faktor Kehilangan, Angka Psikologis & Target Kursi", expanded=False):
+    st.caption("Isi daftar nilai (mis. `0, 5, 10`) atau rentang `awal:akhir:langkah`. "
+               "Proporsi, biaya manajemen/pendampingan, dan metode seleksi dapil "
+               f"({METODE_SELEKSI[metode_seleksi]}) mengikuti input di atas.")
+    default_sweep = {
+        "target_kursi_2029": f"1:{max(int(target_kursi_2029) * 2, 10)}:1",
+        "kehilangan_2024": "0:20:5",
+        "kehilangan_sp": "0:20:5",
+        "angka_psikologis": f"{angka_psikologis}",
+    }
+    kolom_sweep = st.columns(len(SUMBU))
+    teks_sweep = {}
+    for kolom, sumbu in zip(kolom_sweep, SUMBU):
+        with kolom:
+            teks_sweep[sumbu] = st.text_input(LABEL_SUMBU[sumbu], value=default_sweep[sumbu], key=f"sweep_{sumbu}")
+
+    try:
+        grid_sweep = {sumbu: rentang_nilai(teks) for sumbu, teks in teks_sweep.items()}
+    except ValueError as e:
+        st.error(f"Input grid tidak valid: {e}")
+        grid_sweep = None
+
+    if grid_sweep and all(len(v) for v in grid_sweep.values()):
+        pipeline.atur(grid_sweep=grid_sweep)
+        hasil_sweep = pipeline.hasil("sweep")
+        st.caption(f"{hasil_sweep['total_rab'].size:,} kombinasi dievaluasi".replace(",", "."))
+
+        col_baris, col_kolom, col_nilai = st.columns(3)
+        with col_baris:
+            sumbu_baris = st.selectbox("Baris", SUMBU, index=1, format_func=LABEL_SUMBU.get, key="sweep_baris")
+        with col_kolom:
+            sumbu_kolom = st.selectbox("Kolom", SUMBU, index=0, format_func=LABEL_SUMBU.get, key="sweep_kolom")
+        with col_nilai:
+            nilai_sweep = st.selectbox("Nilai", ["total_rab", "total_sp", "total_target_suara"], key="sweep_nilai",
+                                       format_func={"total_rab": "Total RAB", "total_sp": "Total SP",
+                                                    "total_target_suara": "Total Target Suara"}.get)
+
+        # Sumbu lain ditetapkan pada salah satu nilainya
+        tetap = {}
+        for sumbu in SUMBU:
+            if sumbu not in (sumbu_baris, sumbu_kolom) and len(grid_sweep[sumbu]) > 1:
+                nilai = st.select_slider(LABEL_SUMBU[sumbu], options=list(range(len(grid_sweep[sumbu]))),
+                                         format_func=lambda i, s=sumbu: f"{grid_sweep[s][i]:g}", key=f"sweep_tetap_{sumbu}")
+                tetap[sumbu] = nilai
+
+        if sumbu_baris == sumbu_kolom:
+            st.warning("Pilih sumbu baris dan kolom yang berbeda.")
+        else:
+            df_heatmap = heatmap(hasil_sweep, sumbu_baris, sumbu_kolom, nilai_sweep, tetap)
+            st.dataframe(df_heatmap.apply(lambda kolom: kolom.map(format_ribuan)), use_container_width=True)
+
+        if hasil_sweep["total_rab"].size <= 200_000:
+            st.download_button(
+                label="📥 Download Hasil Sweep (CSV)",
+                data=tabel_sweep(hasil_sweep).to_csv(index=False).encode("utf-8"),
+                file_name="sensitivitas_2029.csv",
+                mime="text/csv",
+            )
+
+# === PART 7: SIMULASI MONTE CARLO ===
+st.header("7. Simulasi Monte Carlo Pergeseran Suara")
+
+with st.expander("Peluang Dapil Terpilih Berhasil Direbut", expanded=False):
+    st.caption("Suara partai di dapil terpilih diasumsikan mencapai target 2029, lalu seluruh suara partai "
+               "digeser acak (log-normal) pada tingkat nasional, propinsi, dan dapil.")
+    col_mc1, col_mc2, col_mc3, col_mc4 = st.columns(4)
+    with col_mc1:
+        jumlah_draw = st.number_input("Jumlah Simulasi", min_value=100, max_value=1_000_000, value=10_000, step=1_000, key="mc_draw")
+    with col_mc2:
+        sigma_nasional = st.number_input("Swing Nasional (σ, %)", min_value=0.0, max_value=100.0, value=5.0, step=1.0, key="mc_nasional")
+    with col_mc3:
+        sigma_propinsi = st.number_input("Swing Propinsi (σ, %)", min_value=0.0, max_value=100.0, value=5.0, step=1.0, key="mc_propinsi")
+    with col_mc4:
+        sigma_dapil = st.number_input("Swing Dapil (σ, %)", min_value=0.0, max_value=100.0, value=5.0, step=1.0, key="mc_dapil")
+
+    st.caption("Override per partai (opsional): **Geser Rata-rata** menggeser rata-rata suara partai "
+               "(mis. -10 = turun 10%), **Skala σ** mengalikan ketiga σ di atas untuk partai tersebut.")
+    partai_mc = list(dict.fromkeys([*partai_terpilih, selected_party]))
+    df_swing = st.data_editor(
+        tabel_swing_partai(partai_mc),
+        key=f"mc_swing_{'_'.join(partai_mc)}",
+        hide_index=True,
+        use_container_width=True,
+        disabled=["PARTAI"],
+        column_config={
+            "GESER_PERSEN": st.column_config.NumberColumn("Geser Rata-rata (%)", min_value=-99.0, max_value=1000.0, step=1.0),
+            "SKALA_SIGMA": st.column_config.NumberColumn("Skala σ (×)", min_value=0.0, max_value=10.0, step=0.1),
+        },
+    )
+    try:
+        geser_partai, skala_partai = parameter_swing_partai(df_swing)
+    except ValueError as e:
+        st.error(f"Override swing tidak valid: {e}")
+        geser_partai, skala_partai = {}, {}
+
+    if st.button("Jalankan Simulasi", key="mc_jalankan"):
+        bar_mc = st.progress(0.0, text="Menjalankan simulasi...")
+        hasil_mc, df_peluang = monte_carlo_terpilih(
+            data, df_terpilih, selected_party, partai_terpilih, int(jumlah_draw),
+            sigma_nasional=sigma_nasional / 100, sigma_propinsi=sigma_propinsi / 100, sigma_dapil=sigma_dapil / 100,
+            geser_partai=geser_partai, skala_partai=skala_partai,
+            progress=lambda selesai, total: bar_mc.progress(selesai / total, text=f"{selesai:,}/{total:,} simulasi".replace(",", ".")),
+        )
+        bar_mc.empty()
+        st.session_state.hasil_mc = (selected_party, df_peluang, ringkasan_kursi(hasil_mc))
+
+    if "hasil_mc" in st.session_state and st.session_state.hasil_mc[0] == selected_party:
+        _, df_peluang, df_distribusi = st.session_state.hasil_mc
+        st.subheader("Peluang Flip Dapil Terpilih")
+        df_peluang_tampil = df_peluang.copy()
+        df_peluang_tampil["TOTAL_TARGET_SUARA_2029"] = df_peluang_tampil["TOTAL_TARGET_SUARA_2029"].apply(format_ribuan)
+        df_peluang_tampil["RATA_RATA_KURSI"] = df_peluang_tampil["RATA_RATA_KURSI"].map("{:.2f}".format)
+        df_peluang_tampil["PELUANG_FLIP"] = df_peluang_tampil["PELUANG_FLIP"].map("{:.1%}".format)
+        st.dataframe(df_peluang_tampil, use_container_width=True)
+        st.subheader("Distribusi Kursi Nasional per Partai")
+        st.dataframe(df_distribusi, use_container_width=True)
+
+st.markdown("<br>", unsafe_allow_html=True)  # Spasi vertikal
+
+# === PART 8: PERBANDINGAN METODE ALOKASI KURSI ===
+st.header("8. Perbandingan Metode Alokasi Kursi")
+
+with st.expander("Kursi Tiap Partai Menurut Metode Alokasi Lain", expanded=False):
+    st.caption("Seluruh dapil dibagi ulang dengan suara 2024 menurut setiap metode. "
+               f"Kolom SELISIH dihitung terhadap {METODE_ALOKASI[METODE_ACUAN]}.")
+    col_metode, col_tingkat_rekap = st.columns([3, 1])
+    with col_metode:
+        daftar_metode = st.multiselect("Metode", list(METODE_ALOKASI), default=list(METODE_ALOKASI),
+                                       format_func=METODE_ALOKASI.get, key="metode_alokasi")
+    with col_tingkat_rekap:
+        per_propinsi = st.radio("Rekap", ["Per Partai", "Per Propinsi"], key="metode_rekap") == "Per Propinsi"
+    if daftar_metode:
+        df_metode = tabel_selisih_metode(data, partai_terpilih, daftar_metode, per_propinsi=per_propinsi)
+        tampilkan_tabel(df_metode, "metode")
+
+with st.expander("Kursi Nasional per Ambang Batas Parlemen", expanded=False):
+    st.caption("Partai lolos ditentukan dari total suara nasional 2024 untuk setiap ambang, "
+               "lalu seluruh dapil dibagi ulang. Isi daftar nilai atau rentang `awal:akhir:langkah`.")
+    col_ambang, col_metode_ambang = st.columns([3, 2])
+    with col_ambang:
+        teks_ambang = st.text_input("Ambang (%)", value="0:7:1", key="ambang_daftar")
+    with col_metode_ambang:
+        metode_ambang = st.selectbox("Metode", list(METODE_ALOKASI), format_func=METODE_ALOKASI.get, key="ambang_metode")
+    try:
+        daftar_ambang = rentang_nilai(teks_ambang)
+    except ValueError as e:
+        st.error(f"Input ambang tidak valid: {e}")
+        daftar_ambang = []
+    if len(daftar_ambang):
+        pipeline.atur(daftar_ambang=daftar_ambang, metode_ambang=metode_ambang)
+        st.dataframe(pipeline.hasil("kursi_ambang"), use_container_width=True, hide_index=True)
+
+st.markdown("<br>", unsafe_allow_html=True)  # Spasi vertikal
+
+# === PART 9: SIMULASI TRANSFER SUARA & KOALISI ===
+st.header("9. Simulasi Transfer Suara & Koalisi")
+
+with st.expander("Skenario Transfer Suara Antar-Partai", expanded=False):
+    st.caption("Satu skenario per baris; beberapa aturan dipisah `;`. `A > B 30%` memindahkan 30% suara A ke B "
+               "(tambahkan `@ PROPINSI` untuk satu propinsi saja), `A + B` menggabungkan B ke A. "
+               "Partai lolos dihitung ulang setelah transfer bila ambang batas parlemen berlaku.")
+    teks_transfer = st.text_area(
+        "Skenario", key="transfer_teks", height=120,
+        value="PPP > PKB 50%\nPKB + PPP\nPSI > GERINDRA 30% @ JAWA BARAT; PERINDO > GOLKAR 30%",
+    )
+    try:
+        skenario_transfer = baca_aturan(teks_transfer)
+        pipeline.atur(aturan_transfer=[a for _, a in skenario_transfer], ambang_parlemen=ambang_parlemen)
+        hasil_transfer = pipeline.hasil("transfer")
+    except ValueError as e:
+        st.error(f"Skenario tidak valid: {e}")
+        skenario_transfer = []
+    if skenario_transfer:
+        label_transfer = [label for label, _ in skenario_transfer]
+        st.markdown("##### Selisih Kursi Nasional per Skenario")
+        tampilkan_tabel(tabel_transfer(hasil_transfer, label_transfer), "transfer")
+
+        st.markdown(f"##### Dapil Potensial {selected_party} pada Skenario")
+        pilihan_transfer = st.selectbox("Skenario", range(len(label_transfer)), format_func=label_transfer.__getitem__,
+                                        key="transfer_pilih")
+        data_skenario, partai_skenario = data_transfer(
+            data, skenario_transfer[pilihan_transfer][1], partai_terpilih, ambang_parlemen,
+        )
+        tampilkan_tabel(
+            kriteria_partai(data_skenario, selected_party, partai_list, partai_skenario, metode_target),
+            "transfer_kriteria",
+        )
+
+st.markdown("<br>", unsafe_allow_html=True)  # Spasi vertikal
+
+# === PART 10: KERENTANAN KURSI ===
+st.header("10. Kerentanan Kursi yang Dipegang")
+
+with st.expander("Margin Bertahan Setiap Kursi", expanded=False):
+    st.caption("Untuk setiap kursi hasil Sainte-Laguë 2024: suara minimum yang harus hilang (suara partai lain tetap) "
+               "agar kursi itu lepas, beserta partai yang merebutnya. Diurutkan dari margin terkecil.")
+    col_kerentanan, _ = st.columns([2, 3])
+    with col_kerentanan:
+        lingkup_kerentanan = st.radio("Partai", [selected_party, "Semua Partai"], horizontal=True, key="kerentanan_lingkup")
+    tampilkan_tabel(
+        tabel_kerentanan(data, partai_terpilih, None if lingkup_kerentanan == "Semua Partai" else selected_party),
+        "kerentanan",
+    )
+
+st.markdown("<br>", unsafe_allow_html=True)  # Spasi vertikal
+
+with st.expander("Debug: Waktu per Rerun", expanded=False):
+    st.checkbox("Lacak alokasi memori (tracemalloc, memperlambat perhitungan)", key="debug_alokasi")
+    st.caption(f"Sesi {perekam.sesi}, rerun ke-{perekam.rerun}: {perekam.total_detik():.3f} detik sampai panel ini.")
+    st.markdown("##### Tahap & Fungsi Terukur")
+    st.dataframe(perekam.tabel_kejadian(), use_container_width=True, hide_index=True)
+    st.markdown("##### Panggilan Berulang")
+    st.dataframe(perekam.tabel_panggilan(), use_container_width=True, hide_index=True)
+    st.markdown("##### Graf Tahap")
+    st.caption("STATUS `cache` berarti hasil tahap dipakai ulang dari rerun sebelumnya, `bersama` dari cache antar-sesi.")
+    st.dataframe(pipeline.tabel_waktu(), use_container_width=True, hide_index=True)
+    statistik = cache_bersama().statistik()
+    st.caption(
+        f"Cache bersama: {statistik['entri']} entri, {statistik['byte'] / 2**20:.1f} / "
+        f"{statistik['batas_byte'] / 2**20:.0f} MB, hit {statistik['hit']} (disk {statistik['hit_disk']}), "
+        f"miss {statistik['miss']}, dibuang {statistik['dibuang']}"
+    )
+    statistik = data.cache_turunan.statistik()
+    st.caption(
+        f"Cache turunan data: {statistik['entri']} entri, {statistik['byte'] / 2**20:.1f} / "
+        f"{statistik['batas_byte'] / 2**20:.0f} MB, dibuang {statistik['dibuang']}"
+    )
+
+perekam.tutup()
+aktifkan(None)
@@ -0,0 +1,122 @@
+"""Alokator acuan brute-force untuk pengujian.
+
+Seluruh hasil bagi satu dapil dihitung sebagai ``Fraction`` lalu diurutkan
+biasa, tanpa optimasi apa pun, sehingga mudah diperiksa dengan tangan.
+Dipakai sebagai pembanding mesin batch di ``kalkulator`` pada instans kecil.
+"""
+from fractions import Fraction
+
+import numpy as np
+
+from kalkulator.sainte_lague import peringkat_seri
+
+
+def peringkat_acuan(suara, pemecah_seri="urutan", seed=0):
+    """Peringkat seri satu dapil (0 = didahulukan), ditulis ulang dari definisinya.
+
+    Aturan ``undian`` memang didefinisikan oleh permutasi ``peringkat_seri``,
+    jadi untuk aturan itu fungsi tersebut dipakai apa adanya.
+    """
+    n = len(suara)
+    if pemecah_seri == "urutan":
+        return list(range(n))
+    if pemecah_seri == "suara":
+        urut = sorted(range(n), key=lambda p: (-int(suara[p]), p))
+        peringkat = [0] * n
+        for r, p in enumerate(urut):
+            peringkat[p] = r
+        return peringkat
+    return [int(r) for r in peringkat_seri(np.array([suara], dtype=np.int64), pemecah_seri, seed)[0]]
+
+
+def peringkat_matriks(suara, pemecah_seri="urutan", seed=0):
+    """Peringkat seri per baris matriks; ``undian`` diundi atas seluruh matriks seperti mesin batch."""
+    suara = np.asarray(suara, dtype=np.int64)
+    if pemecah_seri == "undian":
+        return peringkat_seri(suara, pemecah_seri, seed).tolist()
+    return [peringkat_acuan(baris, pemecah_seri) for baris in suara]
+
+
+def pembagi_ganjil(jumlah):
+    return [Fraction(2 * k + 1) for k in range(jumlah)]
+
+
+def pembagi_ganjil_modifikasi(jumlah):
+    return [Fraction(7, 5)] + [Fraction(2 * k + 1) for k in range(1, jumlah)]
+
+
+def pembagi_asli(jumlah):
+    return [Fraction(k + 1) for k in range(jumlah)]
+
+
+def alokasi_pembagi(suara, jumlah_kursi, pembagi=pembagi_ganjil, aktif=None, peringkat=None):
+    """``(kursi, urutan)`` satu dapil: ``jumlah_kursi`` hasil bagi terbesar.
+
+    Hasil bagi sama besar diurutkan menurut ``peringkat`` lalu pembagi.
+    """
+    n = len(suara)
+    aktif = [True] * n if aktif is None else list(aktif)
+    peringkat = list(range(n)) if peringkat is None else list(peringkat)
+    daftar_pembagi = pembagi(jumlah_kursi)
+    calon = [
+        (Fraction(int(suara[p])) / d, peringkat[p], k, p)
+        for p in range(n) if aktif[p]
+        for k, d in enumerate(daftar_pembagi)
+    ]
+    calon.sort(key=lambda c: (-c[0], c[1], c[2]))
+    urutan = [p for *_, p in calon[:jumlah_kursi]]
+    kursi = [urutan.count(p) for p in range(n)]
+    return kursi, urutan
+
+
+def alokasi_hare(suara, jumlah_kursi, aktif=None, peringkat=None):
+    """Kursi satu dapil menurut kuota Hare dan sisa terbesar (pecahan eksak)."""
+    n = len(suara)
+    aktif = [True] * n if aktif is None else list(aktif)
+    peringkat = list(range(n)) if peringkat is None else list(peringkat)
+    total = sum(int(suara[p]) for p in range(n) if aktif[p])
+    if total == 0 or jumlah_kursi <= 0:
+        return [0] * n
+    kuota = Fraction(total, jumlah_kursi)
+    bagian = [Fraction(int(suara[p])) / kuota if aktif[p] else Fraction(0) for p in range(n)]
+    kursi = [int(b) for b in bagian]
+    sisa = sorted((p for p in range(n) if aktif[p]), key=lambda p: (-(bagian[p] - kursi[p]), peringkat[p]))
+    for p in sisa[:jumlah_kursi - sum(kursi)]:
+        kursi[p] += 1
+    return kursi
+
+
+def kursi_acuan(suara, alokasi, aktif=None, pemecah_seri="urutan", seed=0, pembagi=pembagi_ganjil):
+    """Matriks kursi (dapil × partai) dengan ``alokasi_pembagi`` baris per baris.
+
+    Peringkat seri ``undian`` dihitung atas seluruh matriks, sama seperti
+    mesin batch (permutasi per baris dari satu generator).
+    """
+    suara = np.asarray(suara, dtype=np.int64)
+    n_dapil, n_partai = suara.shape
+    aktif = np.ones((n_dapil, n_partai), dtype=bool) if aktif is None else \
+        np.broadcast_to(np.asarray(aktif, dtype=bool), (n_dapil, n_partai))
+    peringkat = peringkat_matriks(suara, pemecah_seri, seed)
+    kursi = np.zeros((n_dapil, n_partai), dtype=np.int64)
+    for d in range(n_dapil):
+        kursi[d] = alokasi_pembagi(suara[d], int(alokasi[d]), pembagi, aktif[d], peringkat[d])[0]
+    return kursi
+
+
+def suara_acak(rng, n_dapil, n_partai, maks=10_000):
+    """Matriks suara kecil dengan banyak hasil bagi kembar (kelipatan bersama dan suara nol)."""
+    suara = rng.integers(0, maks, size=(n_dapil, n_partai))
+    kembar = rng.random(n_dapil) < 0.5
+    # Kelipatan 3·5·7 dari bilangan kecil membuat v1/d1 == v2/d2 untuk banyak pasangan pembagi
+    suara[kembar] = 105 * rng.integers(0, 12, size=(int(kembar.sum()), n_partai))
+    return suara
+
+
+def instans_acak(seed, n_dapil=40, maks_partai=6, maks_kursi=10, maks_suara=10_000, peluang_aktif=0.8):
+    """Instans acak ``(suara, alokasi, aktif)``: 1..``maks_partai`` partai, 0..``maks_kursi`` kursi per dapil."""
+    rng = np.random.default_rng(seed)
+    n_partai = int(rng.integers(1, maks_partai + 1))
+    suara = suara_acak(rng, n_dapil, n_partai, maks_suara)
+    alokasi = rng.integers(0, maks_kursi + 1, size=n_dapil)
+    aktif = rng.random((n_dapil, n_partai)) < peluang_aktif
+    return suara, alokasi, aktif
@@ -0,0 +1,172 @@
+import numpy as np
+import pytest
+
+from benchmarks.sintetis import buat_data_sintetis
+from kalkulator.ambang import kehilangan_minimum_kursi, suara_minimum_kursi, tabel_ambang, tabel_kerentanan
+from kalkulator.sainte_lague import BATAS_FLOAT_EKSAK, PEMECAH_SERI
+from tests.referensi import alokasi_pembagi, instans_acak, kursi_acuan, peringkat_acuan, peringkat_matriks
+
+
+# Suara kecil agar pengecekan ±1 suara dengan alokator acuan tetap murah
+UKURAN_KECIL = {"n_dapil": 25, "maks_partai": 5, "maks_kursi": 8, "maks_suara": 2_000, "peluang_aktif": 0.85}
+
+
+def kursi_dengan_suara(baris, s, aktif, p, v, pemecah_seri="urutan", peringkat=None):
+    # Peringkat "suara" mengikuti suara baru; "urutan" dan "undian" tidak bergantung pada suara
+    baru = baris.copy()
+    baru[p] = v
+    if pemecah_seri == "suara":
+        peringkat = peringkat_acuan(baru, pemecah_seri)
+    return alokasi_pembagi(baru, int(s), aktif=aktif, peringkat=peringkat)[0]
+
+
+def periksa_ambang_acuan(suara, alokasi, pemecah_seri, maks_tambahan=3):
+    """Tambahan dan kehilangan minimum diperiksa ±1 suara terhadap alokator acuan ``Fraction``."""
+    kursi, tambahan = suara_minimum_kursi(suara, alokasi, maks_tambahan=maks_tambahan, pemecah_seri=pemecah_seri)
+    _, kehilangan, _ = kehilangan_minimum_kursi(suara, alokasi, pemecah_seri=pemecah_seri)
+    np.testing.assert_array_equal(kursi, kursi_acuan(suara, alokasi, pemecah_seri=pemecah_seri))
+    peringkat = peringkat_matriks(suara, pemecah_seri)
+    for d, (baris, s) in enumerate(zip(suara, alokasi)):
+        baris = np.array([int(v) for v in baris], dtype=object)
+
+        def kursi_baru(p, v):
+            return kursi_dengan_suara(baris, s, None, p, v, pemecah_seri, peringkat[d])
+
+        for p in range(len(baris)):
+            for j in range(1, maks_tambahan + 1):
+                x = int(tambahan[d, p, j - 1])
+                if x >= 0:
+                    assert kursi_baru(p, baris[p] + x)[p] >= kursi[d, p] + j
+                    if x > 0:
+                        assert kursi_baru(p, baris[p] + x - 1)[p] < kursi[d, p] + j
+                elif kursi[d, p] + j <= s:
+                    # Hanya mustahil bila targetnya melampaui int64
+                    assert kursi_baru(p, np.iinfo(np.int64).max)[p] < kursi[d, p] + j
+            for k in range(1, kursi[d, p] + 1):
+                x = int(kehilangan[d, p, k - 1])
+                if x > 0:
+                    assert kursi_baru(p, baris[p] - x)[p] < k
+                    assert kursi_baru(p, baris[p] - x + 1)[p] >= k
+
+
+@pytest.mark.parametrize("pemecah_seri", list(PEMECAH_SERI))
+@pytest.mark.parametrize("seed", range(25))
+def test_kehilangan_minimum_dan_perebut(seed, pemecah_seri):
+    suara, alokasi, aktif = instans_acak(seed, **UKURAN_KECIL)
+    kursi, kehilangan, perebut = kehilangan_minimum_kursi(suara, alokasi, aktif, pemecah_seri=pemecah_seri, seed=seed)
+    np.testing.assert_array_equal(kursi, kursi_acuan(suara, alokasi, aktif, pemecah_seri, seed))
+    peringkat = peringkat_matriks(suara, pemecah_seri, seed)
+    for d, (baris, s) in enumerate(zip(suara, alokasi)):
+        def kursi_baru(p, v):
+            return kursi_dengan_suara(baris, s, aktif[d], p, v, pemecah_seri, peringkat[d])
+
+        for p in range(len(baris)):
+            for k in range(1, kehilangan.shape[2] + 1):
+                x, lawan = kehilangan[d, p, k - 1], perebut[d, p, k - 1]
+                if k > kursi[d, p]:
+                    assert x == -1 and lawan == -1
+                elif x == -1:
+                    # Kursi tidak dapat lepas: tanpa suara sekalipun partai tetap memegang k kursi
+                    assert lawan == -1
+                    assert kursi_baru(p, 0)[p] >= k
+                else:
+                    # Margin eksak: kehilangan x suara melepas kursi ke-k, x - 1 belum
+                    assert 1 <= x <= baris[p]
+                    sesudah = kursi_baru(p, baris[p] - x)
+                    assert sesudah[p] < k
+                    assert kursi_baru(p, baris[p] - x + 1)[p] >= k
+                    assert lawan != p and sesudah[lawan] > kursi[d, lawan]
+
+
+@pytest.mark.parametrize("pemecah_seri", list(PEMECAH_SERI))
+@pytest.mark.parametrize("seed", range(25))
+def test_suara_minimum_kursi_tambahan(seed, pemecah_seri):
+    suara, alokasi, aktif = instans_acak(seed, **UKURAN_KECIL)
+    kursi, tambahan = suara_minimum_kursi(suara, alokasi, aktif, maks_tambahan=3, pemecah_seri=pemecah_seri, seed=seed)
+    np.testing.assert_array_equal(kursi, kursi_acuan(suara, alokasi, aktif, pemecah_seri, seed))
+    peringkat = peringkat_matriks(suara, pemecah_seri, seed)
+    for d, (baris, s) in enumerate(zip(suara, alokasi)):
+        def kursi_baru(p, v):
+            return kursi_dengan_suara(baris, s, aktif[d], p, v, pemecah_seri, peringkat[d])
+
+        for p in range(len(baris)):
+            for j in range(1, 4):
+                x = tambahan[d, p, j - 1]
+                if x == -1:
+                    # Mustahil: melebihi alokasi, partai tidak aktif, atau kursi partai lain tidak cukup
+                    besar = kursi_baru(p, baris[p] + 10 * (int(baris.sum()) + 1) * (2 * int(s) + 1))
+                    assert besar[p] < kursi[d, p] + j
+                    continue
+                assert kursi_baru(p, baris[p] + x)[p] >= kursi[d, p] + j
+                if x > 0:
+                    assert kursi_baru(p, baris[p] + x - 1)[p] < kursi[d, p] + j
+
+
+@pytest.mark.parametrize("pemecah_seri", list(PEMECAH_SERI))
+@pytest.mark.parametrize("seed", range(5))
+def test_seri_tepat_mengikuti_pemecah_seri(pemecah_seri, seed):
+    # Partai 1 menyamai 300/1 tepat dengan 100 suara tambahan; seri diputuskan peringkatnya.
+    # Untuk "suara" kedua partai bersuara 300 saat seri, jadi nomor urut (partai 0) menang.
+    suara = np.array([[300, 200]])
+    alokasi = np.array([1])
+    peringkat = peringkat_matriks(suara, pemecah_seri, seed)[0]
+    partai_1_menang = pemecah_seri == "undian" and peringkat[1] < peringkat[0]
+    _, tambahan = suara_minimum_kursi(suara, alokasi, maks_tambahan=1, pemecah_seri=pemecah_seri, seed=seed)
+    assert tambahan[0, :, 0].tolist() == [-1, 100 if partai_1_menang else 101]
+    # Sisi bertahan: partai 0 melepas kursinya begitu suaranya seri (kalah) atau di bawah 200
+    _, kehilangan, perebut = kehilangan_minimum_kursi(suara, alokasi, pemecah_seri=pemecah_seri, seed=seed)
+    assert kehilangan[0, :, 0].tolist() == [100 if partai_1_menang else 101, -1]
+    assert perebut[0, :, 0].tolist() == [1, -1]
+
+
+@pytest.mark.parametrize("pemecah_seri", list(PEMECAH_SERI))
+def test_suara_besar_memakai_jalur_bilangan_bulat(pemecah_seri):
+    # 3a+1 / 3 lebih besar dari a dengan selisih 1/3 tetapi sama dalam float:
+    # pesaing penentu harus diurutkan eksak agar ambangnya minimal
+    a = (1 << 55) + 1
+    suara = np.array([[10, a, 3 * a + 1]])
+    alokasi = np.array([3])
+    assert a * 3 >= BATAS_FLOAT_EKSAK and float(3 * a + 1) / 3 == float(a)
+    periksa_ambang_acuan(suara, alokasi, pemecah_seri)
+
+
+@pytest.mark.parametrize("pemecah_seri", list(PEMECAH_SERI))
+def test_suara_di_atas_batas_int64(pemecah_seri):
+    # u·(2n - 1) melampaui int64: dihitung dengan int Python, target di luar int64 bernilai -1
+    a = (1 << 60) + 3
+    suara = np.array([[a, 3 * a - 1, 5 * a + 1, 7], [a, a, 2 * a, a]])
+    alokasi = np.array([4, 3])
+    periksa_ambang_acuan(suara, alokasi, pemecah_seri)
+    _, tambahan = suara_minimum_kursi(suara, alokasi, pemecah_seri=pemecah_seri)
+    assert (tambahan[0, 3] == -1).any()
+
+
+def test_tabel_kerentanan_satu_baris_per_kursi():
+    data = buat_data_sintetis(40, seed=3, jumlah_propinsi=5)
+    df = tabel_kerentanan(data, data.partai_lolos)
+    assert len(df) == int(data.alokasi.sum())
+    assert df["PERINGKAT_NASIONAL"].tolist() == list(range(1, len(df) + 1))
+
+    # Margin menaik, kursi yang tidak dapat lepas (-1) paling akhir
+    margin = df["SUARA_HILANG_MINIMUM"].to_numpy()
+    dapat_lepas = margin >= 0
+    assert not (dapat_lepas[1:] & ~dapat_lepas[:-1]).any()
+    assert (np.diff(margin[dapat_lepas]) >= 0).all()
+    for _, grup in df.groupby("PROPINSI"):
+        assert grup["PERINGKAT_PROPINSI"].tolist() == list(range(1, len(grup) + 1))
+
+    pkb = tabel_kerentanan(data, data.partai_lolos, partai="PKB")
+    assert set(pkb["PARTAI"]) <= {"PKB"}
+    assert len(pkb) == int(data.kursi_partai("PKB").sum())
+
+    # Aturan seri lain disimpan terpisah di cache dan sama dengan kernel
+    baris = np.flatnonzero(data.dapil_lengkap)
+    suara = data.df_suara[data.partai_lolos].fillna(0).to_numpy().astype(np.int64)[baris]
+    undian = tabel_kerentanan(data, data.partai_lolos, pemecah_seri="undian", seed=7)
+    kursi, kehilangan, _ = kehilangan_minimum_kursi(suara, data.alokasi[baris], pemecah_seri="undian", seed=7)
+    assert len(undian) == len(df)
+    dipegang = np.arange(1, kehilangan.shape[2] + 1) <= kursi[:, :, None]
+    assert sorted(undian["SUARA_HILANG_MINIMUM"]) == sorted(kehilangan[dipegang])
+    ambang = tabel_ambang(data, data.partai_lolos, maks_tambahan=2, pemecah_seri="undian", seed=7)
+    _, tambahan = suara_minimum_kursi(suara, data.alokasi[baris], maks_tambahan=2, pemecah_seri="undian", seed=7)
+    assert ambang["SUARA_TAMBAHAN_MINIMUM"].tolist() == tambahan[tambahan >= 0].tolist()
@@ -0,0 +1,91 @@
+from fractions import Fraction
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.sintetis import buat_data_sintetis
+from kalkulator.ambang import kehilangan_minimum_kursi, suara_minimum_kursi, tabel_ambang, tabel_kerentanan
+from kalkulator.kriteria import KOLOM_KRITERIA, kriteria_semua_partai
+from kalkulator.metode_alokasi import METODE_ALOKASI, kursi_metode, tabel_kursi_ambang
+from kalkulator.sainte_lague import alokasi_batch
+from tests.referensi import kursi_acuan
+
+
+@pytest.fixture(scope="module")
+def data():
+    return buat_data_sintetis(30, jumlah_partai=12, seed=1)
+
+
+def lolos_acuan(total, ambang):
+    return [Fraction(int(t) * 100) >= Fraction(ambang) * int(total.sum()) for t in total]
+
+
+def test_mask_ambang_dari_total_nasional(data):
+    daftar = [0, 0.5, 1, 4, 5, 7.5, 20, 100]
+    mask = data.mask_ambang(daftar)
+    assert mask.shape == (len(daftar), len(data.partai))
+    for ambang, baris in zip(daftar, mask):
+        assert baris.tolist() == lolos_acuan(data.total_suara_nasional, ambang)
+        assert data.partai_lolos_ambang(ambang) == [p for p, m in zip(data.partai, baris) if m]
+    assert mask[0].all()
+
+
+def test_ambang_tepat_di_batas_lolos():
+    data = buat_data_sintetis(3, jumlah_partai=3, seed=0)
+    data.total_suara_nasional = np.array([4, 96, 0])
+    assert data.mask_ambang(4).tolist() == [True, True, False]
+    assert data.mask_ambang(4.01).tolist() == [False, True, False]
+
+
+def test_tabel_kursi_ambang_sama_dengan_alokasi_per_ambang(data):
+    daftar = [0, 3, 4, 10, 100]
+    baris = np.flatnonzero(data.dapil_lengkap)
+    suara = np.asarray(data.matriks_suara, dtype=np.int64)[baris]
+    for metode in METODE_ALOKASI:
+        df = tabel_kursi_ambang(data, daftar, metode)
+        for i, ambang in enumerate(daftar):
+            aktif = data.mask_ambang(ambang)
+            kursi = kursi_metode(suara, data.alokasi[baris], metode, partai_aktif=aktif).sum(axis=0)
+            assert df["JUMLAH_PARTAI_LOLOS"].iloc[i] == aktif.sum()
+            for j, partai in enumerate(data.partai):
+                if partai in df.columns:
+                    assert df[partai].iloc[i] == kursi[j]
+                else:
+                    assert kursi[j] == 0
+    kursi_sl = kursi_acuan(suara, data.alokasi[baris], data.mask_ambang(4)).sum(axis=0)
+    df = tabel_kursi_ambang(data, [4])
+    assert [df[p].iloc[0] if p in df.columns else 0 for p in data.partai] == kursi_sl.tolist()
+
+
+def test_tanpa_partai_lolos_kernel():
+    suara = np.array([[100, 200, 300], [5, 0, 7]])
+    alokasi = np.array([3, 2])
+    tidak_aktif = np.zeros(3, dtype=bool)
+
+    kursi, urutan = alokasi_batch(suara, alokasi, tidak_aktif)
+    assert kursi.tolist() == [[0, 0, 0], [0, 0, 0]] and (urutan == -1).all()
+    for metode in METODE_ALOKASI:
+        assert not kursi_metode(suara, alokasi, metode, partai_aktif=tidak_aktif).any()
+
+    # Matriks tanpa kolom partai sama sekali
+    kosong = np.zeros((2, 0), dtype=np.int64)
+    kursi, urutan = alokasi_batch(kosong, alokasi)
+    assert kursi.shape == (2, 0) and urutan.shape == (2, 3) and (urutan == -1).all()
+    for metode in METODE_ALOKASI:
+        assert kursi_metode(kosong, alokasi, metode).shape == (2, 0)
+    assert suara_minimum_kursi(kosong, alokasi)[1].shape == (2, 0, 4)
+    assert kehilangan_minimum_kursi(kosong, alokasi)[1].shape == (2, 0, 3)
+
+
+def test_tanpa_partai_lolos_tabel(data):
+    lolos = data.partai_lolos_ambang(100)
+    assert lolos == []
+    tabel, rentang = kriteria_semua_partai(data, lolos, lolos)
+    assert isinstance(tabel, pd.DataFrame) and tabel.empty and rentang == {}
+    assert list(tabel.columns) == KOLOM_KRITERIA
+    # Partai pilihan tetap dihitung sebagai satu-satunya peserta tambahan
+    tabel, rentang = kriteria_semua_partai(data, data.partai, lolos)
+    assert set(rentang) == set(data.partai) and list(tabel.columns) == KOLOM_KRITERIA
+    assert tabel_ambang(data, lolos).empty
+    assert tabel_kerentanan(data, lolos).empty
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from kalkulator.metode_alokasi import FUNGSI_ALOKASI, METODE_ALOKASI, kursi_hare, kursi_metode
+from kalkulator.sainte_lague import PEMECAH_SERI
+from tests.referensi import (
+    alokasi_hare, instans_acak, kursi_acuan, pembagi_asli, pembagi_ganjil, pembagi_ganjil_modifikasi, peringkat_matriks,
+)
+
+PEMBAGI_ACUAN = {
+    "sainte_lague": pembagi_ganjil,
+    "sainte_lague_modifikasi": pembagi_ganjil_modifikasi,
+    "dhondt": pembagi_asli,
+}
+
+
+def hare_acuan(suara, alokasi, aktif, pemecah_seri, seed):
+    peringkat = peringkat_matriks(suara, pemecah_seri, seed)
+    return np.array([
+        alokasi_hare(suara[d], int(alokasi[d]), aktif[d], peringkat[d]) for d in range(len(suara))
+    ]).reshape(suara.shape)
+
+
+def test_registri_lengkap():
+    assert set(FUNGSI_ALOKASI) == set(METODE_ALOKASI)
+    with pytest.raises(ValueError):
+        kursi_metode(np.ones((1, 2)), [1], "tidak_ada")
+
+
+@pytest.mark.parametrize("metode", list(PEMBAGI_ACUAN))
+@pytest.mark.parametrize("pemecah_seri", list(PEMECAH_SERI))
+@pytest.mark.parametrize("seed", range(15))
+def test_metode_divisor_sama_dengan_acuan(seed, pemecah_seri, metode):
+    suara, alokasi, aktif = instans_acak(seed)
+    np.testing.assert_array_equal(
+        kursi_metode(suara, alokasi, metode, partai_aktif=aktif, pemecah_seri=pemecah_seri, seed=seed),
+        kursi_acuan(suara, alokasi, aktif, pemecah_seri, seed, pembagi=PEMBAGI_ACUAN[metode]),
+    )
+
+
+@pytest.mark.parametrize("pemecah_seri", list(PEMECAH_SERI))
+@pytest.mark.parametrize("seed", range(15))
+def test_hare_sama_dengan_acuan(seed, pemecah_seri):
+    suara, alokasi, aktif = instans_acak(seed)
+    kursi = kursi_hare(suara, alokasi, partai_aktif=aktif, pemecah_seri=pemecah_seri, seed=seed)
+    np.testing.assert_array_equal(kursi, hare_acuan(suara, alokasi, aktif, pemecah_seri, seed))
+
+    # Setiap partai aktif mendapat kuotanya dibulatkan ke bawah atau ke atas
+    total = np.where(aktif, suara, 0).sum(axis=1)
+    ada = total > 0
+    kuota = np.where(aktif, suara, 0)[ada] * alokasi[ada, None] / total[ada, None]
+    assert (kursi[ada] >= np.floor(kuota) - 1e-9).all() and (kursi[ada] <= np.ceil(kuota) + 1e-9).all()
+    np.testing.assert_array_equal(kursi[ada].sum(axis=1), alokasi[ada])
+
+
+def test_modifikasi_lebih_sulit_untuk_kursi_pertama():
+    # 1,4 sebagai pembagi pertama: 130/1,4 < 100 sehingga kursi kedua ke partai besar
+    suara = np.array([[300, 130]])
+    assert kursi_metode(suara, [2], "sainte_lague").tolist() == [[1, 1]]
+    assert kursi_metode(suara, [2], "sainte_lague_modifikasi").tolist() == [[2, 0]]
+    # Seri tepat 140/1,4 == 300/3: partai dengan nomor urut lebih awal menang
+    assert kursi_metode(np.array([[300, 140]]), [2], "sainte_lague_modifikasi").tolist() == [[2, 0]]
+    assert kursi_metode(np.array([[140, 300]]), [2], "sainte_lague_modifikasi").tolist() == [[1, 1]]
+
+
+def test_hare_sisa_kembar_dan_dapil_tanpa_suara():
+    # Kuota 100: partai 0 dan 1 sama-sama bersisa 0,5 untuk satu kursi sisa
+    suara = np.array([[50, 150, 100], [0, 0, 0]])
+    assert kursi_hare(suara, np.array([3, 3])).tolist() == [[1, 1, 1], [0, 0, 0]]
+    assert kursi_hare(suara, np.array([3, 3]), pemecah_seri="suara").tolist() == [[0, 2, 1], [0, 0, 0]]
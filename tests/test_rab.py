@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from kalkulator.rab import (
+    KOLOM_SP_KURSI, hitung_sp, hitung_sp_rab, hitung_total_rab, matriks_proporsi, rab_per_kursi, total_rab_per_kursi,
+)
+
+
+def kolom_baris_per_baris(df, kursi_input, kehilangan_2024, kehilangan_sp, angka_psikologis,
+                          biaya_manajemen, biaya_pendampingan):
+    """Rumus lama ``df.apply(..., axis=1)`` dari skrip Streamlit, disalin apa adanya sebagai acuan."""
+    df = df.copy()
+    df["TARGET_KEBUTUHAN"] = df["TOTAL_TARGET_SUARA_2029"]
+
+    def hitung_suara_tambahan(row):
+        if row["TARGET_TAMBAHAN_KURSI"] == 0:
+            return 0
+        elif row["TARGET_KEBUTUHAN"] < row["SUARA_2024"]:
+            return 0
+        return row["TARGET_KEBUTUHAN"] - row["SUARA_2024"]
+
+    df["SUARA_TAMBAHAN"] = df.apply(hitung_suara_tambahan, axis=1)
+
+    def hitung_total_suara_tambahan(row):
+        if row["SUARA_TAMBAHAN"] == 0:
+            return 0
+        return row["SUARA_TAMBAHAN"] + (row["SUARA_2024"] * (kehilangan_2024 / 100))
+
+    df["TOTAL_SUARA_TAMBAHAN"] = df.apply(hitung_total_suara_tambahan, axis=1)
+
+    def hitung_sp_baris(row):
+        if row["TOTAL_SUARA_TAMBAHAN"] == 0:
+            return 0
+        return row["TOTAL_SUARA_TAMBAHAN"] * (1 + kehilangan_sp / 100)
+
+    df["SP"] = df.apply(hitung_sp_baris, axis=1)
+
+    def hitung_sp_per_kursi(row):
+        jumlah_kursi = int(row["TARGET_TAMBAHAN_KURSI"])
+        total_sp = row["SP"]
+        hasil = [0.0, 0.0, 0.0, 0.0]
+        if jumlah_kursi == 1:
+            hasil[0] = total_sp
+        elif jumlah_kursi in [2, 3, 4]:
+            for i in range(jumlah_kursi):
+                proporsi = kursi_input.get(f"proporsi_{jumlah_kursi}_{i+1}", 0)
+                hasil[i] = (total_sp / jumlah_kursi) * (proporsi / 100)
+        return pd.Series(hasil)
+
+    df[KOLOM_SP_KURSI] = df.apply(hitung_sp_per_kursi, axis=1)
+
+    def hitung_total_rab_baris(row):
+        total = 0
+        for i in range(1, 5):
+            sp = row.get(f"SP_KURSI_{i}", 0)
+            if sp > 0:
+                total += sp * angka_psikologis + biaya_manajemen + biaya_pendampingan
+        return total
+
+    df["TOTAL_RAB"] = df.apply(hitung_total_rab_baris, axis=1)
+    return df
+
+
+def instans_acak(seed, n=60):
+    rng = np.random.default_rng(seed)
+    suara_2024 = rng.integers(0, 200_000, size=n)
+    df = pd.DataFrame({
+        "DAPIL": [f"DAPIL {i}" for i in range(n)],
+        "TARGET_TAMBAHAN_KURSI": rng.integers(0, 6, size=n),
+        "SUARA_2024": suara_2024,
+        # Sebagian target di bawah suara 2024 (tanpa suara tambahan)
+        "TOTAL_TARGET_SUARA_2029": suara_2024 + rng.integers(-50_000, 150_000, size=n),
+    })
+    kursi_input = {
+        f"proporsi_{j}_{i}": float(rng.choice([0, 25, 33.33, 50, 100, 150]))
+        for j in range(1, 5) for i in range(1, 5)
+    }
+    return df, kursi_input
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_sp_rab_sama_dengan_rumus_baris(seed):
+    df, kursi_input = instans_acak(seed)
+    rng = np.random.default_rng(seed + 100)
+    kehilangan_2024, kehilangan_sp = float(rng.uniform(0, 50)), float(rng.uniform(0, 50))
+    angka_psikologis, manajemen, pendampingan = 25_000, 1_500_000.0, 750_000.0
+
+    acuan = kolom_baris_per_baris(df, kursi_input, kehilangan_2024, kehilangan_sp,
+                                  angka_psikologis, manajemen, pendampingan)
+    hasil = hitung_sp_rab(df, kehilangan_2024, kehilangan_sp, matriks_proporsi(kursi_input),
+                          angka_psikologis, manajemen, pendampingan)
+    for kolom in ["SUARA_TAMBAHAN", "TOTAL_SUARA_TAMBAHAN", "SP", *KOLOM_SP_KURSI, "TOTAL_RAB"]:
+        np.testing.assert_allclose(hasil[kolom].to_numpy(dtype=float), acuan[kolom].to_numpy(dtype=float),
+                                   rtol=1e-12, err_msg=kolom)
+    assert hasil.index.equals(df.index)
+
+
+def test_rab_per_kursi_sama_dengan_rumus_lama():
+    sp_kursi = [1234.56, 0.0, 78.9, 0.4]
+    # Rumus lama: int(sp × angka psikologis), manajemen & pendampingan hanya untuk RAB > 0
+    assert rab_per_kursi(sp_kursi, 1000) == [int(sp * 1000) for sp in sp_kursi]
+    assert total_rab_per_kursi(rab_per_kursi(sp_kursi, 1), 10, 5) == [1249, 0, 93, 0]
+
+
+def test_parameter_array_sama_dengan_loop():
+    # Parameter berbentuk (G, 1) mengevaluasi G titik sweep sekaligus
+    df, kursi_input = instans_acak(0)
+    proporsi = matriks_proporsi(kursi_input)
+    kolom = (df["TARGET_TAMBAHAN_KURSI"].to_numpy(), df["TOTAL_TARGET_SUARA_2029"].to_numpy(), df["SUARA_2024"].to_numpy())
+    kehilangan = np.array([0.0, 5.0, 12.5])[:, None]
+    angka = np.array([1_000, 20_000, 50_000])[:, None]
+    sp = hitung_sp(*kolom, kehilangan, kehilangan, proporsi)
+    total = hitung_total_rab([sp[k] for k in KOLOM_SP_KURSI], angka, 100.0, 50.0)
+    for g in range(3):
+        satu = hitung_sp(*kolom, kehilangan[g, 0], kehilangan[g, 0], proporsi)
+        np.testing.assert_array_equal(sp["SP"][g], satu["SP"])
+        np.testing.assert_array_equal(
+            total[g], hitung_total_rab([satu[k] for k in KOLOM_SP_KURSI], angka[g, 0], 100.0, 50.0)
+        )
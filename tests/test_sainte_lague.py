@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from kalkulator.sainte_lague import (
+    BATAS_FLOAT_EKSAK, PEMECAH_SERI, AlokatorSainteLague, alokasi_batch, kursi_batch, simulasi_sainte_lague,
+)
+from tests.referensi import alokasi_pembagi, instans_acak, kursi_acuan, peringkat_acuan, peringkat_matriks
+
+
+@pytest.mark.parametrize("pemecah_seri", list(PEMECAH_SERI))
+@pytest.mark.parametrize("seed", range(20))
+def test_alokasi_batch_sama_dengan_acuan(seed, pemecah_seri):
+    suara, alokasi, aktif = instans_acak(seed)
+    kursi, urutan = alokasi_batch(suara, alokasi, aktif, pemecah_seri=pemecah_seri, seed=seed)
+    np.testing.assert_array_equal(kursi, kursi_acuan(suara, alokasi, aktif, pemecah_seri, seed))
+
+    # Urutan kursi juga sama, termasuk urutan hasil bagi kembar
+    peringkat = peringkat_matriks(suara, pemecah_seri, seed)
+    for d in range(len(suara)):
+        _, acuan = alokasi_pembagi(suara[d], int(alokasi[d]), aktif=aktif[d], peringkat=peringkat[d])
+        assert [p for p in urutan[d] if p >= 0] == acuan
+
+
+@pytest.mark.parametrize("pemecah_seri", list(PEMECAH_SERI))
+@pytest.mark.parametrize("seed", range(20))
+def test_kursi_batch_sama_dengan_acuan(seed, pemecah_seri):
+    suara, alokasi, aktif = instans_acak(seed)
+    np.testing.assert_array_equal(
+        kursi_batch(suara, alokasi, aktif, pemecah_seri=pemecah_seri, seed=seed),
+        kursi_acuan(suara, alokasi, aktif, pemecah_seri, seed),
+    )
+    np.testing.assert_array_equal(
+        kursi_batch(suara, alokasi, pemecah_seri=pemecah_seri, seed=seed),
+        kursi_acuan(suara, alokasi, None, pemecah_seri, seed),
+    )
+
+
+def test_seri_sempurna_mengikuti_pemecah_seri():
+    # Hasil bagi kembar untuk kursi terakhir: nomor urut partai menentukan pemenangnya
+    assert kursi_batch(np.array([[100, 300, 300]]), np.array([2])).tolist() == [[0, 1, 1]]
+    assert kursi_batch(np.array([[300, 100, 300]]), np.array([1])).tolist() == [[1, 0, 0]]
+    assert kursi_batch(np.array([[100, 300, 300, 400]]), np.array([2]), pemecah_seri="urutan").tolist() == [[0, 1, 0, 1]]
+    # Seri 300/1 lawan 900/3: "urutan" memilih partai 0, "suara" partai dengan suara dapil terbanyak
+    suara = np.array([[300, 900]])
+    kursi, urutan = alokasi_batch(suara, np.array([2]), pemecah_seri="urutan")
+    assert kursi.tolist() == [[1, 1]] and urutan.tolist() == [[1, 0]]
+    kursi, urutan = alokasi_batch(suara, np.array([2]), pemecah_seri="suara")
+    assert kursi.tolist() == [[0, 2]] and urutan.tolist() == [[1, 1]]
+    assert kursi_batch(suara, np.array([2]), pemecah_seri="suara").tolist() == [[0, 2]]
+
+
+def test_undian_dapat_direproduksi():
+    suara = np.full((200, 4), 105)
+    alokasi = np.full(200, 3)
+    a = kursi_batch(suara, alokasi, pemecah_seri="undian", seed=7)
+    np.testing.assert_array_equal(a, kursi_batch(suara, alokasi, pemecah_seri="undian", seed=7))
+    np.testing.assert_array_equal(a, alokasi_batch(suara, alokasi, pemecah_seri="undian", seed=7)[0])
+    assert (a.sum(axis=1) == 3).all()
+    # Undian yang adil tidak selalu memenangkan partai pertama
+    assert (a[:, 0] == 0).any()
+
+
+@pytest.mark.parametrize("pemecah_seri", list(PEMECAH_SERI))
+def test_suara_besar_memakai_jalur_bilangan_bulat(pemecah_seri):
+    # b/3 lebih besar dari a/1 dengan selisih 1/3, tetapi float(b)/3 == float(a):
+    # jalur float akan memberi kursi ke partai 0, jalur eksak ke partai 1
+    a = (1 << 55) + 1
+    b = 3 * a + 1
+    assert a * 3 >= BATAS_FLOAT_EKSAK and float(b) / 3 == float(a)
+    suara = np.array([[a, b], [a, b]])
+    alokasi = np.array([2, 3])
+    kursi_eksak = [[0, 2], [1, 2]]
+    assert kursi_acuan(suara, alokasi).tolist() == kursi_eksak
+    assert alokasi_batch(suara, alokasi, pemecah_seri=pemecah_seri)[0].tolist() == kursi_eksak
+    assert kursi_batch(suara, alokasi, pemecah_seri=pemecah_seri).tolist() == kursi_eksak
+
+
+def test_suara_di_atas_batas_int64():
+    # v·d ≥ 2^62 tidak aman untuk perkalian silang int64; baris ini dihitung dengan int Python
+    a = (1 << 60) + 3
+    suara = np.array([[a, 3 * a - 1, 5 * a + 1]])
+    alokasi = np.array([4])
+    acuan = kursi_acuan(suara, alokasi)
+    assert kursi_batch(suara, alokasi).tolist() == acuan.tolist()
+    assert alokasi_batch(suara, alokasi)[0].tolist() == acuan.tolist()
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_suara_besar_acak_sama_dengan_acuan(seed):
+    rng = np.random.default_rng(seed)
+    n_dapil, n_partai = 30, 4
+    dasar = rng.integers(1, 6, size=(n_dapil, n_partai)) * ((1 << 56) // 15)
+    suara = dasar + rng.integers(-2, 3, size=(n_dapil, n_partai))
+    alokasi = rng.integers(1, 6, size=n_dapil)
+    for pemecah_seri in PEMECAH_SERI:
+        acuan = kursi_acuan(suara, alokasi, None, pemecah_seri, seed)
+        np.testing.assert_array_equal(alokasi_batch(suara, alokasi, pemecah_seri=pemecah_seri, seed=seed)[0], acuan)
+        np.testing.assert_array_equal(kursi_batch(suara, alokasi, pemecah_seri=pemecah_seri, seed=seed), acuan)
+
+
+@pytest.mark.parametrize("pemecah_seri", list(PEMECAH_SERI))
+@pytest.mark.parametrize("seed", range(10))
+def test_alokator_inkremental_sama_dengan_acuan(seed, pemecah_seri):
+    suara, alokasi, _ = instans_acak(seed, n_dapil=15)
+    for baris, s in zip(suara, alokasi):
+        alokator = AlokatorSainteLague(baris, pemecah_seri=pemecah_seri, seed=seed)
+        alokator.alokasikan(s)
+        peringkat = peringkat_acuan(baris, pemecah_seri, seed)
+        if pemecah_seri == "undian":
+            peringkat = alokator.peringkat
+        assert alokator.urutan == alokasi_pembagi(baris, int(s), peringkat=peringkat)[1]
+
+
+@pytest.mark.parametrize("pemecah_seri", list(PEMECAH_SERI))
+@pytest.mark.parametrize("seed", range(10))
+def test_suara_untuk_kursi_tambahan_minimum(seed, pemecah_seri):
+    suara, alokasi, _ = instans_acak(seed, n_dapil=15)
+    for baris, s in zip(suara, alokasi):
+        alokator = AlokatorSainteLague(baris, pemecah_seri=pemecah_seri, seed=seed)
+        alokator.alokasikan(s)
+        for p in range(len(baris)):
+            x = alokator.suara_untuk_kursi_tambahan(p)
+            if x is None:
+                continue
+            baru = baris.copy()
+            baru[p] += x
+            assert kursi_acuan(baru[None, :], [s], None, pemecah_seri, seed)[0, p] > alokator.kursi[p]
+            if x > 0:
+                baru[p] -= 1
+                assert kursi_acuan(baru[None, :], [s], None, pemecah_seri, seed)[0, p] <= alokator.kursi[p]
+
+
+def test_simulasi_sainte_lague_satu_dapil():
+    df_suara = pd.DataFrame({"DAPIL": ["A", "B"], "X": [300, 10], "Y": [900, 20], "Z": ["-", 30]})
+    urutan, hasil = simulasi_sainte_lague("A", 3, df_suara, ["X", "Y", "Z"])
+    assert urutan == ["Y", "X", "Y"]
+    assert hasil == {"Y": 2, "X": 1}
+    assert simulasi_sainte_lague("C", 3, df_suara, ["X"]) == ([], {})
@@ -0,0 +1,127 @@
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from benchmarks.sintetis import buat_data_sintetis
+from kalkulator.transfer_suara import baca_aturan, data_transfer, evaluasi_transfer, kompilasi_transfer
+from tests.referensi import kursi_acuan
+
+SKENARIO_TEKS = """
+PPP > PKB 50%
+PKB + PPP
+PSI > GERINDRA 30% @ PROPINSI 02; PERINDO > GOLKAR 30%
+PAN > DEMOKRAT 100%; DEMOKRAT > PAN 100%
+GOLKAR + PAN + DEMOKRAT
+PKB > PKS 0,5%
+"""
+
+
+@pytest.fixture(scope="module")
+def data():
+    return buat_data_sintetis(30, seed=2, jumlah_propinsi=4)
+
+
+def skenario_acak(data, seed, jumlah=12):
+    rng = np.random.default_rng(seed)
+    propinsi = sorted(data.dapil_selaras["PROPINSI"].unique())
+    daftar = []
+    for _ in range(jumlah):
+        aturan = []
+        for _ in range(int(rng.integers(1, 3))):
+            dari, ke = rng.choice(len(data.partai), size=2, replace=False)
+            aturan.append({
+                "dari": data.partai[dari], "ke": data.partai[ke],
+                "persen": round(float(rng.uniform(0, 50)), 2),
+                "propinsi": propinsi[rng.integers(len(propinsi))] if rng.random() < 0.5 else None,
+            })
+        daftar.append(aturan)
+    return daftar
+
+
+def suara_acuan(data, aturan):
+    """Suara setelah seluruh aturan berlaku serentak terhadap suara awal (dibulatkan ke bawah)."""
+    awal = np.asarray(data.matriks_suara, dtype=np.int64)
+    suara = awal.copy()
+    propinsi = data.dapil_selaras["PROPINSI"].to_numpy()
+    for a in aturan:
+        if "gabung" in a:
+            pindah = [(anggota, a["gabung"][0], 100.0, None) for anggota in a["gabung"][1:]]
+        else:
+            pindah = [(a["dari"], a["ke"], a["persen"], a["propinsi"])]
+        for dari, ke, persen, wilayah in pindah:
+            i, j = data.partai.index(dari), data.partai.index(ke)
+            for d in range(len(suara)):
+                if wilayah is None or propinsi[d] == wilayah:
+                    jumlah = awal[d, i] * round(persen * 100) // 10_000
+                    suara[d, i] -= jumlah
+                    suara[d, j] += jumlah
+    return suara
+
+
+def aktif_acuan(suara, partai, partai_terpilih, ambang_parlemen):
+    if ambang_parlemen is None:
+        return np.array([p in partai_terpilih for p in partai])
+    total = suara.sum(axis=0)
+    return np.array([Fraction(int(t) * 100) >= Fraction(ambang_parlemen) * int(total.sum()) for t in total])
+
+
+def periksa_terhadap_acuan(data, daftar_skenario, ambang_parlemen):
+    partai_terpilih = list(data.partai_lolos)
+    hasil = evaluasi_transfer(data, daftar_skenario, partai_terpilih, ambang_parlemen)
+    awal = np.asarray(data.matriks_suara, dtype=np.int64)
+    kursi_awal = kursi_acuan(awal, data.alokasi, aktif_acuan(awal, data.partai, partai_terpilih, ambang_parlemen))
+    np.testing.assert_array_equal(hasil["kursi_awal"], kursi_awal.sum(axis=0))
+
+    for s, aturan in enumerate(daftar_skenario):
+        suara = suara_acuan(data, aturan)
+        aktif = aktif_acuan(suara, data.partai, partai_terpilih, ambang_parlemen)
+        np.testing.assert_array_equal(hasil["aktif"][s], aktif)
+        # Alokasi ulang SEMUA dapil dengan acuan harus sama dengan mesin yang hanya menghitung baris berubah
+        selisih_penuh = kursi_acuan(suara, data.alokasi, aktif) - kursi_awal
+        np.testing.assert_array_equal(hasil["selisih"][s], selisih_penuh.sum(axis=0))
+        milik = hasil["baris_skenario"] == s
+        selisih_baris = np.zeros_like(selisih_penuh)
+        selisih_baris[hasil["baris_dapil"][milik]] = hasil["selisih_baris"][milik]
+        np.testing.assert_array_equal(selisih_baris, selisih_penuh)
+        # Kursi hanya berpindah antarpartai: total tiap dapil tetap
+        assert (selisih_penuh.sum(axis=1) == 0).all()
+        assert hasil["selisih_propinsi"][s].sum(axis=0).tolist() == hasil["selisih"][s].tolist()
+
+
+@pytest.mark.parametrize("ambang_parlemen", [None, 4.0])
+def test_skenario_teks_sama_dengan_alokasi_ulang_penuh(data, ambang_parlemen):
+    daftar = [aturan for _, aturan in baca_aturan(SKENARIO_TEKS)]
+    periksa_terhadap_acuan(data, daftar, ambang_parlemen)
+
+
+@pytest.mark.parametrize("ambang_parlemen", [None, 4.0])
+@pytest.mark.parametrize("seed", range(3))
+def test_skenario_acak_sama_dengan_alokasi_ulang_penuh(data, seed, ambang_parlemen):
+    periksa_terhadap_acuan(data, skenario_acak(data, seed), ambang_parlemen)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_transfer_kekal_suara(data, seed):
+    awal = np.asarray(data.matriks_suara, dtype=np.int64)
+    for aturan in skenario_acak(data, seed, jumlah=5):
+        data_skenario, _ = data_transfer(data, aturan, list(data.partai_lolos))
+        suara = np.asarray(data_skenario.matriks_suara)
+        np.testing.assert_array_equal(suara, suara_acuan(data, aturan))
+        np.testing.assert_array_equal(suara.sum(axis=1), awal.sum(axis=1))
+        assert (suara >= 0).all()
+
+
+def test_kompilasi_dan_validasi(data):
+    transfer = kompilasi_transfer(data, [aturan for _, aturan in baca_aturan("PKB + PPP + PSI\nPAN > PKB 12,5% @ PROPINSI 01")])
+    assert transfer["skenario"].tolist() == [0, 0, 1]
+    assert transfer["basis_poin"].tolist() == [10_000, 10_000, 1_250]
+    assert transfer["propinsi"].tolist() == [-1, -1, 0]
+
+    for teks in ["PKB > PKB 10%", "PKB > TIDAK_ADA 10%", "PKB > PAN 10% @ ANTAH", "PKB > PAN 150%"]:
+        with pytest.raises(ValueError):
+            evaluasi_transfer(data, [baca_aturan(teks)[0][1]], list(data.partai_lolos))
+    with pytest.raises(ValueError):
+        evaluasi_transfer(data, [baca_aturan("PKB > PAN 60%; PKB > PKS 50%")[0][1]], list(data.partai_lolos))
+    with pytest.raises(ValueError):
+        baca_aturan("PKB PAN")